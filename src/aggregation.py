@@ -0,0 +1,193 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Tuple, Union, Iterable, Callable, Sized
+
+from instrumentation import instrument
+from record import TweetRecord
+from tweet import Tweet
+from visualization import CONTINENTS
+
+# a group of tweets: the country code, the continent, the type and the start of the time bucket
+Key = Tuple[str, str, Union[bool, None], datetime]
+
+
+class TweetCounts:
+	"""
+	Counts of located tweets per country, continent, type (denier) and time bucket, that are updated in O(1) per tweet.
+
+	Counts from several workers can be merged, and the series of the visualizations are computed from the counts,
+	so the tweets do not have to be kept or scanned again.
+	"""
+
+	def __init__(self, tweets: Iterable[Union[Tweet, TweetRecord]] = (), bucket_size: timedelta = timedelta(hours=1)):
+		"""
+		Constructs a new TweetCounts object.
+
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the initial tweets
+		bucket_size : timedelta
+			the size of the time buckets, tweets are counted per bucket since the epoch
+
+		Properties
+		----------
+		counts : Counter
+			the number of tweets per (country code, continent, denier, bucket)
+		num_unlocated : int
+			the number of tweets that were not counted, because they have no location
+		"""
+		self.bucket_size: timedelta = bucket_size
+		self.counts: Counter = Counter()
+		self.num_unlocated: int = 0
+
+		self.add_all(tweets)
+
+	def __len__(self) -> int:
+		return sum(self.counts.values())
+
+	def bucket(self, at: datetime) -> datetime:
+		"""
+		Parameters
+		----------
+		at : datetime
+			a datetime
+
+		Returns
+		-------
+		datetime
+			the start of the time bucket of the datetime
+		"""
+		return at - (at - datetime.min.replace(tzinfo=at.tzinfo)) % self.bucket_size
+
+	def add(self, tweet: Union[Tweet, TweetRecord]) -> None:
+		"""
+		Counts a (classified) tweet.
+
+		Parameters
+		----------
+		tweet : Union[Tweet, TweetRecord]
+			the tweet
+		"""
+		if not tweet.has_location():
+			self.num_unlocated += 1
+			return
+
+		denier: Union[bool, None] = bool(tweet.denier) if tweet.denier is not None else None
+		self.counts[(tweet.country_code, tweet.continent, denier, self.bucket(tweet.datetime))] += 1
+
+	# measured per batch, as the per-tweet add is too cheap to measure without slowing it down
+	@instrument(items=lambda self, tweets: len(tweets) if isinstance(tweets, Sized) else 1)
+	def add_all(self, tweets: Iterable[Union[Tweet, TweetRecord]]) -> None:
+		"""
+		Counts (classified) tweets.
+
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the tweets
+		"""
+		for tweet in tweets:
+			self.add(tweet)
+
+	def merge(self, other: 'TweetCounts') -> 'TweetCounts':
+		"""
+		Adds the counts of other tweets, e.g. of another worker, to these counts.
+
+		Parameters
+		----------
+		other : TweetCounts
+			the other counts, with the same bucket size
+
+		Returns
+		-------
+		TweetCounts
+			these counts
+		"""
+		assert other.bucket_size == self.bucket_size, 'Invalid counts: the bucket sizes differ'
+
+		self.counts.update(other.counts)
+		self.num_unlocated += other.num_unlocated
+
+		return self
+
+	def __add__(self, other: 'TweetCounts') -> 'TweetCounts':
+		return TweetCounts(bucket_size=self.bucket_size).merge(self).merge(other)
+
+	def total(self, key: Callable[[Key], Union[str, bool, datetime, None]],
+	          where: Union[Callable[[Key], bool], None] = None) -> Dict[Union[str, bool, datetime, None], int]:
+		"""
+		Sums the counts per group.
+
+		Parameters
+		----------
+		key : Callable[[Key], Union[str, bool, datetime, None]]
+			the function that maps a (country code, continent, denier, bucket) key to its group
+		where : Union[Callable[[Key], bool], None]
+			the function that selects the keys to sum, None for all keys
+
+		Returns
+		-------
+		Dict[Union[str, bool, datetime, None], int]
+			the number of tweets per group
+		"""
+		totals: defaultdict = defaultdict(int)
+		for counts_key, count in self.counts.items():
+			if where is None or where(counts_key):
+				totals[key(counts_key)] += count
+
+		return totals
+
+	def num_tweets_per_country_per_continent(self, where: Union[Callable[[Key], bool], None] = None) -> defaultdict:
+		"""
+		Parameters
+		----------
+		where : Union[Callable[[Key], bool], None]
+			the function that selects the (country code, continent, denier, bucket) keys to count, None for all keys
+
+		Returns
+		-------
+		defaultdict
+			the series of the number of tweets per country (lower case country code), per continent
+		"""
+		series: defaultdict = defaultdict(lambda: defaultdict(int))
+		for (country_code, continent), count in self.total(lambda key: key[:2], where).items():
+			series[continent][country_code.lower()] += count
+
+		return series
+
+	def num_tweets_per_country(self, where: Union[Callable[[Key], bool], None] = None) -> defaultdict:
+		"""
+		Parameters
+		----------
+		where : Union[Callable[[Key], bool], None]
+			the function that selects the (country code, continent, denier, bucket) keys to count, None for all keys
+
+		Returns
+		-------
+		defaultdict
+			the series of the number of tweets per country (lower case country code), for the world
+		"""
+		series: defaultdict = defaultdict(lambda: defaultdict(int))
+		for country_code, count in self.total(lambda key: key[0], where).items():
+			series['World'][country_code.lower()] += count
+
+		return series
+
+	def num_tweets_per_continent(self, where: Union[Callable[[Key], bool], None] = None) -> defaultdict:
+		"""
+		Parameters
+		----------
+		where : Union[Callable[[Key], bool], None]
+			the function that selects the (country code, continent, denier, bucket) keys to count, None for all keys
+
+		Returns
+		-------
+		defaultdict
+			the series of the number of tweets per continent (as named on the supranational world map), for the world
+		"""
+		series: defaultdict = defaultdict(lambda: defaultdict(int))
+		for continent, count in self.total(lambda key: key[1], where).items():
+			series['World'][CONTINENTS[continent]] += count
+
+		return series
@@ -0,0 +1,384 @@
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import List, Dict, Union, Any, Iterator, Callable
+
+import numpy as np
+import sklearn
+from aggregation import TweetCounts
+from deduplication import find_near_duplicates
+from filters import filter_by_hashtag, filter_by_hashtags_all, filter_by_hashtags_any, filter_before, filter_at, \
+	filter_after, filter_between, filter_by_country_code, filter_by_country_codes, filter_by_continent, \
+	filter_by_continents, sort_by_date_ascending, sort_by_date_descending, group_by_country_code, group_by_continent
+from hashtags import HashtagIndex
+from ingest import TweetLog
+from linear import TfidfLinearClassifier
+from preprocessing import TweetPreprocessor
+from rollup import RollupCube
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import ComplementNB
+from sklearn.tree import DecisionTreeClassifier
+from table import TweetTable
+from tweepy.models import Status
+from tweet import Tweet
+from vectorization import fit_transform_parallel, preprocess_parallel, transform_parallel
+from visualization import RenderSpec, render_all
+
+# the start of the synthetic tweets
+START: datetime = datetime(2020, 4, 15)
+# the time span of the synthetic tweets
+SPAN: timedelta = timedelta(days=7)
+
+# the hashtags of the synthetic tweets, the first ones are the most frequent (Zipf)
+HASHTAGS: List[str] = ['corona', 'covid19', 'coronavirus', 'COVID19', 'stayhome', 'lockdown', 'coronahoax', 'socialdistancing',
+                       'quarantine', 'pandemic', 'fakecorona', 'plandemic', 'staysafe', 'WHO', 'vaccine', 'coronascam']
+# hashtags and words that are more frequent in tweets of deniers
+DENIER_WORDS: List[str] = ['hoax', 'fake', 'scam', 'plandemic', 'lies', 'media', 'gooutside', 'flu']
+# the other words of the synthetic tweets, the first ones are the most frequent (Zipf)
+WORDS: List[str] = ['the', 'virus', 'people', 'home', 'stay', 'corona', 'covid', 'today', 'new', 'cases', 'death', 'doctor',
+                    'nurse', 'hospital', 'mask', 'we', 'you', 'all', 'safe', 'work', 'government', 'world', 'china',
+                    'test', 'testing', 'vaccine', 'week', 'health', 'family', 'care', 'lockdown', 'news', 'time', 'day',
+                    'thank', 'help', 'need', 'care', 'icu', 'risk', 'elbow', 'alone', 'together', 'strong', 'impact']
+# author locations, with their frequency: resolvable by the gazetteer, unresolvable or empty
+LOCATIONS: List[str] = ['London, UK', 'New York, NY', 'Los Angeles, CA', 'Toronto, Canada', 'Sydney, Australia',
+                        'Brussels, Belgium', 'Paris, France', 'Berlin', 'Mumbai, India', 'Lagos, Nigeria', 'Tokyo',
+                        'São Paulo, Brazil', 'Madrid, España', 'Ireland', 'Texas, USA', 'somewhere over the rainbow',
+                        'home', 'the internet', '']
+LOCATION_WEIGHTS: List[float] = [10, 10, 6, 5, 4, 3, 4, 3, 5, 2, 3, 2, 2, 2, 4, 3, 5, 3, 30]
+# country codes of the places of the tweets that have one
+PLACES: List[str] = ['US', 'GB', 'CA', 'AU', 'IN', 'BE', 'FR', 'DE', 'NG', 'JP', 'BR', 'ES', 'IE', 'ZA', 'NZ']
+
+
+def _zipf_weights(n: int) -> List[float]:
+	return [1 / rank for rank in range(1, n + 1)]
+
+
+def generate_statuses(num_tweets: int, seed: int = 0, denier_fraction: float = 0.2) -> Iterator[Status]:
+	"""
+	Generates synthetic tweets, shaped like the statuses of the Twitter API, without network access.
+
+	The words and hashtags follow Zipf distributions, about 5% of the tweets have a place and most of the other tweets
+	have an author location, and tweets of deniers use denier words and hashtags more often.
+
+	Parameters
+	----------
+	num_tweets : int
+		the number of tweets
+	seed : int
+		the seed of the random generator, the same seed generates the same tweets
+	denier_fraction : float
+		the fraction of tweets of deniers
+
+	Returns
+	-------
+	Iterator[Status]
+		the statuses, the label of every tweet (True = denier) is in its 'label' attribute
+	"""
+	rng: random.Random = random.Random(seed)
+	word_weights: List[float] = _zipf_weights(len(WORDS))
+	hashtag_weights: List[float] = _zipf_weights(len(HASHTAGS))
+
+	for i in range(num_tweets):
+		denier: bool = rng.random() < denier_fraction
+		words: List[str] = rng.choices(WORDS, word_weights, k=rng.randint(5, 25))
+		if denier:
+			words += rng.choices(DENIER_WORDS, k=rng.randint(1, 3))
+		elif rng.random() < 0.05:
+			words += rng.choices(DENIER_WORDS, k=1)
+		rng.shuffle(words)
+
+		hashtags: List[str] = list(set(rng.choices(HASHTAGS, hashtag_weights, k=rng.choice([0, 0, 1, 1, 1, 2, 3]))))
+		if denier and rng.random() < 0.5:
+			hashtags.append(rng.choice(['coronahoax', 'fakecorona', 'plandemic', 'coronascam']))
+
+		# some links, mentions and numbers, that are removed by the preprocessing
+		text: List[str] = words + [f'#{hashtag}' for hashtag in hashtags]
+		if rng.random() < 0.3:
+			text.insert(0, f'@user{rng.randint(0, 10000)}')
+		if rng.random() < 0.2:
+			text.append(str(rng.randint(0, 100000)))
+		if rng.random() < 0.4:
+			text.append(f'https://t.co/{rng.getrandbits(40):x}')
+
+		created_at: datetime = START + timedelta(seconds=rng.randrange(int(SPAN.total_seconds())))
+		created_at_string: str = created_at.strftime('%a %b %d %H:%M:%S +0000 %Y')
+		status: Status = Status.parse(None, {
+			'id': i,
+			'full_text': ' '.join(text),
+			'created_at': created_at_string,
+			'user': {
+				'id': rng.randint(0, num_tweets),
+				'name': f'User {i}',
+				'screen_name': f'user{i}',
+				'location': rng.choices(LOCATIONS, LOCATION_WEIGHTS)[0],
+				'created_at': created_at_string,
+			},
+			'entities': {'hashtags': [{'text': hashtag} for hashtag in hashtags]},
+			'place': {'country_code': rng.choice(PLACES)} if rng.random() < 0.05 else None,
+		})
+		status.label = denier
+
+		yield status
+
+
+class Benchmark:
+	"""
+	Times the stages of a benchmark run.
+	"""
+
+	def __init__(self):
+		"""
+		Constructs a new Benchmark object.
+
+		Properties
+		----------
+		stages : List[Dict[str, Any]]
+			the name, the wall-clock time, the number of items and the throughput of every timed stage
+		"""
+		self.stages: List[Dict[str, Any]] = []
+
+	@contextmanager
+	def stage(self, name: str, num_items: int) -> Iterator[None]:
+		"""
+		Times a stage.
+
+		Parameters
+		----------
+		name : str
+			the name of the stage
+		num_items : int
+			the number of items (e.g. tweets) that the stage processes
+		"""
+		start: float = time.perf_counter()
+		yield
+		self.add(name, time.perf_counter() - start, num_items)
+
+	def add(self, name: str, seconds: float, num_items: int) -> None:
+		"""
+		Adds a stage that was timed by the caller, e.g. in parts.
+
+		Parameters
+		----------
+		name : str
+			the name of the stage
+		seconds : float
+			the wall-clock time of the stage
+		num_items : int
+			the number of items (e.g. tweets) that the stage processes
+		"""
+		self.stages.append({
+			'name': name,
+			'seconds': seconds,
+			'items': num_items,
+			'items_per_second': num_items / seconds if seconds > 0 else None,
+		})
+		print(f'{name:<40} {seconds:>9.3f}s {num_items:>10} items')
+
+
+def run_benchmark(num_tweets: int, seed: int = 0, n_jobs: Union[int, None] = None, train_fraction: float = 0.5,
+                  visualization: bool = True, chunk_size: int = 10000) -> Dict[str, Any]:
+	"""
+	Runs the stages of the demo on synthetic tweets, and times every stage separately.
+
+	Parameters
+	----------
+	num_tweets : int
+		the number of tweets
+	seed : int
+		the seed of the synthetic tweets
+	n_jobs : Union[int, None]
+		the number of processes of the parallel stages, defaults to the number of CPUs
+	train_fraction : float
+		the fraction of the tweets that are labelled and used for training, the others are classified
+	visualization : bool
+		True to time the rendering of the maps, else it is skipped
+	chunk_size : int
+		the number of tweets that are generated, created and written at once, so only the statuses of one chunk
+		are in memory
+
+	Returns
+	-------
+	Dict[str, Any]
+		the configuration of the run and the timings of its stages
+	"""
+	benchmark: Benchmark = Benchmark()
+
+	# the statuses are generated, turned into tweets and written one chunk at a time, the stages sum their chunks
+	seconds: Dict[str, float] = {'generate_statuses': 0.0, 'create_tweets': 0.0, 'write_tweets': 0.0}
+	statuses: Iterator[Status] = generate_statuses(num_tweets, seed)
+	labels: List[bool] = []
+
+	with tempfile.TemporaryDirectory() as directory:
+		log: TweetLog = TweetLog(directory)
+		for _ in range(0, num_tweets, chunk_size):
+			start: float = time.perf_counter()
+			chunk: List[Status] = list(islice(statuses, chunk_size))
+			seconds['generate_statuses'] += time.perf_counter() - start
+
+			start: float = time.perf_counter()
+			tweets: List[Tweet] = [Tweet(status) for status in chunk]
+			for tweet in tweets:
+				tweet.detach_status()
+			seconds['create_tweets'] += time.perf_counter() - start
+			labels += [status.label for status in chunk]
+
+			start: float = time.perf_counter()
+			log.commit(tweets, {})
+			seconds['write_tweets'] += time.perf_counter() - start
+		for name, stage_seconds in seconds.items():
+			benchmark.add(name, stage_seconds, num_tweets)
+
+		with benchmark.stage('read_tweets', num_tweets):
+			tweets: List[Tweet] = list(log.read())
+
+	num_train: int = int(num_tweets * train_fraction)
+	train_dataset: List[Tweet] = tweets[:num_train]
+	test_dataset: List[Tweet] = tweets[num_train:]
+	y_train: List[bool] = labels[:num_train]
+
+	# classification
+	with benchmark.stage('preprocess', num_tweets):
+		X: List[str] = preprocess_parallel([tweet.text for tweet in tweets], TweetPreprocessor(), n_jobs)
+	with benchmark.stage('find_near_duplicates', num_tweets):
+		find_near_duplicates(X, n_jobs=n_jobs)
+	vectorizer: CountVectorizer = CountVectorizer()
+	with benchmark.stage('vectorize_fit', num_train):
+		X_train = fit_transform_parallel(vectorizer, X[:num_train], n_jobs=n_jobs)
+	with benchmark.stage('vectorize_transform', num_tweets - num_train):
+		X_test = transform_parallel(vectorizer, X[num_train:], n_jobs=n_jobs)
+
+	with benchmark.stage('train_naive_bayes', num_train):
+		naive_bayes_classifier: ComplementNB = ComplementNB().fit(X_train, y_train)
+	with benchmark.stage('train_decision_tree', num_train):
+		DecisionTreeClassifier(random_state=0).fit(X_train, y_train)
+	with benchmark.stage('train_logistic_regression', num_train):
+		TfidfLinearClassifier().fit(X_train, y_train)
+	with benchmark.stage('predict', num_tweets - num_train):
+		y_test: np.ndarray = naive_bayes_classifier.predict(X_test)
+	for tweet, label in zip(test_dataset, y_test):
+		tweet.denier = bool(label)
+	for tweet, label in zip(train_dataset, y_train):
+		tweet.denier = label
+
+	# filters, sorts and groups
+	at: datetime = tweets[0].datetime
+	between: List[datetime] = [START + SPAN / 4, START + SPAN / 2]
+	filters: Dict[str, Callable[[], Any]] = {
+		'filter_by_hashtag': lambda: filter_by_hashtag(tweets, '#coronahoax'),
+		'filter_by_hashtags_all': lambda: filter_by_hashtags_all(tweets, ['#corona', '#coronahoax']),
+		'filter_by_hashtags_any': lambda: filter_by_hashtags_any(tweets, ['#corona', '#coronahoax', '#coronavirus', '#covid19']),
+		'filter_before': lambda: filter_before(tweets, at),
+		'filter_at': lambda: filter_at(tweets, at),
+		'filter_after': lambda: filter_after(tweets, at),
+		'filter_between': lambda: filter_between(tweets, *between),
+		'filter_by_country_code': lambda: filter_by_country_code(tweets, 'US'),
+		'filter_by_country_codes': lambda: filter_by_country_codes(tweets, ['US', 'GB']),
+		'filter_by_continent': lambda: filter_by_continent(tweets, 'Europe'),
+		'filter_by_continents': lambda: filter_by_continents(tweets, ['Europe', 'North America']),
+		'sort_by_date_ascending': lambda: sort_by_date_ascending(tweets),
+		'sort_by_date_descending': lambda: sort_by_date_descending(tweets),
+		'group_by_country_code': lambda: group_by_country_code(tweets),
+		'group_by_continent': lambda: group_by_continent(tweets),
+	}
+	for name, function in filters.items():
+		with benchmark.stage(f'filters.{name}', num_tweets):
+			function()
+
+	with benchmark.stage('table.build', num_tweets):
+		table: TweetTable = TweetTable(tweets)
+	table_filters: Dict[str, Callable[[], Any]] = {
+		'filter_by_hashtags_any': lambda: table.filter_by_hashtags_any(['#corona', '#coronahoax', '#coronavirus', '#covid19']),
+		'filter_between': lambda: table.filter_between(*between),
+		'filter_by_continents': lambda: table.filter_by_continents(['Europe', 'North America']),
+		'sort_by_date_descending': lambda: table.sort_by_date_descending(),
+		'group_by_country_code': lambda: table.group_by_country_code(),
+	}
+	for name, function in table_filters.items():
+		with benchmark.stage(f'table.{name}', num_tweets):
+			function()
+
+	with benchmark.stage('hashtags.build', num_tweets):
+		hashtag_index: HashtagIndex = HashtagIndex(tweets)
+	hashtag_queries: Dict[str, Callable[[], Any]] = {
+		'filter_by_hashtag': lambda: hashtag_index.filter_by_hashtag('#coronahoax'),
+		'filter_by_hashtags_all': lambda: hashtag_index.filter_by_hashtags_all(['#corona', '#coronahoax']),
+		'filter_by_hashtags_any': lambda: hashtag_index.filter_by_hashtags_any(
+			['#corona', '#coronahoax', '#coronavirus', '#covid19']),
+		'filter_by_hashtags_none': lambda: hashtag_index.filter_by_hashtags_none(['#corona', '#covid19']),
+	}
+	for name, function in hashtag_queries.items():
+		with benchmark.stage(f'hashtags.{name}', num_tweets):
+			function()
+
+	# aggregation and visualization
+	with benchmark.stage('aggregate', num_tweets):
+		tweet_counts: TweetCounts = TweetCounts(tweets)
+	with benchmark.stage('rollup', len(tweet_counts.counts)):
+		rollup_cube: RollupCube = RollupCube.from_counts(tweet_counts).resample(timedelta(days=1))
+	if visualization:
+		specs: List[RenderSpec] = [
+			RenderSpec('Absolute number of tweets per country and per continent',
+			           tweet_counts.num_tweets_per_country_per_continent(), 'per_country_per_continent'),
+			RenderSpec('Absolute number of tweets per country', tweet_counts.num_tweets_per_country(), 'per_country'),
+			RenderSpec('Absolute number of tweets per continent', tweet_counts.num_tweets_per_continent(), 'per_continent',
+			           per_continent=True),
+			RenderSpec('Percentage of deniers per country', rollup_cube.denier_ratio_per_country(), 'denier_ratio'),
+		]
+		with tempfile.TemporaryDirectory() as directory:
+			with benchmark.stage('render', len(specs)):
+				render_all(specs, directory, cache_path=None, max_workers=n_jobs)
+
+	return {
+		'num_tweets': num_tweets,
+		'seed': seed,
+		'n_jobs': n_jobs,
+		'stages': benchmark.stages,
+	}
+
+
+def environment() -> Dict[str, Any]:
+	"""
+	Returns
+	-------
+	Dict[str, Any]
+		the environment of the benchmark, to compare results of the same environment only
+	"""
+	return {
+		'datetime': datetime.now().isoformat(timespec='seconds'),
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'cpu_count': os.cpu_count(),
+		'numpy': np.__version__,
+		'sklearn': sklearn.__version__,
+	}
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark the stages of the demo on synthetic tweets.')
+	parser.add_argument('--num-tweets', type=int, nargs='+', default=[10000], help='the numbers of tweets, one run each')
+	parser.add_argument('--seed', type=int, default=0, help='the seed of the synthetic tweets')
+	parser.add_argument('--n-jobs', type=int, default=None, help='the number of processes of the parallel stages')
+	parser.add_argument('--no-visualization', action='store_true', help='skip rendering the maps')
+	parser.add_argument('--chunk-size', type=int, default=10000, help='the number of tweets generated and written at once')
+	parser.add_argument('--output', default='benchmarks/results.json', help='the path to the JSON results')
+	args = parser.parse_args()
+
+	results: Dict[str, Any] = {
+		'environment': environment(),
+		'runs': [run_benchmark(num_tweets, args.seed, args.n_jobs, visualization=not args.no_visualization,
+		                       chunk_size=args.chunk_size)
+		         for num_tweets in args.num_tweets],
+	}
+
+	os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+	with open(args.output, 'w') as file:
+		json.dump(results, file, indent=1)
+
+	print(f'Saved benchmark results to {args.output}')
@@ -0,0 +1,299 @@
+import json
+import os
+from typing import List, Dict, Union, Any, Iterable
+
+import numpy as np
+from linear import TfidfLinearClassifier
+from preprocessing import TweetPreprocessor
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import ComplementNB
+from sklearn.tree import DecisionTreeClassifier
+
+# the version of the bundle format
+BUNDLE_VERSION: int = 1
+
+# the arrays of every type of model
+_MODEL_ARRAYS: Dict[str, List[str]] = {
+	'complement_nb': ['feature_log_prob', 'class_log_prior'],
+	'decision_tree': ['children_left', 'children_right', 'feature', 'threshold', 'node_class'],
+	'linear': ['coef', 'intercept'],
+}
+
+# the parameters of a vectorizer that are saved
+_VECTORIZER_PARAMS: List[str] = ['analyzer', 'binary', 'lowercase', 'ngram_range', 'stop_words', 'strip_accents',
+                                 'token_pattern']
+_HASHING_VECTORIZER_PARAMS: List[str] = _VECTORIZER_PARAMS + ['alternate_sign', 'n_features', 'norm']
+
+
+def save_bundle(path: str, model: Union[ComplementNB, DecisionTreeClassifier, TfidfLinearClassifier],
+                vectorizer: Union[CountVectorizer, HashingVectorizer],
+                preprocessor: Union[TweetPreprocessor, None] = None) -> None:
+	"""
+	Saves everything needed to classify raw tweet texts as a single, versioned inference bundle:
+	the preprocessor's configuration, the fitted vectorizer and the trained classifier.
+
+	The bundle is a directory with a JSON file for the configuration and one NumPy file per array
+	(the vocabulary, the feature log probabilities, the tree arrays or the coefficients),
+	so they can be memory-mapped when loading.
+
+	Parameters
+	----------
+	path : str
+		the path to the bundle's directory
+	model : Union[ComplementNB, DecisionTreeClassifier, TfidfLinearClassifier]
+		the trained classifier, or a binary SGDClassifier or LogisticRegression
+	vectorizer : Union[CountVectorizer, HashingVectorizer]
+		the fitted vectorizer
+	preprocessor : Union[TweetPreprocessor, None]
+		the preprocessor, None if the texts should not be preprocessed
+	"""
+	os.makedirs(path, exist_ok=True)
+	arrays: Dict[str, np.ndarray] = {}
+
+	# vectorizer
+	if isinstance(vectorizer, HashingVectorizer):
+		vectorizer_meta: Dict[str, Any] = {'type': 'hashing', 'params': _params(vectorizer, _HASHING_VECTORIZER_PARAMS)}
+	elif isinstance(vectorizer, CountVectorizer):
+		vectorizer_meta: Dict[str, Any] = {'type': 'count', 'params': _params(vectorizer, _VECTORIZER_PARAMS),
+		                                   'num_features': len(vectorizer.vocabulary_)}
+		# the terms are sorted, so they can be looked up with a binary search
+		terms: List[str] = sorted(vectorizer.vocabulary_)
+		arrays['vocabulary'] = np.array(terms, dtype=str) if terms else np.zeros(0, dtype='U1')
+		arrays['vocabulary_indices'] = np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int64)
+	else:
+		raise ValueError(f'Unsupported vectorizer: {type(vectorizer).__name__}')
+
+	# classifier
+	arrays['classes'] = np.asarray(model.classes_)
+	if isinstance(model, ComplementNB):
+		model_meta: Dict[str, Any] = {'type': 'complement_nb'}
+		arrays['feature_log_prob'] = model.feature_log_prob_
+		arrays['class_log_prior'] = model.class_log_prior_
+	elif isinstance(model, DecisionTreeClassifier):
+		model_meta: Dict[str, Any] = {'type': 'decision_tree'}
+		arrays['children_left'] = model.tree_.children_left
+		arrays['children_right'] = model.tree_.children_right
+		arrays['feature'] = model.tree_.feature
+		arrays['threshold'] = model.tree_.threshold
+		# the index of the predicted class in every node
+		arrays['node_class'] = np.argmax(model.tree_.value[:, 0, :], axis=1)
+	elif isinstance(model, (TfidfLinearClassifier, SGDClassifier, LogisticRegression)):
+		if len(model.classes_) != 2:
+			raise ValueError(f'Unsupported model: linear models of {len(model.classes_)} classes')
+		model_meta: Dict[str, Any] = {'type': 'linear'}
+		# a single coefficient vector and bias, the score of the second class
+		arrays['coef'] = np.ascontiguousarray(np.ravel(model.coef_), dtype=np.float64)
+		arrays['intercept'] = np.ravel(model.intercept_).astype(np.float64)
+	else:
+		raise ValueError(f'Unsupported model: {type(model).__name__}')
+
+	for name, array in arrays.items():
+		np.save(os.path.join(path, f'{name}.npy'), array)
+
+	with open(os.path.join(path, 'meta.json'), 'w') as file:
+		json.dump({
+			'version': BUNDLE_VERSION,
+			'preprocessor': preprocessor.get_params() if preprocessor is not None else None,
+			'vectorizer': vectorizer_meta,
+			'model': model_meta,
+		}, file)
+
+	print(f'Saved inference bundle to {path}')
+
+
+def load_bundle(path: str, mmap: bool = True) -> 'InferenceBundle':
+	"""
+	Loads an inference bundle.
+
+	Parameters
+	----------
+	path : str
+		the path to the bundle's directory
+	mmap : bool
+		True to memory-map the arrays, else they are read into memory
+
+	Returns
+	-------
+	InferenceBundle
+		the inference bundle
+	"""
+	return InferenceBundle(path, mmap)
+
+
+class InferenceBundle:
+	"""
+	A preprocessor, a fitted vectorizer and a trained classifier, loaded from disk, that classify raw tweet texts.
+	"""
+
+	def __init__(self, path: str, mmap: bool = True):
+		"""
+		Loads an inference bundle.
+
+		Parameters
+		----------
+		path : str
+			the path to the bundle's directory
+		mmap : bool
+			True to memory-map the arrays, else they are read into memory
+		"""
+		with open(os.path.join(path, 'meta.json')) as file:
+			self.meta: Dict[str, Any] = json.load(file)
+
+		if self.meta['version'] != BUNDLE_VERSION:
+			raise ValueError(f'Unsupported bundle version: {self.meta["version"]}')
+
+		self.path: str = path
+		self._mmap_mode: Union[str, None] = 'r' if mmap else None
+
+		self.preprocessor: Union[TweetPreprocessor, None] = TweetPreprocessor(**self.meta['preprocessor']) \
+			if self.meta['preprocessor'] is not None else None
+
+		params: Dict[str, Any] = dict(self.meta['vectorizer']['params'])
+		params['ngram_range'] = tuple(params['ngram_range'])
+		if self.meta['vectorizer']['type'] == 'hashing':
+			self._hashing_vectorizer: HashingVectorizer = HashingVectorizer(**params)
+			self.num_features: int = params['n_features']
+		else:
+			self._analyzer = CountVectorizer(**params).build_analyzer()
+			self.num_features: int = self.meta['vectorizer']['num_features']
+			self._vocabulary: np.ndarray = self._load('vocabulary')
+			self._vocabulary_indices: np.ndarray = self._load('vocabulary_indices')
+
+		self.classes: np.ndarray = np.load(os.path.join(path, 'classes.npy'))
+		self._arrays: Dict[str, np.ndarray] = {name: self._load(name) for name in _MODEL_ARRAYS[self.meta['model']['type']]}
+
+	def _load(self, name: str) -> np.ndarray:
+		return np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode=self._mmap_mode)
+
+	def preprocess(self, texts: Iterable[str]) -> List[str]:
+		"""
+		Preprocesses tweet texts with the bundle's preprocessor.
+
+		Parameters
+		----------
+		texts : Iterable[str]
+			the tweet texts
+
+		Returns
+		-------
+		List[str]
+			the tweet texts, but processed
+		"""
+		return self.preprocessor.transform(texts) if self.preprocessor is not None else list(texts)
+
+	def transform(self, texts: Iterable[str]) -> csr_matrix:
+		"""
+		Preprocesses and vectorizes tweet texts.
+
+		Parameters
+		----------
+		texts : Iterable[str]
+			the tweet texts
+
+		Returns
+		-------
+		csr_matrix
+			the document-term matrix, identical to the one of the fitted vectorizer
+		"""
+		texts: List[str] = self.preprocess(texts)
+
+		if self.meta['vectorizer']['type'] == 'hashing':
+			return self._hashing_vectorizer.transform(texts)
+
+		# look up all the terms in the sorted vocabulary at once
+		tokens: List[List[str]] = [self._analyzer(text) for text in texts]
+		rows: np.ndarray = np.repeat(np.arange(len(tokens)), [len(text_tokens) for text_tokens in tokens])
+		terms: np.ndarray = np.array([token for text_tokens in tokens for token in text_tokens], dtype=str)
+		positions: np.ndarray = np.minimum(np.searchsorted(self._vocabulary, terms), max(len(self._vocabulary) - 1, 0))
+		known: np.ndarray = self._vocabulary[positions] == terms if len(self._vocabulary) > 0 \
+			else np.zeros(len(terms), dtype=bool)
+
+		matrix: csr_matrix = csr_matrix(
+			(np.ones(np.count_nonzero(known), dtype=np.int64), (rows[known], self._vocabulary_indices[positions[known]])),
+			shape=(len(tokens), self.num_features))
+		matrix.sum_duplicates()
+		if self.meta['vectorizer']['params']['binary']:
+			matrix.data[:] = 1
+
+		return matrix
+
+	def predict(self, texts: Iterable[str]) -> np.ndarray:
+		"""
+		Classifies tweet texts.
+
+		Parameters
+		----------
+		texts : Iterable[str]
+			the tweet texts
+
+		Returns
+		-------
+		np.ndarray
+			the predicted classes (True = denier, False = acceptor)
+		"""
+		return self.predict_matrix(self.transform(texts))
+
+	def predict_matrix(self, X: csr_matrix) -> np.ndarray:
+		"""
+		Classifies vectorized tweet texts.
+
+		Parameters
+		----------
+		X : csr_matrix
+			the document-term matrix
+
+		Returns
+		-------
+		np.ndarray
+			the predicted classes
+		"""
+		model_type: str = self.meta['model']['type']
+
+		if model_type == 'complement_nb':
+			joint_log_likelihood: np.ndarray = np.asarray(X @ self._arrays['feature_log_prob'].T)
+			if len(self.classes) == 1:
+				joint_log_likelihood += self._arrays['class_log_prior']
+			return self.classes[np.argmax(joint_log_likelihood, axis=1)]
+
+		if model_type == 'decision_tree':
+			children_left: np.ndarray = self._arrays['children_left']
+			children_right: np.ndarray = self._arrays['children_right']
+			feature: np.ndarray = self._arrays['feature']
+			threshold: np.ndarray = self._arrays['threshold']
+
+			# walk all the tweets down the tree at once, one level at a time
+			X: csr_matrix = csr_matrix(X)
+			nodes: np.ndarray = np.zeros(X.shape[0], dtype=np.int64)
+			active: np.ndarray = np.arange(X.shape[0])
+			while len(active) > 0:
+				active = active[children_left[nodes[active]] != -1]
+				if len(active) == 0:
+					break
+				active_nodes: np.ndarray = nodes[active]
+				values: np.ndarray = np.asarray(X[active, feature[active_nodes]]).ravel()
+				nodes[active] = np.where(values <= threshold[active_nodes],
+				                         children_left[active_nodes], children_right[active_nodes])
+
+			return self.classes[self._arrays['node_class'][nodes]]
+
+		if model_type == 'linear':
+			# one sparse matrix-vector product for the whole batch
+			scores: np.ndarray = np.asarray(X @ self._arrays['coef']).ravel() + self._arrays['intercept'][0]
+			return self.classes[(scores > 0).astype(np.int64)]
+
+		raise ValueError(f'Unsupported model: {model_type}')
+
+
+def _params(vectorizer: Union[CountVectorizer, HashingVectorizer], names: List[str]) -> Dict[str, Any]:
+	params: Dict[str, Any] = {name: getattr(vectorizer, name) for name in names}
+
+	if not isinstance(params['analyzer'], str) or vectorizer.preprocessor is not None \
+			or vectorizer.tokenizer is not None:
+		raise ValueError('Unsupported vectorizer: custom analyzers, preprocessors and tokenizers cannot be saved, '
+		                 'pass the preprocessor separately')
+	if params['stop_words'] is not None and not isinstance(params['stop_words'], str):
+		params['stop_words'] = list(params['stop_words'])
+
+	return params
@@ -0,0 +1,316 @@
+from typing import List, Tuple, Union, NamedTuple, Sequence, TypeVar
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.feature_extraction.text import HashingVectorizer
+from vectorization import transform_parallel
+
+# the ways to deduplicate: keep one tweet of every cluster, keep one tweet with the size of its cluster as weight,
+# or drop every tweet that has a near-duplicate
+MODES: Tuple[str, ...] = ('collapse', 'keep_one_with_weight', 'drop')
+
+T = TypeVar('T')
+
+
+class NearDuplicates(NamedTuple):
+	"""
+	Clusters of near-duplicate tweets.
+
+	Properties
+	----------
+	clusters : np.ndarray
+		the cluster of every tweet, as the index of the first tweet of the cluster
+	"""
+	clusters: np.ndarray
+
+	@property
+	def representatives(self) -> np.ndarray:
+		"""
+		Returns
+		-------
+		np.ndarray
+			the index of the first tweet of every cluster, in ascending order
+		"""
+		return np.flatnonzero(self.clusters == np.arange(len(self.clusters)))
+
+	@property
+	def sizes(self) -> np.ndarray:
+		"""
+		Returns
+		-------
+		np.ndarray
+			the number of tweets of every cluster, in the order of the representatives
+		"""
+		return np.bincount(self.clusters, minlength=len(self.clusters))[self.representatives]
+
+	def keep(self, mode: str = 'collapse') -> Tuple[np.ndarray, np.ndarray]:
+		"""
+		Selects the tweets to keep.
+
+		Parameters
+		----------
+		mode : str
+			'collapse' to keep the first tweet of every cluster,
+			'keep_one_with_weight' to keep the first tweet of every cluster with the size of the cluster as weight,
+			'drop' to keep only the tweets without near-duplicates
+
+		Returns
+		-------
+		Tuple[np.ndarray, np.ndarray]
+			the indices of the tweets to keep, in ascending order, and their weights
+		"""
+		assert mode in MODES, f'Invalid mode: {mode} is not one of {", ".join(MODES)}'
+
+		representatives: np.ndarray = self.representatives
+		sizes: np.ndarray = self.sizes
+		if mode == 'collapse':
+			return representatives, np.ones(len(representatives), dtype=np.int64)
+		if mode == 'keep_one_with_weight':
+			return representatives, sizes
+
+		singletons: np.ndarray = representatives[sizes == 1]
+		return singletons, np.ones(len(singletons), dtype=np.int64)
+
+	def __str__(self) -> str:
+		sizes: np.ndarray = self.sizes
+		return f'{len(self.clusters)} tweets in {len(sizes)} clusters, ' \
+		       f'{np.count_nonzero(sizes > 1)} clusters of near-duplicates with {sizes[sizes > 1].sum()} tweets'
+
+
+class MinHasher:
+	"""
+	Computes MinHash signatures of texts, as sets of word shingles, in vectorized batches.
+
+	The shingles are hashed by a HashingVectorizer (in parallel), and every permutation of the MinHash is
+	a multiply-shift hash of the shingle hashes. Texts with fewer words than a shingle use their words as shingles.
+	"""
+
+	def __init__(self, num_permutations: int = 128, shingle_size: int = 3, seed: int = 0, batch_size: int = 2 ** 13):
+		"""
+		Constructs a new MinHasher object.
+
+		Parameters
+		----------
+		num_permutations : int
+			the number of hash functions, the length of the signatures
+		shingle_size : int
+			the number of words per shingle
+		seed : int
+			the seed of the hash functions
+		batch_size : int
+			the number of shingles that are hashed at once, the buffer of 8 * num_permutations bytes per shingle
+			should fit in the CPU cache
+		"""
+		self.num_permutations: int = num_permutations
+		self.shingle_size: int = shingle_size
+		self.batch_size: int = batch_size
+
+		rng: np.random.Generator = np.random.default_rng(seed)
+		# odd multipliers and random offsets of the multiply-shift hash functions
+		self.multipliers: np.ndarray = rng.integers(0, 2 ** 64, num_permutations, dtype=np.uint64, endpoint=False) | 1
+		self.offsets: np.ndarray = rng.integers(0, 2 ** 64, num_permutations, dtype=np.uint64, endpoint=False)
+
+	def shingles(self, corpus: List[str], n_jobs: Union[int, None] = None) -> csr_matrix:
+		"""
+		Parameters
+		----------
+		corpus : List[str]
+			list of (preprocessed) tweet texts
+		n_jobs : Union[int, None]
+			the number of processes, defaults to the number of CPUs
+
+		Returns
+		-------
+		csr_matrix
+			the binary matrix of the hashed shingles of every text
+		"""
+		shingles: csr_matrix = transform_parallel(self._vectorizer(self.shingle_size), corpus, n_jobs=n_jobs)
+
+		short: np.ndarray = np.diff(shingles.indptr) == 0
+		if self.shingle_size > 1 and short.any():
+			# texts that are shorter than a shingle
+			shingles: csr_matrix = shingles + transform_parallel(
+				self._vectorizer(1), [text if is_short else '' for text, is_short in zip(corpus, short)], n_jobs=n_jobs)
+
+		return shingles
+
+	def signatures(self, shingles: csr_matrix) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		shingles : csr_matrix
+			the binary matrix of the hashed shingles of every text
+
+		Returns
+		-------
+		np.ndarray
+			the MinHash signatures, with a row per hash function and a column per text,
+			empty texts have the maximal signature
+		"""
+		num_texts: int = shingles.shape[0]
+		signatures: np.ndarray = np.full((self.num_permutations, num_texts), np.iinfo(np.uint32).max, dtype=np.uint32)
+		indptr: np.ndarray = shingles.indptr
+		# a row per hash function, so every minimum is taken over a contiguous range that fits in the cache
+		buffer: np.ndarray = np.empty((self.num_permutations, self.batch_size), dtype=np.uint64)
+
+		start: int = 0
+		while start < num_texts:
+			# the texts of which the shingles fit in the buffer, at least one text (the buffer grows for longer texts)
+			stop: int = max(int(np.searchsorted(indptr, indptr[start] + self.batch_size, side='right')) - 1, start + 1)
+			stop: int = min(stop, num_texts)
+
+			hashes: np.ndarray = shingles.indices[indptr[start]:indptr[stop]].astype(np.uint64)
+			if len(hashes) > buffer.shape[1]:
+				buffer: np.ndarray = np.empty((self.num_permutations, len(hashes)), dtype=np.uint64)
+			permuted: np.ndarray = buffer[:, :len(hashes)]
+			# a * x + b (mod 2 ** 64) of every shingle x, for every hash function (a, b)
+			np.multiply(self.multipliers[:, None], hashes, out=permuted)
+			permuted += self.offsets[:, None]
+
+			# the minimum per text, of which the upper 32 bits are the hash (the shift preserves the order),
+			# empty texts keep the maximal signature
+			non_empty: np.ndarray = np.flatnonzero(np.diff(indptr[start:stop + 1]) > 0)
+			if len(non_empty) > 0:
+				signatures[:, start + non_empty] = np.minimum.reduceat(
+					permuted, indptr[start + non_empty] - indptr[start], axis=1) >> np.uint64(32)
+
+			start: int = stop
+
+		return signatures
+
+	@staticmethod
+	def _vectorizer(shingle_size: int) -> HashingVectorizer:
+		return HashingVectorizer(n_features=np.iinfo(np.int32).max, ngram_range=(shingle_size, shingle_size),
+		                         alternate_sign=False, norm=None, binary=True, dtype=np.uint8)
+
+
+def lsh_bands(num_permutations: int, threshold: float) -> Tuple[int, int]:
+	"""
+	Chooses the number of bands and rows per band of the LSH, so that the similarity at which two texts
+	become a candidate pair with probability 1/2 is about the threshold.
+
+	Parameters
+	----------
+	num_permutations : int
+		the length of the signatures
+	threshold : float
+		the Jaccard similarity of near-duplicates
+
+	Returns
+	-------
+	Tuple[int, int]
+		the number of bands and rows per band, of which the product is at most the number of permutations
+	"""
+	options: List[Tuple[int, int]] = [(num_permutations // rows, rows) for rows in range(1, num_permutations + 1)]
+
+	return min(options, key=lambda option: abs((1 - 0.5 ** (1 / option[0])) ** (1 / option[1]) - threshold))
+
+
+def find_near_duplicates(corpus: List[str], threshold: float = 0.8, num_permutations: int = 128,
+                         shingle_size: int = 3, seed: int = 0, n_jobs: Union[int, None] = None) -> NearDuplicates:
+	"""
+	Finds clusters of near-duplicate texts, e.g. copy-pasted tweets and spam, with MinHash and LSH banding.
+
+	Every band of the signatures is hashed to a 64-bit bucket, the texts in the same bucket of a band are candidates,
+	and the clusters are the connected components of the candidate pairs (that are verified against the estimated
+	Jaccard similarity), so there are no pairwise comparisons and the time is roughly linear in the number of texts.
+
+	Parameters
+	----------
+	corpus : List[str]
+		list of (preprocessed) tweet texts, e.g. the output of preprocess_corpus
+	threshold : float
+		the minimum (estimated) Jaccard similarity of the shingles of near-duplicates
+	num_permutations : int
+		the length of the MinHash signatures, longer signatures are more accurate but slower
+	shingle_size : int
+		the number of words per shingle
+	seed : int
+		the seed of the hash functions
+	n_jobs : Union[int, None]
+		the number of processes of the shingling, defaults to the number of CPUs
+
+	Returns
+	-------
+	NearDuplicates
+		the clusters of near-duplicates
+	"""
+	num_texts: int = len(corpus)
+	if num_texts == 0:
+		return NearDuplicates(np.zeros(0, dtype=np.int64))
+
+	min_hasher: MinHasher = MinHasher(num_permutations, shingle_size, seed)
+	shingles: csr_matrix = min_hasher.shingles(corpus, n_jobs)
+	signatures: np.ndarray = min_hasher.signatures(shingles)
+	# empty texts are not duplicates of each other
+	non_empty: np.ndarray = np.flatnonzero(np.diff(shingles.indptr) > 0)
+	del shingles
+
+	num_bands, num_rows = lsh_bands(num_permutations, threshold)
+	rng: np.random.Generator = np.random.default_rng(seed)
+	multipliers: np.ndarray = rng.integers(0, 2 ** 64, num_rows, dtype=np.uint64, endpoint=False) | 1
+
+	sources: List[np.ndarray] = []
+	targets: List[np.ndarray] = []
+	for band in range(num_bands):
+		# the bucket of every text in this band, and the neighbours in the same bucket
+		buckets: np.ndarray = (multipliers[:, None]
+		                       * signatures[band * num_rows:(band + 1) * num_rows, non_empty].astype(np.uint64)) \
+			.sum(axis=0, dtype=np.uint64)
+		order: np.ndarray = np.argsort(buckets, kind='stable')
+		same: np.ndarray = buckets[order[1:]] == buckets[order[:-1]]
+		sources.append(non_empty[order[:-1][same]])
+		targets.append(non_empty[order[1:][same]])
+
+	source: np.ndarray = np.concatenate(sources) if sources else np.empty(0, dtype=np.int64)
+	target: np.ndarray = np.concatenate(targets) if targets else np.empty(0, dtype=np.int64)
+	# drop the false positives of the LSH
+	similar: np.ndarray = np.empty(len(source), dtype=bool)
+	for start in range(0, len(source), 2 ** 16):
+		stop: int = start + 2 ** 16
+		similar[start:stop] = (signatures[:, source[start:stop]] == signatures[:, target[start:stop]]).mean(axis=0) \
+		                      >= threshold
+	del signatures
+
+	graph: coo_matrix = coo_matrix((np.ones(np.count_nonzero(similar), dtype=np.int8), (source[similar], target[similar])),
+	                               shape=(num_texts, num_texts))
+	_, labels = connected_components(graph, directed=False)
+
+	# the first text of every component, the last assignment of an index wins
+	first: np.ndarray = np.empty(labels.max() + 1, dtype=np.int64)
+	first[labels[::-1]] = np.arange(num_texts - 1, -1, -1)
+
+	return NearDuplicates(first[labels])
+
+
+def deduplicate(items: Sequence[T], corpus: List[str], mode: str = 'collapse', threshold: float = 0.8,
+                **kwargs) -> Tuple[List[T], np.ndarray]:
+	"""
+	Deduplicates items, e.g. tweets, by their near-duplicate texts.
+
+	Parameters
+	----------
+	items : Sequence[T]
+		the items
+	corpus : List[str]
+		the (preprocessed) text of every item
+	mode : str
+		'collapse', 'keep_one_with_weight' or 'drop', see NearDuplicates.keep
+	threshold : float
+		the minimum (estimated) Jaccard similarity of the shingles of near-duplicates
+	kwargs
+		the other arguments of find_near_duplicates
+
+	Returns
+	-------
+	Tuple[List[T], np.ndarray]
+		the items to keep, in their original order, and their weights
+	"""
+	assert len(items) == len(corpus), 'Invalid corpus: not one text per item'
+
+	duplicates: NearDuplicates = find_near_duplicates(corpus, threshold, **kwargs)
+	print(f'Near-duplicates: {duplicates}')
+	indices, weights = duplicates.keep(mode)
+
+	return [items[i] for i in indices], weights
@@ -59,13 +59,9 @@ def filter_by_hashtags_any(tweets: List[Tweet], hashtags: List[str]) -> List[Twe
 	List[Tweet]
 		A list of Tweet objects with any of the provided hashtags
 	"""
-	filtered_tweets = []
-	for tweet in tweets:
-		for hashtag in tweet.hashtags:
-			if hashtag in hashtags:
-				filtered_tweets.append(tweet)
-				break
-	return filtered_tweets
+	hashtags: set = set(hashtags)
+
+	return [tweet for tweet in tweets if not hashtags.isdisjoint(tweet.hashtags)]
 
 
 def filter_after(tweets: List[Tweet], after: datetime) -> List[Tweet]:
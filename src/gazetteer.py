@@ -0,0 +1,200 @@
+import os
+import re
+from typing import List, Dict, Union
+
+from geocoding import normalize_location
+
+# the bundled gazetteer: lines of kind, country code and names (separated by |)
+GAZETTEER_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.tsv')
+
+# separators between the parts of a location, e.g. 'Austin, TX' or 'London / Paris'
+_SEPARATORS = re.compile(r'\s*[,/|;•·]\s*|\s+-\s+')
+# anything that is not part of a place name, e.g. emojis
+_NOISE = re.compile(r"[^\w\s.'&-]")
+
+_REGIONAL_INDICATOR_A: int = 0x1F1E6
+_REGIONAL_INDICATOR_Z: int = 0x1F1FF
+_BLACK_FLAG: int = 0x1F3F4
+_TAG_A: int = 0xE0061
+_TAG_Z: int = 0xE007A
+
+
+class Gazetteer:
+	"""
+	An offline resolver of free-text locations to country codes.
+
+	Locations are resolved with an in-memory index of country names, aliases, regions and big cities, ISO codes,
+	state and province abbreviations and flag emojis, loaded from a bundled data file on first use.
+	"""
+
+	def __init__(self, path: str = GAZETTEER_PATH):
+		"""
+		Constructs a new gazetteer, the data file is only loaded on first use.
+
+		Parameters
+		----------
+		path : str
+			the path to the gazetteer data file
+		"""
+		self.path: str = path
+
+		# the country codes of every name, in the order of the data file, a name can be ambiguous e.g. Georgia
+		self._countries: Union[Dict[str, List[str]], None] = None
+		self._regions: Dict[str, List[str]] = {}
+		self._cities: Dict[str, List[str]] = {}
+		self._states: Dict[str, List[str]] = {}
+		self._codes: Dict[str, str] = {}
+
+	def __len__(self) -> int:
+		self._load()
+
+		return len(self._countries) + len(self._regions) + len(self._cities) + len(self._states) + len(self._codes)
+
+	def _load(self) -> None:
+		"""
+		Loads the data file into the in-memory index, if this has not been done yet.
+		"""
+		if self._countries is not None:
+			return
+
+		countries: Dict[str, List[str]] = {}
+		indices: Dict[str, Dict[str, List[str]]] = {'country': countries, 'region': self._regions,
+		                                            'city': self._cities, 'state': self._states}
+		with open(self.path, encoding='utf-8') as file:
+			for line in file:
+				if line.startswith('#') or line.strip() == '':
+					continue
+
+				kind, country_code, aliases = line.rstrip('\n').split('\t')
+				if kind == 'code':
+					# ISO alpha-2 and alpha-3 codes
+					self._codes[country_code.lower()] = country_code
+					for alias in aliases.split('|'):
+						self._codes[alias.lower()] = country_code
+				else:
+					# names of countries, regions and cities and state abbreviations e.g. TX or ON
+					index: Dict[str, List[str]] = indices[kind]
+					for alias in aliases.split('|'):
+						country_codes: List[str] = index.setdefault(normalize_location(alias), [])
+						if country_code not in country_codes:
+							country_codes.append(country_code)
+
+		self._countries = countries
+
+	def resolve(self, location: Union[str, None]) -> Union[str, None]:
+		"""
+		Resolves a location to a country code, without network access.
+
+		A single name is resolved as a country, a region or a city, in that order. ISO codes and state abbreviations
+		are only trusted on their own when they are written in capitals, so 'it' or 'me' are not countries.
+		Of a location of several parts e.g. 'Atlanta, Georgia', the last part is the qualifier and is resolved as
+		a state, a region, a country, a city or an ISO code, in that order. An ambiguous qualifier is settled by the
+		other parts, so 'Perth, WA' is in Australia while 'Seattle, WA' is in the US.
+
+		Parameters
+		----------
+		location : Union[str, None]
+			the location as provided by the author of a tweet
+
+		Returns
+		-------
+		Union[str, None]
+			the country code (2 capital letters e.g. BE for Belgium) or None if the location is unknown
+		"""
+		if location is None or location == '':
+			return None
+
+		self._load()
+
+		# flag emojis
+		country_code: Union[str, None] = _country_code_from_flag(location)
+		if country_code is not None:
+			return country_code
+
+		normalized: str = normalize_location(location)
+		country_codes: List[str] = self._names(normalized)
+		if country_codes:
+			return country_codes[0]
+
+		# the parts of the location, from the most to the least specific
+		parts: List[str] = [_NOISE.sub('', part).strip() for part in _SEPARATORS.split(normalized)]
+		parts: List[str] = [part for part in parts if part != '']
+		if not parts:
+			return None
+
+		if len(parts) == 1:
+			# a single part is either a name or, if it is written in capitals, an ISO code or a state abbreviation
+			country_codes: List[str] = self._names(parts[0])
+			if country_codes:
+				return country_codes[0]
+			if not _NOISE.sub('', location).strip().isupper():
+				return None
+
+			# an abbreviation that is both an ISO code and a state e.g. PA or CA is ambiguous
+			country_codes: List[str] = self._states.get(parts[0], []) + \
+			                           ([self._codes[parts[0]]] if parts[0] in self._codes else [])
+			return country_codes[0] if len(country_codes) == 1 else None
+
+		# the countries of the last part, the qualifier, from the most to the least likely
+		qualifiers: List[str] = self._states.get(parts[-1], []) + self._regions.get(parts[-1], []) + \
+		                        self._countries.get(parts[-1], []) + self._cities.get(parts[-1], []) + \
+		                        ([self._codes[parts[-1]]] if parts[-1] in self._codes else [])
+		# the countries of the other parts, from the least to the most specific part
+		others: List[str] = [country_code for part in reversed(parts[:-1]) for country_code in self._names(part)]
+
+		for country_code in others:
+			if country_code in qualifiers:
+				# the other parts settle an ambiguous qualifier
+				return country_code
+
+		if qualifiers:
+			return qualifiers[0]
+
+		return others[0] if others else None
+
+	def _names(self, name: str) -> List[str]:
+		"""
+		Parameters
+		----------
+		name : str
+			a normalized name
+
+		Returns
+		-------
+		List[str]
+			the country codes of the countries, regions and cities with the name, in that order
+		"""
+		return self._countries.get(name, []) + self._regions.get(name, []) + self._cities.get(name, [])
+
+
+def _country_code_from_flag(location: str) -> Union[str, None]:
+	"""
+	Extracts the country code of the first flag emoji in a location.
+
+	Parameters
+	----------
+	location : str
+		the location
+
+	Returns
+	-------
+	Union[str, None]
+		the country code of the first flag or None if there are no flags
+	"""
+	previous: int = 0
+	for i, character in enumerate(location):
+		current: int = ord(character)
+		if _REGIONAL_INDICATOR_A <= previous <= _REGIONAL_INDICATOR_Z \
+				and _REGIONAL_INDICATOR_A <= current <= _REGIONAL_INDICATOR_Z:
+			# a pair of regional indicators e.g. BE for Belgium
+			return chr(previous - _REGIONAL_INDICATOR_A + ord('A')) + chr(current - _REGIONAL_INDICATOR_A + ord('A'))
+
+		if current == _BLACK_FLAG and i + 2 < len(location) \
+				and _TAG_A <= ord(location[i + 1]) <= _TAG_Z \
+				and _TAG_A <= ord(location[i + 2]) <= _TAG_Z:
+			# a subdivision flag e.g. GB-ENG for England
+			return chr(ord(location[i + 1]) - _TAG_A + ord('A')) + chr(ord(location[i + 2]) - _TAG_A + ord('A'))
+
+		previous = current
+
+	return None
@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Tuple, Union, Any
+
+from geopy import GoogleV3
+
+
+def normalize_location(location: str) -> str:
+	"""
+	Normalizes a free-text location, so that equivalent spellings share a single cache entry.
+
+	Parameters
+	----------
+	location : str
+		the location as provided by the author of a tweet
+
+	Returns
+	-------
+	str
+		the case-folded location, without surrounding punctuation and with collapsed whitespace
+	"""
+	return ' '.join(location.casefold().split()).strip(' .,;:!?-|/')
+
+
+def country_code_from_location(location: Any) -> Union[str, None]:
+	"""
+	Extracts the country code from a location as returned by Google's geolocation API.
+
+	Parameters
+	----------
+	location : Any
+		the location, as returned by GoogleV3.geocode
+
+	Returns
+	-------
+	Union[str, None]
+		the country code (2 capital letters e.g. BE for Belgium) or None if the location has no country
+	"""
+	if location is None \
+			or location.raw is None \
+			or location.raw['address_components'] is None:
+		return None
+
+	address_components: List[Dict[str, str]] = location.raw['address_components']
+	# the country is usually the last address component, or the one before the postal code
+	for address_component in address_components[-1:-3:-1]:
+		if 'country' in address_component['types']:
+			return address_component['short_name']
+
+	return None
+
+
+def geocode_country_code(google_api: GoogleV3, location: str) -> Union[str, None]:
+	"""
+	Looks up the country code of a location on Google's geolocation API.
+
+	Errors of the API are not caught, so that callers can distinguish them from unknown locations.
+
+	Parameters
+	----------
+	google_api : GoogleV3
+		the Google geolocation API
+	location : str
+		the location to look up
+
+	Returns
+	-------
+	Union[str, None]
+		the country code or None if the location is unknown
+	"""
+	return country_code_from_location(google_api.geocode(query=location))
+
+
+class GeocodingCache:
+	"""
+	A persistent cache of country codes of locations, backed by an SQLite database.
+
+	Both hits (a country code) and misses (no country code) are stored, keyed by the normalized location.
+	"""
+
+	def __init__(self, path: str = 'cache/geocoding.sqlite', ttl: Union[float, None] = 30 * 24 * 60 * 60):
+		"""
+		Opens (or creates) a geocoding cache.
+
+		Parameters
+		----------
+		path : str
+			the path to the SQLite database
+		ttl : Union[float, None]
+			the time to live of an entry in seconds, or None if entries never expire
+
+		Properties
+		----------
+		hits : int
+			the number of lookups that were answered by the cache
+		misses : int
+			the number of lookups that were not in the cache (or expired)
+		"""
+		directory: str = os.path.dirname(path)
+		if directory != '':
+			os.makedirs(directory, exist_ok=True)
+
+		self.path: str = path
+		self.ttl: Union[float, None] = ttl
+		self.hits: int = 0
+		self.misses: int = 0
+
+		self._lock: threading.Lock = threading.Lock()
+		self._connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+		self._connection.execute(
+			'CREATE TABLE IF NOT EXISTS locations ('
+			'location TEXT PRIMARY KEY, '
+			'country_code TEXT, '
+			'created_at REAL NOT NULL)')
+		self._connection.commit()
+
+	def __len__(self) -> int:
+		with self._lock:
+			return self._connection.execute('SELECT COUNT(*) FROM locations').fetchone()[0]
+
+	def get(self, location: str) -> Tuple[bool, Union[str, None]]:
+		"""
+		Looks up a location in the cache.
+
+		Parameters
+		----------
+		location : str
+			the location to look up
+
+		Returns
+		-------
+		Tuple[bool, Union[str, None]]
+			whether the location was found in the cache, and its (possibly None) country code
+		"""
+		with self._lock:
+			row = self._connection.execute(
+				'SELECT country_code, created_at FROM locations WHERE location = ?',
+				(normalize_location(location),)).fetchone()
+
+			if row is None or (self.ttl is not None and row[1] < time.time() - self.ttl):
+				# unknown or expired location
+				self.misses += 1
+				return False, None
+
+			self.hits += 1
+			return True, row[0]
+
+	def put(self, location: str, country_code: Union[str, None]) -> None:
+		"""
+		Stores the country code of a location in the cache.
+
+		Parameters
+		----------
+		location : str
+			the location
+		country_code : Union[str, None]
+			the country code of the location, or None if the location has no country
+		"""
+		with self._lock:
+			self._connection.execute(
+				'INSERT OR REPLACE INTO locations (location, country_code, created_at) VALUES (?, ?, ?)',
+				(normalize_location(location), country_code, time.time()))
+			self._connection.commit()
+
+	def geocode(self, google_api: GoogleV3, location: str) -> Union[str, None]:
+		"""
+		Looks up the country code of a location, only calling Google's geolocation API if it is not cached.
+
+		Errors of the API are not cached and not caught.
+
+		Parameters
+		----------
+		google_api : GoogleV3
+			the Google geolocation API
+		location : str
+			the location to look up
+
+		Returns
+		-------
+		Union[str, None]
+			the country code or None if the location is unknown
+		"""
+		found, country_code = self.get(location)
+		if found:
+			return country_code
+
+		country_code: Union[str, None] = geocode_country_code(google_api, location)
+		self.put(location, country_code)
+
+		return country_code
+
+	def purge(self) -> int:
+		"""
+		Removes all expired entries from the cache.
+
+		Returns
+		-------
+		int
+			the number of removed entries
+		"""
+		if self.ttl is None:
+			return 0
+
+		with self._lock:
+			cursor = self._connection.execute(
+				'DELETE FROM locations WHERE created_at < ?', (time.time() - self.ttl,))
+			self._connection.commit()
+
+			return cursor.rowcount
+
+	def close(self) -> None:
+		"""
+		Closes the underlying database.
+		"""
+		with self._lock:
+			self._connection.close()
@@ -0,0 +1,270 @@
+import threading
+from array import array
+from functools import reduce
+from typing import List, Dict, Union, Iterable
+
+import numpy as np
+from record import TweetRecord
+from tweet import Tweet
+
+
+class HashtagIndex:
+	"""
+	A thread-safe, inverted index from case-folded hashtags to the tweets that contain them.
+
+	Hashtags (with the '#' upfront) match regardless of their case, so #COVID19 and #covid19 share a posting list,
+	or exactly, like the hashtag filters of TweetTable and filters.py, if the index is case-sensitive.
+
+	Every added tweet gets the next tweet number, so the posting list of every hashtag, an int64 array
+	of tweet numbers, stays sorted when tweets are appended.
+	Queries are unions, intersections and differences of sorted posting lists, and return tweets in the order
+	in which they were added.
+	"""
+
+	def __init__(self, tweets: Iterable[Union[Tweet, TweetRecord]] = (), case_sensitive: bool = False):
+		"""
+		Constructs a new HashtagIndex object.
+
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the initial tweets
+		case_sensitive : bool
+			True to match hashtags exactly, else hashtags that only differ in case match
+		"""
+		self.tweets: List[Union[Tweet, TweetRecord]] = []
+		self.case_sensitive: bool = case_sensitive
+
+		self._postings: Dict[str, array] = {}
+		self._lock: threading.Lock = threading.Lock()
+
+		self.add_all(tweets)
+
+	def __len__(self) -> int:
+		return len(self.tweets)
+
+	def add(self, tweet: Union[Tweet, TweetRecord]) -> None:
+		"""
+		Adds a tweet to the index.
+
+		Parameters
+		----------
+		tweet : Union[Tweet, TweetRecord]
+			the tweet
+		"""
+		self.add_all([tweet])
+
+	def add_all(self, tweets: Iterable[Union[Tweet, TweetRecord]]) -> None:
+		"""
+		Adds tweets to the index.
+
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the tweets
+		"""
+		with self._lock:
+			for tweet in tweets:
+				number: int = len(self.tweets)
+				self.tweets.append(tweet)
+				# a tweet is posted once per hashtag, even if it uses it several times (in different cases)
+				for hashtag in set(self._key(hashtag) for hashtag in tweet.hashtags):
+					postings: Union[array, None] = self._postings.get(hashtag)
+					if postings is None:
+						postings: array = array('q')
+						self._postings[hashtag] = postings
+					postings.append(number)
+
+	def postings(self, hashtag: str) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		hashtag : str
+			the hashtag
+
+		Returns
+		-------
+		np.ndarray
+			the sorted numbers of the tweets that contain the hashtag
+		"""
+		assert hashtag, 'Invalid hashtag: hashtag cannot be None or an empty string'
+
+		with self._lock:
+			return self._get(self._key(hashtag))
+
+	def _key(self, hashtag: str) -> str:
+		return hashtag if self.case_sensitive else hashtag.casefold()
+
+	def _get_all(self, hashtags: List[str]) -> List[np.ndarray]:
+		# the posting list of every distinct (case-folded) hashtag once
+		return [self._get(hashtag) for hashtag in set(map(self._key, hashtags))]
+
+	def _get(self, hashtag: str) -> np.ndarray:
+		postings: Union[array, None] = self._postings.get(hashtag)
+
+		# a copy, so the posting list can still grow
+		return np.array(postings, dtype=np.int64) if postings is not None else np.zeros(0, dtype=np.int64)
+
+	def count(self, hashtag: str) -> int:
+		"""
+		Parameters
+		----------
+		hashtag : str
+			the hashtag
+
+		Returns
+		-------
+		int
+			the number of tweets that contain the hashtag
+		"""
+		assert hashtag, 'Invalid hashtag: hashtag cannot be None or an empty string'
+
+		with self._lock:
+			return len(self._postings.get(self._key(hashtag), ()))
+
+	def query(self, any_of: Union[Iterable[str], None] = None, all_of: Union[Iterable[str], None] = None,
+	          none_of: Union[Iterable[str], None] = None) -> np.ndarray:
+		"""
+		Finds the tweets that contain any of, all of and none of the provided hashtags.
+
+		Parameters
+		----------
+		any_of : Union[Iterable[str], None]
+			the tweets must contain at least one of these hashtags, None for no condition
+		all_of : Union[Iterable[str], None]
+			the tweets must contain all of these hashtags, None for no condition
+		none_of : Union[Iterable[str], None]
+			the tweets cannot contain any of these hashtags, None for no condition
+
+		Returns
+		-------
+		np.ndarray
+			the sorted numbers of the matching tweets
+		"""
+		any_of: List[str] = list(any_of) if any_of is not None else None
+		all_of: List[str] = list(all_of) if all_of is not None else None
+		none_of: List[str] = list(none_of) if none_of is not None else None
+		assert all(all(hashtags) for hashtags in (any_of, all_of, none_of) if hashtags is not None), \
+			'Invalid hashtag: hashtag cannot be None or an empty string'
+
+		with self._lock:
+			num_tweets: int = len(self.tweets)
+			any_postings: List[np.ndarray] = self._get_all(any_of) if any_of is not None else None
+			all_postings: List[np.ndarray] = self._get_all(all_of) if all_of is not None else None
+			none_postings: List[np.ndarray] = self._get_all(none_of) if none_of is not None else None
+
+		result: Union[np.ndarray, None] = None
+		if all_postings:
+			# intersect with the shortest posting list first, so the intermediate results stay small
+			all_postings.sort(key=len)
+			result = reduce(_intersection, all_postings)
+		if any_postings is not None:
+			union: np.ndarray = _union(any_postings)
+			result = union if result is None else _intersection(result, union)
+		if none_postings:
+			if result is None:
+				result = np.arange(num_tweets, dtype=np.int64)
+			result = np.setdiff1d(result, _union(none_postings), assume_unique=True)
+
+		return result if result is not None else np.arange(num_tweets, dtype=np.int64)
+
+	def _tweets(self, numbers: np.ndarray) -> List[Union[Tweet, TweetRecord]]:
+		return [self.tweets[number] for number in numbers.tolist()]
+
+	def filter_by_hashtag(self, hashtag: str) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Parameters
+		----------
+		hashtag : str
+			the hashtag on which to filter tweets
+
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the tweets with the provided hashtag
+		"""
+		return self._tweets(self.postings(hashtag))
+
+	def filter_by_hashtags_all(self, hashtags: List[str]) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Parameters
+		----------
+		hashtags : List[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the tweets with all of the provided hashtags
+		"""
+		assert hashtags, 'Invalid hashtags: hashtags cannot be empty'
+
+		return self._tweets(self.query(all_of=hashtags))
+
+	def filter_by_hashtags_any(self, hashtags: List[str]) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Parameters
+		----------
+		hashtags : List[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the tweets with any of the provided hashtags
+		"""
+		return self._tweets(self.query(any_of=hashtags))
+
+	def filter_by_hashtags_none(self, hashtags: List[str]) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Parameters
+		----------
+		hashtags : List[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the tweets with none of the provided hashtags
+		"""
+		return self._tweets(self.query(none_of=hashtags))
+
+
+def _union(postings: List[np.ndarray]) -> np.ndarray:
+	"""
+	Parameters
+	----------
+	postings : List[np.ndarray]
+		posting lists
+
+	Returns
+	-------
+	np.ndarray
+		the sorted union of the posting lists, in time of their total length (not of the number of tweets)
+	"""
+	if not postings:
+		return np.zeros(0, dtype=np.int64)
+
+	return np.unique(np.concatenate(postings))
+
+
+def _intersection(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+	"""
+	Parameters
+	----------
+	a : np.ndarray
+		a sorted posting list, preferably the shortest
+	b : np.ndarray
+		a sorted posting list
+
+	Returns
+	-------
+	np.ndarray
+		the sorted intersection of the posting lists, by a binary search of every number of a in b
+	"""
+	if len(a) == 0 or len(b) == 0:
+		return np.zeros(0, dtype=np.int64)
+
+	positions: np.ndarray = np.minimum(np.searchsorted(b, a), len(b) - 1)
+
+	return a[b[positions] == a]
@@ -0,0 +1,370 @@
+import json
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Tuple, Union, Any, Iterator, Iterable
+
+import numpy as np
+import tweepy
+from instrumentation import instrument
+from ratelimit import TokenBucket
+from store import read_columns, read_tweets, write_tweets
+from tweet import Tweet
+
+# the maximum number of tweets per page of Twitter's search API
+PAGE_SIZE: int = 100
+# the number of requests per 15 minute window of Twitter's search API (with user authentication)
+SEARCH_RATE_LIMIT: int = 180
+
+
+class TweetIdSet:
+	"""
+	A thread-safe, compact set of tweet ids.
+
+	Ids are kept in a few sorted int64 arrays of geometrically decreasing size (8 bytes per id),
+	plus a small buffer of recently added ids.
+	"""
+
+	def __init__(self, ids: Iterable[int] = (), buffer_size: int = 4096):
+		"""
+		Constructs a new set of tweet ids.
+
+		Parameters
+		----------
+		ids : Iterable[int]
+			the initial ids
+		buffer_size : int
+			the number of added ids that are buffered before they are merged into the sorted arrays
+		"""
+		self.buffer_size: int = buffer_size
+
+		self._levels: List[np.ndarray] = []
+		self._buffer: set = set()
+		self._lock: threading.Lock = threading.Lock()
+
+		initial: np.ndarray = np.unique(np.fromiter(ids, dtype=np.int64))
+		if len(initial) > 0:
+			self._levels.append(initial)
+
+	def __len__(self) -> int:
+		with self._lock:
+			return sum(len(level) for level in self._levels) + len(self._buffer)
+
+	def __contains__(self, id: int) -> bool:
+		with self._lock:
+			return self._contains(id)
+
+	def _contains(self, id: int) -> bool:
+		if id in self._buffer:
+			return True
+
+		for level in self._levels:
+			index: int = int(np.searchsorted(level, id))
+			if index < len(level) and level[index] == id:
+				return True
+
+		return False
+
+	def add(self, id: int) -> bool:
+		"""
+		Adds an id to the set.
+
+		Parameters
+		----------
+		id : int
+			the id
+
+		Returns
+		-------
+		bool
+			True if the id was not in the set yet, else False
+		"""
+		with self._lock:
+			if self._contains(id):
+				return False
+
+			self._buffer.add(id)
+			if len(self._buffer) >= self.buffer_size:
+				self._levels.append(np.sort(np.fromiter(self._buffer, dtype=np.int64, count=len(self._buffer))))
+				self._buffer.clear()
+				# merge levels of similar size, so there are only O(log n) levels
+				while len(self._levels) > 1 and len(self._levels[-2]) <= 2 * len(self._levels[-1]):
+					last: np.ndarray = self._levels.pop()
+					self._levels[-1] = np.union1d(self._levels[-1], last)
+
+			return True
+
+
+class TweetLog:
+	"""
+	An append-only, on-disk log of tweets, made up of columnar stores of bounded size (chunks),
+	together with a cursor per keyword that records how far the search for that keyword got in the current run.
+
+	A chunk and the cursors that account for it are committed together, so an interrupted run resumes
+	right after the last committed chunk. A new run starts with fresh cursors, but keeps the chunks of earlier runs,
+	so their tweets are not retrieved again.
+	"""
+
+	def __init__(self, path: str):
+		"""
+		Opens (or creates) a tweet log.
+
+		Parameters
+		----------
+		path : str
+			the path to the log's directory
+		"""
+		os.makedirs(path, exist_ok=True)
+
+		self.path: str = path
+		self._state: Dict[str, Any] = {'chunks': [], 'cursors': {}, 'run': 0}
+
+		state_path: str = os.path.join(path, 'state.json')
+		if os.path.exists(state_path):
+			with open(state_path) as file:
+				self._state = json.load(file)
+			self._state.setdefault('run', 0)
+
+		# remove chunks that were written, but never committed
+		for name in os.listdir(path):
+			if name.startswith('chunk-') and name not in self._state['chunks']:
+				shutil.rmtree(os.path.join(path, name))
+
+	def cursor(self, keyword: str) -> Dict[str, Any]:
+		"""
+		Gets the committed cursor of a keyword.
+
+		Parameters
+		----------
+		keyword : str
+			the keyword
+
+		Returns
+		-------
+		Dict[str, Any]
+			the id of the oldest committed tweet ('max_id', None if nothing was committed yet),
+			the number of committed tweets ('count') and whether the search is finished ('done')
+		"""
+		return dict(self._state['cursors'].get(keyword, {'max_id': None, 'count': 0, 'done': False}))
+
+	@property
+	def run_start(self) -> int:
+		"""
+		Returns
+		-------
+		int
+			the index of the first chunk of the current run
+		"""
+		return self._state['run']
+
+	def new_run(self) -> None:
+		"""
+		Starts a new run, with fresh cursors, so the keywords are searched from the latest tweet again.
+		"""
+		self._write_state({'chunks': list(self._state['chunks']), 'cursors': {}, 'run': len(self._state['chunks'])})
+
+	def commit(self, tweets: List[Tweet], cursors: Dict[str, Dict[str, Any]]) -> None:
+		"""
+		Appends a chunk of tweets to the log and updates the cursors, atomically.
+
+		Parameters
+		----------
+		tweets : List[Tweet]
+			the tweets of the chunk, can be empty to only update the cursors
+		cursors : Dict[str, Dict[str, Any]]
+			the new cursors of the keywords that were (partially) searched in the chunk
+		"""
+		state: Dict[str, Any] = {'chunks': list(self._state['chunks']), 'cursors': dict(self._state['cursors']),
+		                         'run': self._state['run']}
+
+		if tweets:
+			name: str = f'chunk-{len(state["chunks"]):06d}.tweets'
+			write_tweets(tweets, os.path.join(self.path, name))
+			state['chunks'].append(name)
+		state['cursors'].update(cursors)
+		self._write_state(state)
+
+	def _write_state(self, state: Dict[str, Any]) -> None:
+		temporary_path: str = os.path.join(self.path, 'state.json.tmp')
+		with open(temporary_path, 'w') as file:
+			json.dump(state, file)
+		os.replace(temporary_path, os.path.join(self.path, 'state.json'))
+
+		self._state = state
+
+	def ids(self) -> np.ndarray:
+		"""
+		Reads the ids of the committed tweets.
+
+		Returns
+		-------
+		np.ndarray
+			the ids (int64), in the order in which they were committed
+		"""
+		return np.concatenate([np.zeros(0, dtype=np.int64)] + [
+			read_columns(os.path.join(self.path, name), ['id'])['id'] for name in self._state['chunks']])
+
+	def read(self, columns: Union[List[str], None] = None, start: int = 0) -> Iterator[Tweet]:
+		"""
+		Reads the committed tweets, one chunk at a time.
+
+		Parameters
+		----------
+		columns : Union[List[str], None]
+			the columns to read, defaults to all columns
+		start : int
+			the index of the first chunk to read, run_start to only read the tweets of the current run
+
+		Returns
+		-------
+		Iterator[Tweet]
+			the tweets, in the order in which they were committed
+		"""
+		for name in self._state['chunks'][start:]:
+			yield from read_tweets(os.path.join(self.path, name), columns)
+
+
+@instrument()
+def stream_new_tweets(twitter_api: tweepy.API, keywords: Dict[str, int], log_path: str, language: str = 'en',
+                      chunk_size: int = 1000, resume: bool = False, max_workers: int = 4,
+                      rate_limit: float = SEARCH_RATE_LIMIT / (15 * 60)) -> Iterator[Tweet]:
+	"""
+	Streams the latest tweets from Twitter as Tweet objects, while appending them to an on-disk log.
+
+	The keywords are searched concurrently, sharing a token bucket rate limiter,
+	which allows bursts of a full rate limit window.
+	The tweets are committed to the log in chunks of at most chunk_size tweets (or a single page), together with
+	a cursor per keyword, so that an interrupted run can be resumed where it stopped and memory use does not depend on
+	the number of tweets.
+	Tweets of the current, uncommitted chunk are fetched again when a run is resumed.
+	Tweets that were already retrieved (in earlier runs or for another keyword) are skipped, and tagged with that
+	keyword as well if they were not committed yet.
+
+	Parameters
+	----------
+	twitter_api : tweepy.API
+	    The object to interact with the Twitter API
+	keywords : Dict[str,int]
+	    The keywords on which to filter tweets and their corresponding number of tweets to retrieve
+	log_path : str
+	    The path to the log's directory
+	language : str
+	    The language on which to filter tweets
+	chunk_size : int
+	    The maximum number of tweets per chunk
+	resume : bool
+	    True to resume the last run of the log, else a new run is started
+	max_workers : int
+	    The maximum number of keywords that are searched concurrently
+	rate_limit : float
+	    The maximum number of search requests per second
+
+	Returns
+	-------
+	Iterator[Tweet]
+		The new tweets, as the pages arrive
+	"""
+	log: TweetLog = TweetLog(log_path)
+	if not resume:
+		log.new_run()
+	bucket: TokenBucket = TokenBucket(rate_limit, capacity=SEARCH_RATE_LIMIT)
+	# the pages of all keywords, in the order they arrive, with the cursor of their keyword after the page
+	# (a page of None when the search of the keyword stopped),
+	# bounded so the searches cannot run ahead of the log by more than a few pages
+	pages: queue.Queue = queue.Queue(maxsize=2 * max_workers)
+	stopped: threading.Event = threading.Event()
+
+	def put(item: Tuple[str, Union[List[Any], None], Dict[str, Any]]) -> None:
+		# wait for room in the queue, unless the stream stopped and nothing reads the queue anymore
+		while not stopped.is_set():
+			try:
+				pages.put(item, timeout=0.1)
+				return
+			except queue.Full:
+				pass
+
+	def search(keyword: str, number: int, cursor: Dict[str, Any]) -> None:
+		try:
+			while cursor['count'] < number and not stopped.is_set():
+				count: int = min(number - cursor['count'], PAGE_SIZE)
+				bucket.acquire()
+				try:
+					if cursor['max_id'] is None:
+						new_tweets = twitter_api.search(q=f'{keyword} -filter:retweets', lang=language,
+						                                tweet_mode='extended', count=count)
+					else:
+						new_tweets = twitter_api.search(q=f'{keyword} -filter:retweets', lang=language,
+						                                tweet_mode='extended', count=count,
+						                                max_id=str(cursor['max_id'] - 1))
+				except tweepy.TweepError as error:
+					# keep the cursor, so the keyword is resumed on the next run
+					print(f'\tKeyword \'{keyword}\' interrupted: {error}')
+					break
+
+				if not new_tweets:
+					cursor['done'] = True
+					break
+
+				page: List[Any] = new_tweets[:count]
+				cursor['max_id'] = page[-1].id
+				cursor['count'] += len(page)
+				put((keyword, page, dict(cursor)))
+
+			if cursor['count'] >= number:
+				cursor['done'] = True
+		finally:
+			put((keyword, None, dict(cursor)))
+
+	chunk: List[Tweet] = []
+	cursors: Dict[str, Dict[str, Any]] = {}
+	# tweets that match several keywords are only kept once
+	seen: TweetIdSet = TweetIdSet(log.ids())
+	chunk_tweets: Dict[int, Tweet] = {}
+
+	with ThreadPoolExecutor(max_workers=max_workers) as executor:
+		futures: List[Future] = []
+		for keyword, number in keywords.items():
+			cursor: Dict[str, Any] = log.cursor(keyword)
+			if cursor['done']:
+				print(f'\tKeyword \'{keyword}\' already finished, got {cursor["count"]} tweets')
+			else:
+				futures.append(executor.submit(search, keyword, number, cursor))
+
+		try:
+			num_searching: int = len(futures)
+			while num_searching > 0:
+				keyword, page, cursor = pages.get()
+				if page is None:
+					num_searching -= 1
+					cursors[keyword] = cursor
+					print(f'\tKeyword \'{keyword}\' {"finished" if cursor["done"] else "paused"}, '
+					      f'got {cursor["count"]} tweets')
+					continue
+
+				if chunk and len(chunk) + len(page) > chunk_size:
+					# commit whole pages only, so the cursors match the committed tweets
+					log.commit(chunk, cursors)
+					chunk, cursors, chunk_tweets = [], {}, {}
+
+				for status in page:
+					if seen.add(status.id):
+						tweet: Tweet = Tweet(status)
+						tweet.keywords.append(keyword)
+						chunk.append(tweet)
+						chunk_tweets[status.id] = tweet
+						yield tweet
+					elif status.id in chunk_tweets and keyword not in chunk_tweets[status.id].keywords:
+						# tag duplicates that are not committed yet
+						chunk_tweets[status.id].keywords.append(keyword)
+				cursors[keyword] = cursor
+		finally:
+			# let the searches stop after their current page, e.g. when the stream is closed early
+			stopped.set()
+
+	for future in futures:
+		# raise the errors of the searches, before the last chunk is committed
+		future.result()
+
+	log.commit(chunk, cursors)
@@ -0,0 +1,395 @@
+import cProfile
+import inspect
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import List, Dict, Tuple, Union, NamedTuple, Any, Iterator, Callable, Sized
+
+try:
+	import resource
+except ImportError:
+	# not available on Windows, the peak RSS is not measured there
+	resource = None
+
+
+class Measurement(NamedTuple):
+	"""
+	The measurement of one run of a stage or of an instrumented function.
+
+	Properties
+	----------
+	name : str
+		the name of the stage or function
+	wall_seconds : float
+		the wall-clock time
+	cpu_seconds : float
+		the CPU time of the process (all threads, not the processes of a pool)
+	items : int
+		the number of items (e.g. tweets) that were processed
+	peak_rss_bytes : Union[int, None]
+		the peak resident set size of the process so far, None if unknown
+	peak_traced_bytes : Union[int, None]
+		the peak of the memory allocated by Python during the run, None if memory is not traced
+	"""
+	name: str
+	wall_seconds: float
+	cpu_seconds: float
+	items: int
+	peak_rss_bytes: Union[int, None]
+	peak_traced_bytes: Union[int, None]
+
+	def __str__(self) -> str:
+		s: str = f'{self.name}: {self.wall_seconds:.3f}s wall, {self.cpu_seconds:.3f}s CPU, {self.items} items'
+		if self.peak_rss_bytes is not None:
+			s += f', peak RSS {self.peak_rss_bytes / 2 ** 20:.1f} MiB'
+		if self.peak_traced_bytes is not None:
+			s += f', peak traced {self.peak_traced_bytes / 2 ** 20:.1f} MiB'
+
+		return s
+
+
+class Stage:
+	"""
+	A running stage, of which the number of processed items can be set once it is known.
+	"""
+
+	def __init__(self, name: str, items: int):
+		self.name: str = name
+		self.items: int = items
+		# the peak of the traced memory of the nested stages, as they reset the peak
+		self.peak_traced_bytes: int = 0
+
+
+class Instrumentation:
+	"""
+	Measures the wall-clock time, the CPU time, the peak memory and the number of items of stages and functions.
+
+	Every stage (a with block) is written to the log as a JSON line when it ends. Instrumented functions are called
+	too often (e.g. once per tweet) to be logged one by one, so only their totals are kept, like those of the stages,
+	and their memory is only measured if it is traced.
+	The totals can be written as a Prometheus text file, and the stages can be profiled with cProfile.
+
+	Measurements are made in the calling process only, the work of a process pool counts as wall-clock time.
+	"""
+
+	def __init__(self, enabled: bool = True, log_path: Union[str, None] = None, trace_memory: bool = False,
+	             profile_directory: Union[str, None] = None):
+		"""
+		Constructs a new Instrumentation object.
+
+		Parameters
+		----------
+		enabled : bool
+			False to call the instrumented functions and run the stages without measuring them
+		log_path : Union[str, None]
+			the path to the JSON lines log of the stages, None for no log
+		trace_memory : bool
+			True to trace the peak memory allocated by Python with tracemalloc, this slows down allocations
+		profile_directory : Union[str, None]
+			the directory of a cProfile dump per stage (only of the outermost stage if stages are nested),
+			None for no profiling
+
+		Properties
+		----------
+		totals : Dict[str, Dict[str, Any]]
+			the number of calls, the total wall-clock time, CPU time and items, and the peak memory per name
+		"""
+		self.enabled: bool = enabled
+		self.log_path: Union[str, None] = log_path
+		self.trace_memory: bool = trace_memory
+		self.profile_directory: Union[str, None] = profile_directory
+		self.totals: Dict[str, Dict[str, Any]] = {}
+
+		self._lock: threading.Lock = threading.Lock()
+		# the running stages per thread, to nest the peaks of the traced memory
+		self._local: threading.local = threading.local()
+		self._profiling: bool = False
+
+	def configure(self, **options: Any) -> 'Instrumentation':
+		"""
+		Changes the options, e.g. in a script before running the stages.
+
+		Parameters
+		----------
+		options : Any
+			the options, see the constructor
+
+		Returns
+		-------
+		Instrumentation
+			this instrumentation
+		"""
+		for option, value in options.items():
+			assert option in ('enabled', 'log_path', 'trace_memory', 'profile_directory'), f'Invalid option: {option}'
+			setattr(self, option, value)
+
+		return self
+
+	@contextmanager
+	def stage(self, name: str, items: int = 0) -> Iterator[Stage]:
+		"""
+		Measures a stage, e.g. of the demo.
+
+		Parameters
+		----------
+		name : str
+			the name of the stage
+		items : int
+			the number of items that the stage processes, can also be set on the returned stage
+
+		Returns
+		-------
+		Iterator[Stage]
+			the running stage
+		"""
+		stage: Stage = Stage(name, items)
+		if not self.enabled:
+			yield stage
+			return
+
+		profile: Union[cProfile.Profile, None] = None
+		with self._lock:
+			if self.profile_directory is not None and not self._profiling:
+				self._profiling: bool = True
+				profile: cProfile.Profile = cProfile.Profile()
+
+		try:
+			if profile is not None:
+				profile.enable()
+			with self._measure(stage, log=True):
+				yield stage
+		finally:
+			if profile is not None:
+				profile.disable()
+				os.makedirs(self.profile_directory, exist_ok=True)
+				profile.dump_stats(os.path.join(self.profile_directory, f'{_filename(name)}.prof'))
+				with self._lock:
+					self._profiling: bool = False
+
+	def instrument(self, name: Union[str, None] = None,
+	               items: Union[Callable[..., int], None] = None) -> Callable[[Callable], Callable]:
+		"""
+		Decorates a function to measure all its calls.
+
+		A generator function is measured while it produces items (not while its items are consumed),
+		and its items are the number of items it yielded.
+
+		Parameters
+		----------
+		name : Union[str, None]
+			the name of the function in the totals, defaults to its qualified name
+		items : Union[Callable[..., int], None]
+			the function that counts the items of a call from its arguments,
+			defaults to the length of the first argument if it has one, else 1
+
+		Returns
+		-------
+		Callable[[Callable], Callable]
+			the decorator
+		"""
+
+		def decorator(function: Callable) -> Callable:
+			function_name: str = name or function.__qualname__
+
+			if inspect.isgeneratorfunction(function):
+				@wraps(function)
+				def generator_wrapper(*args, **kwargs):
+					if not self.enabled:
+						return (yield from function(*args, **kwargs))
+
+					generator: Iterator = function(*args, **kwargs)
+					wall_seconds: float = 0.0
+					cpu_seconds: float = 0.0
+					num_items: int = 0
+					try:
+						while True:
+							start_wall: float = time.perf_counter()
+							start_cpu: float = time.process_time()
+							try:
+								item: Any = next(generator)
+							except StopIteration as stop:
+								return stop.value
+							finally:
+								wall_seconds += time.perf_counter() - start_wall
+								cpu_seconds += time.process_time() - start_cpu
+							num_items += 1
+							yield item
+					finally:
+						generator.close()
+						self._add(function_name, wall_seconds, cpu_seconds, num_items)
+
+				return generator_wrapper
+
+			@wraps(function)
+			def wrapper(*args, **kwargs):
+				if not self.enabled:
+					return function(*args, **kwargs)
+
+				if items is not None:
+					num_items: int = items(*args, **kwargs)
+				elif args and isinstance(args[0], Sized):
+					num_items: int = len(args[0])
+				else:
+					num_items: int = 1
+
+				if self.trace_memory:
+					with self._measure(Stage(function_name, num_items), log=False):
+						return function(*args, **kwargs)
+
+				# the fast path, for functions that are called once per tweet
+				start_wall: float = time.perf_counter()
+				start_cpu: float = time.process_time()
+				try:
+					return function(*args, **kwargs)
+				finally:
+					self._add(function_name, time.perf_counter() - start_wall, time.process_time() - start_cpu, num_items)
+
+			return wrapper
+
+		return decorator
+
+	@contextmanager
+	def _measure(self, stage: Stage, log: bool) -> Iterator[None]:
+		stages: List[Stage] = self._stages()
+		trace_memory: bool = self.trace_memory
+		if trace_memory:
+			if not tracemalloc.is_tracing():
+				tracemalloc.start()
+			# the enclosing stages keep their peak so far, before it is reset for this stage
+			peak: int = tracemalloc.get_traced_memory()[1]
+			for parent in stages:
+				parent.peak_traced_bytes = max(parent.peak_traced_bytes, peak)
+			if hasattr(tracemalloc, 'reset_peak'):
+				tracemalloc.reset_peak()
+			else:
+				# before Python 3.9, restart the tracing instead, so the peak only counts the memory that this stage
+				# allocates (not the memory that was already allocated)
+				tracemalloc.stop()
+				tracemalloc.start()
+		stages.append(stage)
+
+		start_wall: float = time.perf_counter()
+		start_cpu: float = time.process_time()
+		try:
+			yield
+		finally:
+			wall_seconds: float = time.perf_counter() - start_wall
+			cpu_seconds: float = time.process_time() - start_cpu
+			stages.pop()
+
+			peak_traced_bytes: Union[int, None] = None
+			if trace_memory and tracemalloc.is_tracing():
+				peak_traced_bytes: int = max(stage.peak_traced_bytes, tracemalloc.get_traced_memory()[1])
+				for parent in stages:
+					parent.peak_traced_bytes = max(parent.peak_traced_bytes, peak_traced_bytes)
+
+			self._record(Measurement(stage.name, wall_seconds, cpu_seconds, stage.items, peak_rss_bytes(),
+			                         peak_traced_bytes), log)
+
+	def _stages(self) -> List[Stage]:
+		if not hasattr(self._local, 'stages'):
+			self._local.stages = []
+
+		return self._local.stages
+
+	def _add(self, name: str, wall_seconds: float, cpu_seconds: float, items: int) -> Dict[str, Any]:
+		with self._lock:
+			if name not in self.totals:
+				self.totals[name] = {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0,
+				                     'peak_rss_bytes': None, 'peak_traced_bytes': None}
+			totals: Dict[str, Any] = self.totals[name]
+			totals['calls'] += 1
+			totals['wall_seconds'] += wall_seconds
+			totals['cpu_seconds'] += cpu_seconds
+			totals['items'] += items
+
+			return totals
+
+	def _record(self, measurement: Measurement, log: bool) -> None:
+		totals: Dict[str, Any] = self._add(measurement.name, measurement.wall_seconds, measurement.cpu_seconds,
+		                                   measurement.items)
+		with self._lock:
+			for peak in ('peak_rss_bytes', 'peak_traced_bytes'):
+				if getattr(measurement, peak) is not None:
+					totals[peak] = max(totals[peak] or 0, getattr(measurement, peak))
+
+			if log and self.log_path is not None:
+				os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+				with open(self.log_path, 'a') as file:
+					file.write(json.dumps({'time': time.time(), **measurement._asdict()}) + '\n')
+
+		if log:
+			print(measurement)
+
+	def write_prometheus(self, path: str, prefix: str = 'tweets') -> None:
+		"""
+		Writes the totals as a Prometheus text file, e.g. for the textfile collector of the node exporter.
+
+		Parameters
+		----------
+		path : str
+			the path to the text file, it is replaced atomically
+		prefix : str
+			the prefix of the names of the metrics
+		"""
+		metrics: List[Tuple[str, str, str, str]] = [
+			('calls', 'calls_total', 'counter', 'The number of runs of a stage or function.'),
+			('wall_seconds', 'wall_seconds_total', 'counter', 'The wall-clock time of a stage or function.'),
+			('cpu_seconds', 'cpu_seconds_total', 'counter', 'The CPU time of a stage or function.'),
+			('items', 'items_total', 'counter', 'The number of items processed by a stage or function.'),
+			('peak_rss_bytes', 'peak_rss_bytes', 'gauge', 'The peak resident set size at the end of a stage or function.'),
+			('peak_traced_bytes', 'peak_traced_bytes', 'gauge', 'The peak memory allocated by Python in a stage or function.'),
+		]
+
+		with self._lock:
+			totals: Dict[str, Dict[str, Any]] = {name: dict(values) for name, values in self.totals.items()}
+
+		lines: List[str] = []
+		for key, metric, metric_type, description in metrics:
+			lines.append(f'# HELP {prefix}_{metric} {description}')
+			lines.append(f'# TYPE {prefix}_{metric} {metric_type}')
+			for name, values in sorted(totals.items()):
+				if values[key] is not None:
+					lines.append(f'{prefix}_{metric}{{name="{_escape(name)}"}} {values[key]}')
+
+		os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+		with open(f'{path}.tmp', 'w') as file:
+			file.write('\n'.join(lines) + '\n')
+		os.replace(f'{path}.tmp', path)
+
+		print(f'Saved metrics to {path}')
+
+
+def peak_rss_bytes() -> Union[int, None]:
+	"""
+	Returns
+	-------
+	Union[int, None]
+		the peak resident set size of this process so far, None if unknown
+	"""
+	if resource is None:
+		return None
+
+	peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# bytes on macOS, kilobytes on Linux
+	return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _filename(name: str) -> str:
+	return re.sub(r'[^\w.-]+', '_', name).strip('_')
+
+
+def _escape(name: str) -> str:
+	return name.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# the instrumentation of the demo, of which the stages and the instrumented functions are measured
+instrumentation: Instrumentation = Instrumentation()
+stage = instrumentation.stage
+instrument = instrumentation.instrument
@@ -0,0 +1,117 @@
+import re
+from typing import Union
+
+import numpy as np
+import sklearn
+from scipy.sparse import csr_matrix
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.feature_extraction.text import TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+
+# the name of the logistic loss of the SGDClassifier, which was 'log' before scikit-learn 1.1
+LOG_LOSS: str = 'log_loss' if tuple(map(int, re.match(r'(\d+)\.(\d+)', sklearn.__version__).groups())) >= (1, 1) \
+	else 'log'
+
+
+class TfidfLinearClassifier(ClassifierMixin, BaseEstimator):
+	"""
+	A linear classifier (logistic regression or a linear SVM, trained with SGD) on TF-IDF weighted term counts.
+
+	The TF-IDF weights are not normalized per tweet, so they are a diagonal scaling of the counts, which is folded
+	into the coefficients after training: the trained model is a single coefficient vector over the counted (or hashed)
+	features plus a bias, and classifying a batch of tweets is one sparse matrix-vector product.
+	"""
+
+	def __init__(self, loss: str = 'log_loss', alpha: float = 1e-5, max_iter: int = 100, tol: Union[float, None] = 1e-3,
+	             use_idf: bool = True, class_weight: Union[dict, str, None] = None,
+	             random_state: Union[int, None] = 0):
+		"""
+		Constructs a new TfidfLinearClassifier object.
+
+		Parameters
+		----------
+		loss : str
+			the loss of the SGDClassifier, 'log_loss' (or 'log') for logistic regression or 'hinge' for a linear SVM
+		alpha : float
+			the strength of the L2 regularization
+		max_iter : int
+			the maximum number of passes over the training data
+		tol : Union[float, None]
+			the stopping criterion of the SGDClassifier, None to always make max_iter passes
+		use_idf : bool
+			True to weigh the term counts by their inverse document frequency, else the raw counts are used
+		class_weight : Union[dict, str, None]
+			the weights of the classes, 'balanced' to weigh them inversely to their frequency
+		random_state : Union[int, None]
+			the seed of the shuffling of the training data
+		"""
+		self.loss: str = loss
+		self.alpha: float = alpha
+		self.max_iter: int = max_iter
+		self.tol: Union[float, None] = tol
+		self.use_idf: bool = use_idf
+		self.class_weight: Union[dict, str, None] = class_weight
+		self.random_state: Union[int, None] = random_state
+
+	def fit(self, X: csr_matrix, y: np.ndarray, sample_weight: Union[np.ndarray, None] = None) -> 'TfidfLinearClassifier':
+		"""
+		Trains the classifier.
+
+		Parameters
+		----------
+		X : csr_matrix
+			the document-term matrix (counts or hashed counts)
+		y : np.ndarray
+			the labels, of two classes
+		sample_weight : Union[np.ndarray, None]
+			the weight of every tweet, e.g. the size of its cluster of near-duplicates
+
+		Returns
+		-------
+		TfidfLinearClassifier
+			this classifier
+		"""
+		tfidf: TfidfTransformer = TfidfTransformer(norm=None, use_idf=self.use_idf)
+		loss: str = LOG_LOSS if self.loss in ('log', 'log_loss') else self.loss
+		classifier: SGDClassifier = SGDClassifier(loss=loss, alpha=self.alpha, max_iter=self.max_iter, tol=self.tol,
+		                                          class_weight=self.class_weight, random_state=self.random_state)
+		classifier.fit(tfidf.fit_transform(X), y, sample_weight=sample_weight)
+
+		if len(classifier.classes_) != 2:
+			raise ValueError(f'Unsupported labels: {len(classifier.classes_)} classes instead of 2')
+
+		self.classes_: np.ndarray = classifier.classes_
+		# the weights of the TF-IDF, folded into the coefficients
+		self.coef_: np.ndarray = classifier.coef_.ravel() * (tfidf.idf_ if self.use_idf else 1)
+		self.intercept_: float = float(classifier.intercept_[0])
+		self.n_features_in_: int = X.shape[1]
+
+		return self
+
+	def decision_function(self, X: csr_matrix) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		X : csr_matrix
+			the document-term matrix
+
+		Returns
+		-------
+		np.ndarray
+			the score of every tweet, positive for the second class
+		"""
+		return np.asarray(X @ self.coef_).ravel() + self.intercept_
+
+	def predict(self, X: csr_matrix) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		X : csr_matrix
+			the document-term matrix
+
+		Returns
+		-------
+		np.ndarray
+			the predicted classes
+		"""
+		return self.classes_[(self.decision_function(X) > 0).astype(np.int64)]
@@ -0,0 +1,152 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Union, NamedTuple
+
+from geocoding import GeocodingCache, geocode_country_code, normalize_location
+from geopy import GoogleV3
+from instrumentation import instrument
+from ratelimit import TokenBucket
+from tweet import Tweet
+
+
+class GeocodingStats(NamedTuple):
+	"""
+	Statistics of a batch geocoding run.
+
+	Properties
+	----------
+	num_tweets : int
+		the number of tweets in the batch
+	num_locations : int
+		the number of distinct author locations that had to be resolved
+	cache_hits : int
+		the number of distinct locations that were found in the geocoding cache
+	cache_misses : int
+		the number of distinct locations that were looked up on the geocoding API
+	errors : int
+		the number of lookups that failed
+	num_located : int
+		the number of tweets with a location after the run
+	seconds : float
+		the wall-clock time of the run
+	"""
+	num_tweets: int
+	num_locations: int
+	cache_hits: int
+	cache_misses: int
+	errors: int
+	num_located: int
+	seconds: float
+
+	@property
+	def throughput(self) -> float:
+		"""
+		Returns
+		-------
+		float
+			the number of tweets processed per second
+		"""
+		return self.num_tweets / self.seconds if self.seconds > 0 else float('inf')
+
+	def __str__(self) -> str:
+		return f'{self.num_tweets} tweets ({self.num_located} located) in {self.seconds:.2f}s ' \
+		       f'({self.throughput:.1f} tweets/s), {self.num_locations} distinct locations: ' \
+		       f'{self.cache_hits} cache hits, {self.cache_misses} cache misses, {self.errors} errors'
+
+
+@instrument()
+def add_locations(tweets: List[Tweet], google_api: Union[GoogleV3, None], max_workers: int = 8,
+                  rate_limit: float = 40.0, cache: Union[GeocodingCache, None] = None) -> GeocodingStats:
+	"""
+	Adds a location to a batch of tweets, resolving every distinct author location only once.
+
+	The distinct locations are looked up concurrently on a thread pool, under a token bucket rate limiter.
+	Any object with a GoogleV3-like geocode(query=...) method can be used as geocoder.
+
+	Parameters
+	----------
+	tweets : List[Tweet]
+		the tweets
+	google_api : Union[GoogleV3, None]
+		the Google geolocation API (or a compatible geocoder)
+	max_workers : int
+		the maximum number of concurrent lookups
+	rate_limit : float
+		the maximum number of lookups per second
+	cache : Union[GeocodingCache, None]
+		the geocoding cache, defaults to the cache shared by all tweets
+
+	Returns
+	-------
+	GeocodingStats
+		statistics of the run
+	"""
+	start: float = time.perf_counter()
+	if cache is None:
+		cache: Union[GeocodingCache, None] = Tweet.geocoding_cache
+
+	# group the tweets that still need a lookup by their normalized author location
+	unresolved: Dict[str, List[Tweet]] = defaultdict(list)
+	queries: Dict[str, str] = {}
+	for tweet in tweets:
+		# use the tweet's place and the offline gazetteer first
+		tweet.add_location(None)
+		if tweet.has_country_code():
+			continue
+
+		location: Union[str, None] = tweet.author_location
+		if google_api is None or location is None or location == '':
+			continue
+
+		key: str = normalize_location(location)
+		unresolved[key].append(tweet)
+		queries.setdefault(key, location)
+
+	# answer as many locations as possible from the cache
+	country_codes: Dict[str, Union[str, None]] = {}
+	to_lookup: List[str] = []
+	for key, query in queries.items():
+		found, country_code = cache.get(query) if cache is not None else (False, None)
+		if found:
+			country_codes[key] = country_code
+		else:
+			to_lookup.append(key)
+
+	# look up the remaining locations concurrently
+	bucket: TokenBucket = TokenBucket(rate_limit)
+
+	def lookup(key: str) -> Union[str, None]:
+		bucket.acquire()
+		return geocode_country_code(google_api, queries[key])
+
+	errors: int = 0
+	if to_lookup:
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			futures = {key: executor.submit(lookup, key) for key in to_lookup}
+			for key, future in futures.items():
+				try:
+					country_codes[key] = future.result()
+				except Exception:
+					# do not cache errors, the location will be looked up again next time
+					errors += 1
+					continue
+				if cache is not None:
+					cache.put(queries[key], country_codes[key])
+
+	# write the results back to every tweet that shares a location
+	for key, location_tweets in unresolved.items():
+		country_code: Union[str, None] = country_codes.get(key)
+		for tweet in location_tweets:
+			tweet.country_code = country_code
+			tweet.add_continent_name()
+
+	return GeocodingStats(
+		num_tweets=len(tweets),
+		num_locations=len(queries),
+		cache_hits=len(queries) - len(to_lookup),
+		cache_misses=len(to_lookup),
+		errors=errors,
+		num_located=sum(1 for tweet in tweets if tweet.has_location()),
+		seconds=time.perf_counter() - start,
+	)
@@ -1,22 +1,31 @@
+import os
 import pickle
-from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Union
 
-import nltk
+import numpy as np
 import tweepy
-from filters import filter_by_hashtag, filter_by_hashtags_all, filter_by_hashtags_any, filter_before, filter_at, filter_after, filter_between, \
-	filter_by_country_code, filter_by_country_codes, filter_by_continent, filter_by_continents, sort_by_date_ascending, \
-	sort_by_date_descending, group_by_country_code, group_by_continent
+from aggregation import TweetCounts
+from bundle import save_bundle
+from deduplication import find_near_duplicates
+from geocoding import GeocodingCache
 from geopy import GoogleV3
-from nltk import re
-from nltk.corpus import stopwords
+from ingest import TweetLog, stream_new_tweets
+from instrumentation import instrumentation, stage
+from linear import TfidfLinearClassifier
+from locations import GeocodingStats, add_locations
+from preprocessing import TweetPreprocessor
+from record import TweetRecord, compact_tweets
+from rollup import RollupCube
+from selection import SelectionResult, select_model
 from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import ComplementNB
 from sklearn.tree import DecisionTreeClassifier
+from store import read_tweets, write_tweets
+from table import TweetTable
 from tweet import Tweet
-from visualization import visualize
+from vectorization import fit_transform_parallel, preprocess_parallel, transform_parallel
+from visualization import RenderSpec, render_all
 
 
 def demo():
@@ -29,196 +38,201 @@ def demo():
 	# 6. VISUALIZE           #
 	##########################
 	print()
+	# log the wall-clock time, CPU time, memory and number of items of every stage
+	# (trace_memory=True adds the peak memory allocated by Python, profile_directory='profiles' a cProfile dump per stage)
+	instrumentation.configure(log_path='logs/metrics.jsonl', trace_memory=False, profile_directory=None)
 
 	######################
 	# 1. GET NEW DATASET #
 	######################
-	print('\n1. GET NEW DATASET')
-	# read Twitter tokens
-	consumer_key, consumer_secret, access_token, access_token_secret = read_twitter_tokens('tokens/twitter_tokens.txt')
-	# connect with the Twitter API
-	twitter_api: tweepy.API = connect_to_twitter_api(consumer_key, consumer_secret, access_token, access_token_secret)
-	# define keywords
-	# define keywords
-	# COVID_KEYWORDS: List[str] = [
-	# 	'corona', 'covid', 'quaranteen', 'home', 'stay', 'inside', 'virology', 'doctor', 'nurse', 'virus', 'grandma',
-	# 	'vaccin', 'sars', 'alone', 'strongtogether', 'elbow', 'mouth mask', 'protective equipment', 'hospitalization',
-	# 	'increas', 'death', 'dead', 'impact', 'ICU', 'intensive care', 'applause', 'stay healthy', 'take care', 'risk',
-	# 	'risk group', 'environment',
-	# 	'U+1F637',  # Medical Mask Emoji
-	# 	'U+1F691',  # Amublance Emoji
-	# 	'U+1F92E',  # Vomiting Emoji
-	# 	'U+1F912',  # Thermometer Emoji
-	# ]
-	# COVID_FAKE_KEYWORDS: List[str] = [
-	# 	'coronascam', 'fakecorona', 'fake', 'coronahoax', 'hoaxcorona', 'gooutside', 'donotstayhome''fuckvirology',
-	# 	'donttrustvirologists', 'coronadoesntexist', 'chinesevirushoax',
-	# ]
-	keywords: Dict[str, int] = {
-		'covid': 100,  # get 100 tweets with 'covid' in it
-		'corona': 100,  # get 100 tweet with 'corona' in it
-		'coronahoax': 100,  # get tweets 100 with 'coronahoax' in it
-	}
-	# get new dataset
-	new_dataset: List[Tweet] = get_new_tweets(twitter_api, keywords)
-	print(f'First tweet:\n{new_dataset[0]}')
-	# save new dataset
-	save_tweets(new_dataset, 'tweets/new_dataset.pickle')
+	with stage('1. get new dataset') as current_stage:
+		print('\n1. GET NEW DATASET')
+		# read Twitter tokens
+		consumer_key, consumer_secret, access_token, access_token_secret = read_twitter_tokens('tokens/twitter_tokens.txt')
+		# connect with the Twitter API
+		twitter_api: tweepy.API = connect_to_twitter_api(consumer_key, consumer_secret, access_token, access_token_secret)
+		# define keywords
+		# define keywords
+		# COVID_KEYWORDS: List[str] = [
+		# 	'corona', 'covid', 'quaranteen', 'home', 'stay', 'inside', 'virology', 'doctor', 'nurse', 'virus', 'grandma',
+		# 	'vaccin', 'sars', 'alone', 'strongtogether', 'elbow', 'mouth mask', 'protective equipment', 'hospitalization',
+		# 	'increas', 'death', 'dead', 'impact', 'ICU', 'intensive care', 'applause', 'stay healthy', 'take care', 'risk',
+		# 	'risk group', 'environment',
+		# 	'U+1F637',  # Medical Mask Emoji
+		# 	'U+1F691',  # Amublance Emoji
+		# 	'U+1F92E',  # Vomiting Emoji
+		# 	'U+1F912',  # Thermometer Emoji
+		# ]
+		# COVID_FAKE_KEYWORDS: List[str] = [
+		# 	'coronascam', 'fakecorona', 'fake', 'coronahoax', 'hoaxcorona', 'gooutside', 'donotstayhome''fuckvirology',
+		# 	'donttrustvirologists', 'coronadoesntexist', 'chinesevirushoax',
+		# ]
+		keywords: Dict[str, int] = {
+			'covid': 100,  # get 100 tweets with 'covid' in it
+			'corona': 100,  # get 100 tweet with 'corona' in it
+			'coronahoax': 100,  # get tweets 100 with 'coronahoax' in it
+		}
+		# get new dataset, searching the keywords concurrently and streaming the tweets to an on-disk log
+		# (tweets of earlier runs are skipped)
+		# set resume to True to resume an interrupted run where it stopped, instead of starting a new run
+		resume: bool = False
+		num_new_tweets: int = sum(1 for _ in stream_new_tweets(twitter_api, keywords, 'tweets/new_dataset.log',
+		                                                       resume=resume))
+		print(f'Got {num_new_tweets} new tweets in this run')
+		# only the tweets of this run (and of the interrupted run it resumed)
+		new_dataset_log: TweetLog = TweetLog('tweets/new_dataset.log')
+		new_dataset: List[Tweet] = list(new_dataset_log.read(start=new_dataset_log.run_start))
+		print(f'First tweet:\n{new_dataset[0]}')
+		current_stage.items = len(new_dataset)
+		# save new dataset
+		save_tweets(new_dataset, 'tweets/new_dataset.tweets')
 
 	####################
 	# 2. ADD LOCATIONS #
 	####################
-	print('\n2. ADD LOCATION TO THOSE TWEETS')
-	# read Google token
-	geocoding_api_key: str = read_google_token('tokens/google_token.txt')
-	# initialize Google API
-	google_api: GoogleV3 = GoogleV3(api_key=geocoding_api_key)
-	# add location to tweets when possible
-	num_tweets_with_location_before: int = 0
-	num_tweets_with_location_after: int = 0
-	for tweet in new_dataset:
-		if tweet.country_code is not None and tweet.continent is not None:
-			num_tweets_with_location_before += 1
-		tweet.add_location(google_api)
-		if tweet.country_code is not None and tweet.continent is not None:
-			num_tweets_with_location_after += 1
-	print(f'Number of tweets with location before: {num_tweets_with_location_before}')
-	print(f'Number of tweets with location after: {num_tweets_with_location_after}')
-	# save new dataset with locations included
-	save_tweets(new_dataset, 'tweets/new_dataset.pickle')
+	with stage('2. add locations') as current_stage:
+		print('\n2. ADD LOCATION TO THOSE TWEETS')
+		# read Google token
+		geocoding_api_key: str = read_google_token('tokens/google_token.txt')
+		# initialize Google API
+		google_api: GoogleV3 = GoogleV3(api_key=geocoding_api_key)
+		# share a persistent geocoding cache between all tweets, so only unseen locations are looked up
+		Tweet.geocoding_cache = GeocodingCache('cache/geocoding.sqlite')
+		# add location to tweets when possible, looking up every distinct author location only once
+		num_tweets_with_location_before: int = sum(1 for tweet in new_dataset if tweet.has_location())
+		geocoding_stats: GeocodingStats = add_locations(new_dataset, google_api, max_workers=8, rate_limit=40.0)
+		current_stage.items = len(new_dataset)
+		print(f'Number of tweets with location before: {num_tweets_with_location_before}')
+		print(f'Number of tweets with location after: {geocoding_stats.num_located}')
+		print(f'Geocoding: {geocoding_stats}')
+		# the tweepy's Status objects are no longer needed after location resolution
+		for tweet in new_dataset:
+			tweet.detach_status()
+		# save new dataset with locations included
+		save_tweets(new_dataset, 'tweets/new_dataset.tweets')
 
 	########################
 	# 3. TRAIN CLASSIFIERS #
 	########################
-	print('\n3. TRAIN CLASSIFIERS')
-	# load train dataset
-	train_dataset = load_tweets('tweets/train_dataset.pickle')
-	# pre-process train dataset
-	X: List[str] = [tweet.text for tweet in train_dataset]
-	X: List[str] = preprocess_corpus(X)
-	labels: List[bool] = [tweet.denier for tweet in train_dataset]
-
-	# train on part of the data
-	# train, validation split
-	X_train, X_test, y_train, y_test = train_test_split(X, labels, test_size=0.2)
-	# vectorize
-	vectorizer: CountVectorizer = CountVectorizer()
-	X_train = vectorizer.fit_transform(X_train)
-	X_test = vectorizer.transform(X_test)
-
-	# create Complement Naive Bayes classifier
-	naive_bayes_classifier = ComplementNB()
-	# train Complement Naive Bayes classifier
-	naive_bayes_classifier = naive_bayes_classifier.fit(X_train, y_train)
-	# validate Complement Naive Bayes classifier
-	naive_bayes_accuracy: float = naive_bayes_classifier.score(X_test, y_test)
-	print(f'Naive Bayes accuracy:\t{naive_bayes_accuracy * 100:>3.2f}%')
-	# save Naive Bayes classifier
-	save_model(naive_bayes_classifier, 'models/naive_bayes.pickle')
-
-	# create Decision Tree classifier
-	decision_tree_classifier = DecisionTreeClassifier()
-	# train Decision Tree classifier
-	decision_tree_classifier = decision_tree_classifier.fit(X_train, y_train)
-	# validate Decision Tree classifier
-	decision_tree_accuracy: float = decision_tree_classifier.score(X_test, y_test)
-	print(f'Decision Tree accuracy:\t{decision_tree_accuracy * 100:>3.2f}%')
-	# save Decision Tree classifier
-	save_model(decision_tree_classifier, 'models/decision_tree.pickle')
-
-	# retrain best model on all of the data
-	# vectorize
-	vectorizer: CountVectorizer = CountVectorizer()
-	X: List[str] = vectorizer.fit_transform(X)
-	best_model = ComplementNB().fit(X, labels) \
-		if naive_bayes_accuracy >= decision_tree_accuracy \
-		else DecisionTreeClassifier().fit(X, labels)
-	# save best mode
-	save_model(best_model, 'models/best_model.pickle')
+	with stage('3. train classifiers') as current_stage:
+		print('\n3. TRAIN CLASSIFIERS')
+		# load train dataset, only the columns needed for training
+		train_dataset = load_tweets('tweets/train_dataset.tweets', columns=['text', 'denier'])
+		# pre-process train dataset, in parallel
+		X: List[str] = [tweet.text for tweet in train_dataset]
+		X: List[str] = preprocess_parallel(X)
+		labels: List[bool] = [tweet.denier for tweet in train_dataset]
+		current_stage.items = len(train_dataset)
+		# collapse near-duplicate tweets (copy-pasted tweets and spam), so they do not bias the classifiers
+		rows, _ = find_near_duplicates(X).keep('collapse')
+		X: List[str] = [X[i] for i in rows]
+		labels: List[bool] = [labels[i] for i in rows]
+		print(f'Training on {len(rows)} of {len(train_dataset)} tweets, without near-duplicates')
+
+		# vectorize once, in parallel
+		vectorizer: CountVectorizer = CountVectorizer()
+		X = fit_transform_parallel(vectorizer, X)
+
+		# select the best classifier with k-fold cross-validation, the folds and classifiers are trained in parallel
+		selection: SelectionResult = select_model(X, labels)
+		print(selection)
+		# every classifier is already retrained on all of the data, save them all
+		for name, model in selection.models.items():
+			save_model(model, f'models/{name.lower().replace(" ", "_")}.pickle')
+		best_model = selection.model
+		# save best mode
+		save_model(best_model, 'models/best_model.pickle')
+		# save best model together with the preprocessor and the vectorizer, to classify tweets from a fresh process
+		save_bundle('models/best_model.bundle', best_model, vectorizer, TweetPreprocessor())
 
 	#######################
 	# 4. MAKE PREDICTIONS #
 	#######################
-	print('\n4. USE CLASSIFIERS')
-	# load test dataset
-	test_dataset = load_tweets('tweets/test_dataset.pickle')
-
-	# pre-processing
-	X: List[str] = [tweet.text for tweet in test_dataset]
-	X: List[str] = preprocess_corpus(X)
-	# vectorize
-	X = vectorizer.transform(X)
-	# make predictions
-	y = best_model.predict(X)
-
-	# add predictions to tweet
-	for tweet, label in zip(test_dataset, y):
-		tweet.denier = label
+	with stage('4. make predictions') as current_stage:
+		print('\n4. USE CLASSIFIERS')
+		# load test dataset
+		test_dataset = load_tweets('tweets/test_dataset.tweets')
+		current_stage.items = len(test_dataset)
+
+		# pre-processing, in parallel
+		X: List[str] = [tweet.text for tweet in test_dataset]
+		X: List[str] = preprocess_parallel(X)
+		# count every cluster of near-duplicate tweets only once
+		counted: np.ndarray = np.zeros(len(test_dataset), dtype=bool)
+		counted[find_near_duplicates(X).keep('collapse')[0]] = True
+		# vectorize, in parallel
+		X = transform_parallel(vectorizer, X)
+		# make predictions
+		with stage('predict', X.shape[0]):
+			y = best_model.predict(X)
+
+		# add predictions to tweet, and count the classified tweets for the visualizations
+		tweet_counts: TweetCounts = TweetCounts()
+		for tweet, label, is_counted in zip(test_dataset, y, counted):
+			tweet.denier = label
+			if is_counted:
+				tweet_counts.add(tweet)
+		# keep the classified tweets as memory-compact records
+		test_dataset: List[TweetRecord] = compact_tweets(test_dataset)
 
 	##########################
 	# 5. FILTER, SORT, GROUP #
 	##########################
-	print('\n5. USE VARIOUS FILTERS')
-	# use filters
-	tweets_filtered_by_hashtag: List[Tweet] = filter_by_hashtag(test_dataset, '#coronahoax')
-	tweets_filtered_by_hashtags_all: List[Tweet] = filter_by_hashtags_all(test_dataset, ['#corona', '#coronahoax'])
-	tweets_filtered_by_hashtags_any: List[Tweet] = filter_by_hashtags_any(test_dataset, ['#corona', '#coronahoax', '#coronavirus', '#covid19'])
-	tweets_filtered_before: List[Tweet] = filter_before(test_dataset, datetime(2020, 4, 19, 18, 58, 46))
-	tweets_filtered_at: List[Tweet] = filter_at(test_dataset, datetime(2020, 4, 19, 18, 58, 46))
-	tweets_filtered_after: List[Tweet] = filter_after(test_dataset, datetime(2020, 4, 19, 18, 58, 46))
-	tweets_filtered_between: List[Tweet] = filter_between(test_dataset, datetime(2020, 4, 19, 18, 0, 0), datetime(2020, 4, 19, 19, 0, 0))
-	tweets_filtered_by_country_code: List[Tweet] = filter_by_country_code(test_dataset, 'US')
-	tweets_filtered_by_country_codes: List[Tweet] = filter_by_country_codes(test_dataset, ['US', 'GB'])
-	tweets_filtered_by_continent: List[Tweet] = filter_by_continent(test_dataset, 'Europe')
-	tweets_filtered_by_continents: List[Tweet] = filter_by_continents(test_dataset, ['Europe', 'North America'])
-	tweets_sorted_by_date_ascending: List[Tweet] = sort_by_date_ascending(test_dataset)
-	tweets_sorted_by_date_descending: List[Tweet] = sort_by_date_descending(test_dataset)
-	tweets_grouped_by_country_code: defaultdict = group_by_country_code(test_dataset)
-	tweets_grouped_by_continent: defaultdict = group_by_continent(test_dataset)
+	with stage('5. filter, sort, group') as current_stage:
+		print('\n5. USE VARIOUS FILTERS')
+		# index the columns of the test dataset once, to filter, sort and group it with vectorized operations
+		table: TweetTable = TweetTable(test_dataset)
+		current_stage.items = len(table)
+		# use filters
+		tweets_filtered_by_hashtag: TweetTable = table.filter_by_hashtag('#coronahoax')
+		tweets_filtered_by_hashtags_all: TweetTable = table.filter_by_hashtags_all(['#corona', '#coronahoax'])
+		tweets_filtered_by_hashtags_any: TweetTable = table.filter_by_hashtags_any(['#corona', '#coronahoax', '#coronavirus', '#covid19'])
+		tweets_filtered_before: TweetTable = table.filter_before(datetime(2020, 4, 19, 18, 58, 46))
+		tweets_filtered_at: TweetTable = table.filter_at(datetime(2020, 4, 19, 18, 58, 46))
+		tweets_filtered_after: TweetTable = table.filter_after(datetime(2020, 4, 19, 18, 58, 46))
+		tweets_filtered_between: TweetTable = table.filter_between(datetime(2020, 4, 19, 18, 0, 0), datetime(2020, 4, 19, 19, 0, 0))
+		tweets_filtered_by_country_code: TweetTable = table.filter_by_country_code('US')
+		tweets_filtered_by_country_codes: TweetTable = table.filter_by_country_codes(['US', 'GB'])
+		tweets_filtered_by_continent: TweetTable = table.filter_by_continent('Europe')
+		tweets_filtered_by_continents: TweetTable = table.filter_by_continents(['Europe', 'North America'])
+		tweets_sorted_by_date_ascending: TweetTable = table.sort_by_date_ascending()
+		tweets_sorted_by_date_descending: TweetTable = table.sort_by_date_descending()
+		tweets_grouped_by_country_code: Dict[str, TweetTable] = table.group_by_country_code()
+		tweets_grouped_by_continent: Dict[str, TweetTable] = table.group_by_continent()
 
 	################
 	# 6. VISUALIZE #
 	################
-	print('\n6. VISUALIZE')
-	# continents
-	CONTINENTS: Dict[str, str] = {
-		'Asia': 'asia',
-		'Europe': 'europe',
-		'Africa': 'africa',
-		'North America': 'north_america',
-		'South America': 'south_america',
-		'Oceania': 'oceania',
-		'Antarctica': 'antartica',
-	}
-
-	# create series to plot
-	num_tweets_per_country_per_continent_absolute = defaultdict(lambda: defaultdict(int))
-	num_tweets_per_country_absolute = defaultdict(lambda: defaultdict(int))
-	num_tweets_per_continent_absolute = defaultdict(lambda: defaultdict(int))
-	for tweet in test_dataset:
-		if tweet.has_location():
-			country_code: str = tweet.country_code.lower()
-			continent: str = CONTINENTS[tweet.continent]
-
-			num_tweets_per_country_per_continent_absolute[tweet.continent][country_code] += 1
-			num_tweets_per_country_absolute['World'][country_code] += 1
-			num_tweets_per_continent_absolute['World'][continent] += 1
-
-	# visualize plots
-	title = 'Absolute number of tweets per country and per continent'
-	series = num_tweets_per_country_per_continent_absolute
-	filename = 'num_tweets_per_country_per_continent_absolute'
-	visualize(title, series, filename, per_continent=False)
-
-	title = 'Absolute number of tweets per country'
-	series = num_tweets_per_country_absolute
-	filename = 'num_tweets_per_country_absolute'
-	visualize(title, series, filename, per_continent=False)
-
-	title = 'Absolute number of tweets per continent'
-	series = num_tweets_per_continent_absolute
-	filename = 'num_tweets_per_continent_absolute'
-	visualize(title, series, filename, per_continent=True)
+	with stage('6. visualize') as current_stage:
+		print('\n6. VISUALIZE')
+		# create series to plot, from the counts of the classified tweets
+		num_tweets_per_country_per_continent_absolute = tweet_counts.num_tweets_per_country_per_continent()
+		num_tweets_per_country_absolute = tweet_counts.num_tweets_per_country()
+		num_tweets_per_continent_absolute = tweet_counts.num_tweets_per_continent()
+
+		# roll the counts up per country, type and day, to plot ratios without touching the tweets
+		rollup_cube: RollupCube = RollupCube.from_counts(tweet_counts).resample(timedelta(days=1))
+
+		# visualize plots, all at once on a process pool, maps that did not change since the last run are skipped
+		render_specs: List[RenderSpec] = [
+			RenderSpec('Absolute number of tweets per country and per continent', num_tweets_per_country_per_continent_absolute,
+			           'num_tweets_per_country_per_continent_absolute', per_continent=False),
+			RenderSpec('Absolute number of tweets per country', num_tweets_per_country_absolute,
+			           'num_tweets_per_country_absolute', per_continent=False),
+			RenderSpec('Absolute number of tweets per continent', num_tweets_per_continent_absolute,
+			           'num_tweets_per_continent_absolute', per_continent=True),
+			RenderSpec('Percentage of deniers per country', rollup_cube.denier_ratio_per_country(),
+			           'denier_ratio_per_country', per_continent=False),
+		]
+		# and a map per day
+		for day, series in rollup_cube.denier_ratio_per_bucket():
+			render_specs.append(RenderSpec(f'Percentage of deniers per country on {day:%Y-%m-%d}', series,
+			                               f'denier_ratio_per_country_{day:%Y%m%d}', per_continent=False))
+		render_all(render_specs, 'images', 'cache/render.json')
+		current_stage.items = len(render_specs)
+
+	# write the totals of the stages and of the instrumented functions, e.g. for the node exporter's textfile collector
+	instrumentation.write_prometheus('logs/metrics.prom')
 
 
 def read_twitter_tokens(path: str) -> Tuple[str, str, str, str]:
@@ -296,91 +310,64 @@ def connect_to_twitter_api(consumer_key: str, consumer_secret: str, access_token
 	return api
 
 
-def get_new_tweets(twitter_api: tweepy.API, keywords: Dict[str, int], language: str = 'en') -> List[Tweet]:
-	"""
-	Get latest tweets from Twitter and create a list of Tweet Objects.
-
-	Parameters
-	----------
-	twitter_api : tweepy.API
-	    The object to interact with the Twitter API
-	keywords : Dict[str,int]
-	    The keywords on which to filter tweets and their corresponding number of tweets to retrieve
-	language : str
-	    The language on which to filter tweets
-
-	Returns
-	-------
-	List[Tweet]
-		A list of Tweet objects containing the latest tweets
-	"""
-	tweets = []
-	for keyword, number in keywords.items():
-		searched_tweets = []
-		last_id = -1
-		while len(searched_tweets) < number:
-			count = number - len(searched_tweets)
-			try:
-				new_tweets = twitter_api.search(q=f'{keyword} -filter:retweets', lang=language, tweet_mode='extended',
-				                                count=count, max_id=str(last_id - 1))
-				if not new_tweets:
-					break
-				searched_tweets.extend(new_tweets)
-				last_id = new_tweets[-1].id
-			except tweepy.TweepError:
-				break
-		tweets.extend([Tweet(status) for status in searched_tweets])
-		print(f'\tKeyword \'{keyword}\' finished, got {len(searched_tweets)} new tweets')
-
-	print(f'Got {len(tweets)} new tweets in total')
-
-	return tweets
-
-
 def save_tweets(tweets: List[Tweet], path: str) -> None:
 	"""
-	Save tweets to a pickle file.
+	Save tweets to a columnar store.
+
+	Only the fields of the tweets are saved, not their tweepy's Status objects.
+	A legacy pickle file at the path is replaced, so a dataset can be converted in place.
 
 	Parameters
 	----------
 	tweets : List[Tweet]
 		The tweets to be saved
 	path : str
-	    The path to the pickle file
+	    The path to the columnar store's directory
 	"""
-	with open(path, 'wb') as file:
-		pickle.dump(tweets, file)
-		print(f'Saved {len(tweets)} tweets to {path}')
+	if os.path.isfile(path):
+		os.remove(path)
+	write_tweets(tweets, path)
+	print(f'Saved {len(tweets)} tweets to {path}')
 
 
-def load_tweets(path: str) -> List[Tweet]:
+def load_tweets(path: str, columns: Union[List[str], None] = None) -> List[Tweet]:
 	"""
-	Load tweets from a pickle file.
+	Load tweets from a columnar store (a directory) or from a legacy pickle file.
+
+	If there is nothing at the path, the tweets are loaded from the legacy pickle file next to it, with the same name
+	and a .pickle extension (e.g. tweets/train_dataset.pickle for tweets/train_dataset.tweets).
 
 	Parameters
 	----------
 	path : str
-	    The path to the pickle file
+	    The path to the columnar store's directory or to the pickle file
+	columns : Union[List[str], None]
+	    The columns to load from a columnar store, defaults to all columns
 
 	Returns
 	-------
 	List[Tweets]
-	    The list of tweets, loaded from the pickle file
+	    The list of tweets, loaded from the columnar store or the pickle file
 	"""
-	with open(path, 'rb') as file:
-		tweets: List[Tweet] = pickle.load(file)
-		print(f'Loaded {len(tweets)} tweets from {path}')
+	if not os.path.exists(path) and os.path.isfile(f'{os.path.splitext(path)[0]}.pickle'):
+		path: str = f'{os.path.splitext(path)[0]}.pickle'
+	if os.path.isfile(path):
+		with open(path, 'rb') as file:
+			tweets: List[Tweet] = pickle.load(file)
+	else:
+		tweets: List[Tweet] = read_tweets(path, columns)
+	print(f'Loaded {len(tweets)} tweets from {path}')
 
-		return tweets
+	return tweets
 
 
-def save_model(model: Union[ComplementNB, DecisionTreeClassifier], path: str) -> None:
+def save_model(model: Union[ComplementNB, DecisionTreeClassifier, TfidfLinearClassifier], path: str) -> None:
 	"""
 	Save model to a pickle file.
 
 	Parameters
 	----------
-	model : Union[ComplementNB, DecisionTreeClassifier]
+	model : Union[ComplementNB, DecisionTreeClassifier, TfidfLinearClassifier]
 		The model to be saved
 	path : str
 	    The path to the pickle file
@@ -390,7 +377,7 @@ def save_model(model: Union[ComplementNB, DecisionTreeClassifier], path: str) ->
 		print(f'Saved model to {path}')
 
 
-def load_model(path: str) -> Union[ComplementNB, DecisionTreeClassifier]:
+def load_model(path: str) -> Union[ComplementNB, DecisionTreeClassifier, TfidfLinearClassifier]:
 	"""
 	Load a model from a pickle file.
 
@@ -401,11 +388,11 @@ def load_model(path: str) -> Union[ComplementNB, DecisionTreeClassifier]:
 
 	Returns
 	-------
-	Union[ComplementNB, DecisionTreeClassifier]
+	Union[ComplementNB, DecisionTreeClassifier, TfidfLinearClassifier]
 	    The model, loaded from the pickle file
 	"""
 	with open(path, 'rb') as file:
-		model: Union[ComplementNB, DecisionTreeClassifier] = pickle.load(file)
+		model: Union[ComplementNB, DecisionTreeClassifier, TfidfLinearClassifier] = pickle.load(file)
 		print(f'Loaded model from {path}')
 
 		return model
@@ -415,6 +402,9 @@ def preprocess_corpus(corpus: List[str]) -> List[str]:
 	"""
     Preprocess nlp corpus
 
+    Links, stop words, mentions, hashes and numbers are removed, and the texts are set to lowercase,
+    in a single pass per tweet (see TweetPreprocessor).
+
     Parameters
     ----------
     corpus : List[str]
@@ -425,34 +415,7 @@ def preprocess_corpus(corpus: List[str]) -> List[str]:
     final_corpus : List[str]
         list of tweet texts, but processed
     """
-	# Download the English stop words from the NLTK repository.
-	nltk.download('stopwords', quiet=True)
-	# Removing the links from the tweets (starting with https:// until a space)
-	corpus_no_url = [re.sub('(https://)\S*(\s|$)', '', line) for line in corpus]
-	# Removing stopwords from English language
-	stopWords = set(stopwords.words('english'))
-	corpus_no_stops_no_url = [" ".join([re.sub('\n', "", l) for l in line.split(" ") if l not in stopWords]) for line in
-	                          corpus_no_url]
-	# Removing @...
-	corpus_noAt_no_stops_no_url = [re.sub('(@)\S*(\s|$)', '', line) for line in corpus_no_stops_no_url]
-	# Remove #
-	corpus_noht_noAt_no_stops_no_url = [re.sub('#', '', line) for line in corpus_noAt_no_stops_no_url]
-	# Set lowercase
-	corpus_lowercase = [line.lower() for line in corpus_noht_noAt_no_stops_no_url]
-	# Remove numbers
-	corpus_no_numbers = [re.sub('[0-9]+', '', line) for line in corpus_lowercase]
-	final_corpus = corpus_no_numbers
-
-	# if debug_prints:
-	#     print("\n*** CORPUS BEFORE ***")
-	#     [print("\t* " + str(l)) for l in corpus[0:5]]
-	#     print()
-	#
-	#     print("\n\n*** CORPUS AFTER ***")
-	#     [print("\t* " + str(l)) for l in final_corpus[0:5]]
-	#     print()
-
-	return final_corpus
+	return TweetPreprocessor().transform(corpus)
 
 
 if __name__ == "__main__":
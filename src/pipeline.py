@@ -0,0 +1,398 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+import types
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import List, Dict, Tuple, Union, NamedTuple, Any, Callable, Iterable
+
+
+class Step(NamedTuple):
+	"""
+	A step of a pipeline: a function of the outputs of other steps.
+
+	Properties
+	----------
+	name : str
+		the name of the step
+	function : Callable[..., Any]
+		the module-level function, called with the outputs of the inputs (in order) and the parameters (by keyword)
+	inputs : Tuple[str, ...]
+		the names of the steps of which the outputs are the arguments of the function
+	params : Dict[str, Any]
+		the JSON-serializable keyword arguments of the function
+	files : Tuple[str, ...]
+		the paths to the files or directories that the function reads, a change of their size or modification time
+		invalidates the output
+	output_files : bool
+		True if the output is the path (or a list of paths) to files that the function writes, a missing file
+		invalidates the output
+	"""
+	name: str
+	function: Callable[..., Any]
+	inputs: Tuple[str, ...]
+	params: Dict[str, Any]
+	files: Tuple[str, ...]
+	output_files: bool
+
+
+class Pipeline:
+	"""
+	A DAG of steps with content-addressed outputs, cached on disk.
+
+	The output of a step is cached under a key, the hash of the source code of its function and of the modules of
+	the project that it uses, its parameters, the fingerprints of its files and the hashes of the outputs of
+	its inputs. A step only runs when its key is not
+	in the cache, so changing a step reruns the step and the steps that depend on it, as far as its output changed.
+	Steps of which the inputs are ready run in parallel, on a process pool.
+	"""
+
+	def __init__(self, directory: str = 'cache/pipeline'):
+		"""
+		Constructs a new Pipeline object.
+
+		Parameters
+		----------
+		directory : str
+			the directory of the cached outputs
+
+		Properties
+		----------
+		steps : Dict[str, Step]
+			the steps, by name, in the order they were added
+		"""
+		self.directory: str = directory
+		self.steps: Dict[str, Step] = {}
+
+	def add(self, name: str, function: Callable[..., Any], inputs: Iterable[str] = (),
+	        params: Union[Dict[str, Any], None] = None, files: Iterable[str] = (), output_files: bool = False) -> None:
+		"""
+		Adds a step.
+
+		Parameters
+		----------
+		name : str
+			the name of the step
+		function : Callable[..., Any]
+			the module-level function of the step (it has to be pickled to run on the process pool)
+		inputs : Iterable[str]
+			the names of the steps of which the outputs are the arguments of the function, already added
+		params : Union[Dict[str, Any], None]
+			the JSON-serializable keyword arguments of the function
+		files : Iterable[str]
+			the paths to the files or directories that the function reads
+		output_files : bool
+			True if the output is the path (or a list of paths) to files that the function writes,
+			so the step reruns when one of them is missing
+		"""
+		assert name not in self.steps, f'Invalid step: {name} already exists'
+		inputs: Tuple[str, ...] = tuple(inputs)
+		for input_name in inputs:
+			assert input_name in self.steps, f'Invalid input: {input_name} of {name} does not exist'
+
+		self.steps[name] = Step(name, function, inputs, params or {}, tuple(files), output_files)
+
+	def step(self, name: Union[str, None] = None, inputs: Iterable[str] = (), params: Union[Dict[str, Any], None] = None,
+	         files: Iterable[str] = (), output_files: bool = False) \
+			-> Callable[[Callable[..., Any]], Callable[..., Any]]:
+		"""
+		Decorates a function to add it as a step, see add.
+
+		Returns
+		-------
+		Callable[[Callable[..., Any]], Callable[..., Any]]
+			the decorator, that returns the function itself
+		"""
+
+		def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+			self.add(name or function.__name__, function, inputs, params, files, output_files)
+
+			return function
+
+		return decorator
+
+	def dependencies(self, targets: Iterable[str]) -> List[str]:
+		"""
+		Parameters
+		----------
+		targets : Iterable[str]
+			the names of steps
+
+		Returns
+		-------
+		List[str]
+			the names of the steps and all the steps they depend on, in the order they were added (a topological order)
+		"""
+		needed: set = set()
+		todo: List[str] = list(targets)
+		while todo:
+			name: str = todo.pop()
+			assert name in self.steps, f'Invalid step: {name} does not exist'
+			if name not in needed:
+				needed.add(name)
+				todo.extend(self.steps[name].inputs)
+
+		return [name for name in self.steps if name in needed]
+
+	def key(self, name: str, digests: Dict[str, str]) -> str:
+		"""
+		Parameters
+		----------
+		name : str
+			the name of a step
+		digests : Dict[str, str]
+			the hashes of the outputs of (at least) the inputs of the step
+
+		Returns
+		-------
+		str
+			the key of the output of the step
+		"""
+		step: Step = self.steps[name]
+		key: Dict[str, Any] = {
+			'name': step.name,
+			'source': inspect.getsource(step.function),
+			'modules': module_digests(step.function),
+			'params': step.params,
+			'files': [fingerprint(path) for path in step.files],
+			'inputs': [digests[input_name] for input_name in step.inputs],
+		}
+
+		return hashlib.sha256(json.dumps(key, sort_keys=True, default=repr).encode('utf-8')).hexdigest()
+
+	def run(self, targets: Union[Iterable[str], None] = None, force: Iterable[str] = (),
+	        max_workers: Union[int, None] = None) -> Dict[str, str]:
+		"""
+		Runs the steps that are needed for the targets and that are not cached.
+
+		Parameters
+		----------
+		targets : Union[Iterable[str], None]
+			the names of the steps to run, defaults to all steps
+		force : Iterable[str]
+			the names of the steps to run even if they are cached, e.g. steps that fetch new data
+		max_workers : Union[int, None]
+			the number of processes, defaults to the number of CPUs, 1 to run the steps one by one in this process
+
+		Returns
+		-------
+		Dict[str, str]
+			the key of the output of every step that was needed
+		"""
+		names: List[str] = self.dependencies(self.steps if targets is None else targets)
+		force: set = set(force)
+		for name in force:
+			assert name in self.steps, f'Invalid step: {name} does not exist'
+
+		index: Dict[str, Any] = self._read_index()
+		keys: Dict[str, str] = {}
+		digests: Dict[str, str] = {}
+		running: Dict[Future, Tuple[str, str]] = {}
+
+		executor: Union[ProcessPoolExecutor, None] = ProcessPoolExecutor(max_workers) if max_workers != 1 else None
+		try:
+			while len(digests) < len(names):
+				# start (or skip) the steps of which all inputs are ready
+				started: set = {name for name, _ in running.values()}
+				for name in names:
+					if name in digests or name in started \
+							or any(input_name not in digests for input_name in self.steps[name].inputs):
+						continue
+
+					key: str = self.key(name, digests)
+					keys[name] = key
+					if name not in force and key in index['outputs'] and os.path.exists(self._path(key)) \
+							and (not self.steps[name].output_files or self._output_files_exist(key)):
+						digests[name] = index['outputs'][key]
+						print(f'Skipped step {name} (cached)')
+						continue
+
+					print(f'Running step {name}')
+					step: Step = self.steps[name]
+					input_paths: List[str] = [self._path(keys[input_name]) for input_name in step.inputs]
+					arguments: Tuple[Any, ...] = (step.function, input_paths, step.params, self._path(key))
+					if executor is None:
+						digest, seconds = _run_step(*arguments)
+						self._finish(index, name, key, digest, seconds, digests)
+					else:
+						running[executor.submit(_run_step, *arguments)] = (name, key)
+
+				if running:
+					done, _ = wait(running, return_when=FIRST_COMPLETED)
+					for future in done:
+						name, key = running.pop(future)
+						digest, seconds = future.result()
+						self._finish(index, name, key, digest, seconds, digests)
+		finally:
+			if executor is not None:
+				# cancel the steps that did not start yet (shutdown(cancel_futures=True) needs Python 3.9)
+				for future in running:
+					future.cancel()
+				executor.shutdown()
+
+		return keys
+
+	def load(self, name: str) -> Any:
+		"""
+		Loads the output of the last run of a step.
+
+		Parameters
+		----------
+		name : str
+			the name of the step
+
+		Returns
+		-------
+		Any
+			the output of the step
+		"""
+		index: Dict[str, Any] = self._read_index()
+		assert name in index['latest'], f'Invalid step: {name} did not run yet'
+
+		with open(self._path(index['latest'][name]), 'rb') as file:
+			return pickle.load(file)
+
+	def _finish(self, index: Dict[str, Any], name: str, key: str, digest: str, seconds: float,
+	            digests: Dict[str, str]) -> None:
+		digests[name] = digest
+		index['outputs'][key] = digest
+		index['latest'][name] = key
+		self._write_index(index)
+
+		print(f'Ran step {name} in {seconds:.2f}s')
+
+	def _output_files_exist(self, key: str) -> bool:
+		with open(self._path(key), 'rb') as file:
+			output: Union[str, List[str]] = pickle.load(file)
+
+		return all(os.path.exists(path) for path in ([output] if isinstance(output, str) else output))
+
+	def _path(self, key: str) -> str:
+		return os.path.join(self.directory, f'{key}.pickle')
+
+	def _read_index(self) -> Dict[str, Any]:
+		path: str = os.path.join(self.directory, 'index.json')
+		if not os.path.exists(path):
+			return {'outputs': {}, 'latest': {}}
+
+		with open(path) as file:
+			return json.load(file)
+
+	def _write_index(self, index: Dict[str, Any]) -> None:
+		path: str = os.path.join(self.directory, 'index.json')
+		os.makedirs(self.directory, exist_ok=True)
+		with open(f'{path}.tmp', 'w') as file:
+			json.dump(index, file, indent=1, sort_keys=True)
+		os.replace(f'{path}.tmp', path)
+
+
+def fingerprint(path: str) -> List[Tuple[str, int, int]]:
+	"""
+	Parameters
+	----------
+	path : str
+		the path to a file or a directory
+
+	Returns
+	-------
+	List[Tuple[str, int, int]]
+		the relative path, size and modification time of the file or of every file in the directory,
+		empty if the path does not exist
+	"""
+	if os.path.isfile(path):
+		stat: os.stat_result = os.stat(path)
+		return [(os.path.basename(path), stat.st_size, stat.st_mtime_ns)]
+
+	files: List[Tuple[str, int, int]] = []
+	for directory, _, filenames in os.walk(path):
+		for filename in filenames:
+			stat: os.stat_result = os.stat(os.path.join(directory, filename))
+			files.append((os.path.relpath(os.path.join(directory, filename), path), stat.st_size, stat.st_mtime_ns))
+
+	return sorted(files)
+
+
+def module_digests(function: Callable[..., Any]) -> Dict[str, str]:
+	"""
+	Parameters
+	----------
+	function : Callable[..., Any]
+		a module-level function
+
+	Returns
+	-------
+	Dict[str, str]
+		the hash of the source file of every module of the project (next to the function's module) that the function
+		uses, directly or through other modules of the project, by module name
+	"""
+	directory: str = os.path.dirname(os.path.abspath(inspect.getfile(function)))
+	module_names: set = set()
+	visited: set = {id(function)}
+	# the names that the function (and its nested functions, lambdas and comprehensions) refers to
+	todo: List[Any] = [function.__globals__.get(name) for name in _code_names(function.__code__)]
+	while todo:
+		value: Any = todo.pop()
+		if id(value) in visited:
+			continue
+		visited.add(id(value))
+
+		module: Union[types.ModuleType, None] = value if inspect.ismodule(value) \
+			else sys.modules.get(getattr(value, '__module__', None) or '')
+		if module is None or os.path.dirname(os.path.abspath(getattr(module, '__file__', None) or '/')) != directory:
+			continue
+
+		if module.__name__ != function.__module__:
+			module_names.add(module.__name__)
+		if inspect.isfunction(value):
+			# a function only uses the names it refers to (and the function it decorates)
+			todo.extend(value.__globals__.get(name) for name in _code_names(value.__code__))
+			todo.append(getattr(value, '__wrapped__', None))
+		elif module.__name__ != function.__module__:
+			# a class or a module can use anything in its module
+			todo.extend(vars(module).values())
+
+	digests: Dict[str, str] = {}
+	for module_name in sorted(module_names):
+		with open(sys.modules[module_name].__file__, 'rb') as file:
+			digests[module_name] = hashlib.sha256(file.read()).hexdigest()
+
+	return digests
+
+
+def _code_names(code: types.CodeType) -> List[str]:
+	names: List[str] = list(code.co_names)
+	for constant in code.co_consts:
+		if isinstance(constant, types.CodeType):
+			names.extend(_code_names(constant))
+
+	return names
+
+
+def _run_step(function: Callable[..., Any], input_paths: List[str], params: Dict[str, Any], path: str) \
+		-> Tuple[str, float]:
+	"""
+	Runs a step, e.g. in a process of the pool, and saves its output.
+
+	Returns
+	-------
+	Tuple[str, float]
+		the hash of the output and the wall-clock time of the step
+	"""
+	start: float = time.perf_counter()
+
+	inputs: List[Any] = []
+	for input_path in input_paths:
+		with open(input_path, 'rb') as file:
+			inputs.append(pickle.load(file))
+
+	data: bytes = pickle.dumps(function(*inputs, **params), protocol=pickle.HIGHEST_PROTOCOL)
+
+	os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+	with open(f'{path}.tmp', 'wb') as file:
+		file.write(data)
+	os.replace(f'{path}.tmp', path)
+
+	return hashlib.sha256(data).hexdigest(), time.perf_counter() - start
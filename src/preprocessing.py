@@ -0,0 +1,114 @@
+import re
+from typing import List, Dict, FrozenSet, Iterable
+
+import nltk
+from nltk.corpus import stopwords
+from sklearn.base import BaseEstimator, TransformerMixin
+
+# links (starting with https:// until a space)
+_URL = re.compile(r'(https://)\S*(\s|$)')
+# mentions (starting with @ until a space)
+_MENTION = re.compile(r'(@)\S*(\s|$)')
+# numbers
+_NUMBER = re.compile(r'[0-9]+')
+
+# the stop words per language, loaded once per process
+_STOPWORDS: Dict[str, FrozenSet[str]] = {}
+
+
+def get_stopwords(language: str = 'english') -> FrozenSet[str]:
+	"""
+	Gets the stop words of a language, downloading them from the NLTK repository only if they are not available.
+
+	Parameters
+	----------
+	language : str
+		the language
+
+	Returns
+	-------
+	FrozenSet[str]
+		the stop words
+	"""
+	if language not in _STOPWORDS:
+		try:
+			words: List[str] = stopwords.words(language)
+		except LookupError:
+			nltk.download('stopwords', quiet=True)
+			words: List[str] = stopwords.words(language)
+		_STOPWORDS[language] = frozenset(words)
+
+	return _STOPWORDS[language]
+
+
+class TweetPreprocessor(BaseEstimator, TransformerMixin):
+	"""
+	Preprocesses tweet texts in a single pass per tweet, with precompiled patterns.
+
+	Links, stop words, mentions, hashes and numbers are removed, and the text is set to lowercase.
+	It can be used as a scikit-learn transformer, or as the preprocessor of a CountVectorizer
+	e.g. CountVectorizer(preprocessor=TweetPreprocessor()).
+	"""
+
+	def __init__(self, language: str = 'english'):
+		"""
+		Constructs a new TweetPreprocessor object.
+
+		Parameters
+		----------
+		language : str
+			the language of the stop words to remove
+		"""
+		self.language: str = language
+
+	def __call__(self, text: str) -> str:
+		"""
+		Preprocesses a single tweet text.
+
+		Parameters
+		----------
+		text : str
+			the tweet text
+
+		Returns
+		-------
+		str
+			the tweet text, but processed
+		"""
+		stop_words: FrozenSet[str] = get_stopwords(self.language)
+
+		# remove links
+		text = _URL.sub('', text)
+		# remove stop words (case-sensitive, before setting lowercase) and newlines
+		text = ' '.join([word.replace('\n', '') for word in text.split(' ') if word not in stop_words])
+		# remove mentions and hashes, set lowercase and remove numbers
+		return _NUMBER.sub('', _MENTION.sub('', text).replace('#', '').lower())
+
+	def fit(self, X: Iterable[str], y=None) -> 'TweetPreprocessor':
+		"""
+		Does nothing, the preprocessor is stateless.
+
+		Returns
+		-------
+		TweetPreprocessor
+			this preprocessor
+		"""
+		return self
+
+	def transform(self, X: Iterable[str]) -> List[str]:
+		"""
+		Preprocesses a corpus of tweet texts.
+
+		Parameters
+		----------
+		X : Iterable[str]
+			the tweet texts
+
+		Returns
+		-------
+		List[str]
+			the tweet texts, but processed
+		"""
+		get_stopwords(self.language)
+
+		return [self(text) for text in X]
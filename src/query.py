@@ -0,0 +1,493 @@
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Tuple, Union, Any, Callable, Iterable, Iterator, Sequence, NamedTuple
+
+from record import TweetRecord
+from tweet import Tweet
+
+
+class Predicate(NamedTuple):
+	"""
+	A condition on tweets.
+
+	Properties
+	----------
+	name : str
+		the name of the predicate
+	test : Callable[[Union[Tweet, TweetRecord]], bool]
+		the function that tests a tweet
+	selectivity : float
+		an estimate of the fraction of tweets that pass
+	"""
+	name: str
+	test: Callable[[Union[Tweet, TweetRecord]], bool]
+	selectivity: float
+
+
+# the number of tweets that are sampled to estimate the selectivity of the predicates
+SAMPLE_SIZE: int = 256
+
+
+class Query:
+	"""
+	A lazy, immutable query over tweets, e.g.
+	Query(tweets).hashtags_any(['#corona', '#covid19']).between(after, before).continent('Europe').group_by('country_code').
+
+	The filters only add predicates, nothing is evaluated until the query is iterated or executed.
+	All the predicates are then evaluated in a single pass over the tweets, the most selective ones first,
+	and a tweet is dropped as soon as it fails one of them.
+	"""
+
+	def __init__(self, tweets: Iterable[Union[Tweet, TweetRecord]], predicates: Tuple[Predicate, ...] = ()):
+		"""
+		Constructs a new Query object.
+
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the tweets, a sequence, or any iterable (that is only iterated once) to stream tweets
+		predicates : Tuple[Predicate, ...]
+			the predicates of the query
+		"""
+		self.tweets: Iterable[Union[Tweet, TweetRecord]] = tweets
+		self.predicates: Tuple[Predicate, ...] = predicates
+
+	def where(self, name: str, predicate: Callable[[Union[Tweet, TweetRecord]], bool],
+	          selectivity: float = 0.5) -> 'Query':
+		"""
+		Adds a predicate to the query.
+
+		Parameters
+		----------
+		name : str
+			the name of the predicate
+		predicate : Callable[[Union[Tweet, TweetRecord]], bool]
+			the function that tests a tweet
+		selectivity : float
+			an estimate of the fraction of tweets that pass, used if the tweets cannot be sampled
+
+		Returns
+		-------
+		Query
+			a new query, with the predicate
+		"""
+		return self._where(Predicate(name, predicate, selectivity))
+
+	def _where(self, predicate: Predicate) -> 'Query':
+		return Query(self.tweets, self.predicates + (predicate,))
+
+	# filters
+
+	def hashtag(self, hashtag: str) -> 'Query':
+		"""
+		Parameters
+		----------
+		hashtag : str
+			the hashtag on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets with the provided hashtag
+		"""
+		assert hashtag, 'Invalid hashtag: hashtag cannot be None or an empty string'
+
+		return self._where(Predicate(f'hashtag {hashtag}', lambda tweet: hashtag in tweet.hashtags, 0.05))
+
+	def hashtags_all(self, hashtags: Iterable[str]) -> 'Query':
+		"""
+		Parameters
+		----------
+		hashtags : Iterable[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets with all of the provided hashtags
+		"""
+		hashtags: frozenset = frozenset(hashtags)
+		assert hashtags and all(hashtags), 'Invalid hashtags: hashtags cannot be empty'
+
+		return self._where(Predicate(f'hashtags all {sorted(hashtags)}',
+		                             lambda tweet: hashtags.issubset(tweet.hashtags), 0.01))
+
+	def hashtags_any(self, hashtags: Iterable[str]) -> 'Query':
+		"""
+		Parameters
+		----------
+		hashtags : Iterable[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets with any of the provided hashtags
+		"""
+		hashtags: frozenset = frozenset(hashtags)
+		assert hashtags and all(hashtags), 'Invalid hashtags: hashtags cannot be empty'
+
+		return self._where(Predicate(f'hashtags any {sorted(hashtags)}',
+		                             lambda tweet: not hashtags.isdisjoint(tweet.hashtags), 0.1))
+
+	def hashtags_none(self, hashtags: Iterable[str]) -> 'Query':
+		"""
+		Parameters
+		----------
+		hashtags : Iterable[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets with none of the provided hashtags
+		"""
+		hashtags: frozenset = frozenset(hashtags)
+		assert hashtags and all(hashtags), 'Invalid hashtags: hashtags cannot be empty'
+
+		return self._where(Predicate(f'hashtags none {sorted(hashtags)}',
+		                             lambda tweet: hashtags.isdisjoint(tweet.hashtags), 0.9))
+
+	def before(self, before: datetime) -> 'Query':
+		"""
+		Parameters
+		----------
+		before : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted before the provided datetime
+		"""
+		return self._where(Predicate(f'before {before}', lambda tweet: tweet.datetime < before, 0.5))
+
+	def at(self, at: datetime) -> 'Query':
+		"""
+		Parameters
+		----------
+		at : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted at the provided datetime
+		"""
+		return self._where(Predicate(f'at {at}', lambda tweet: tweet.datetime == at, 0.001))
+
+	def after(self, after: datetime) -> 'Query':
+		"""
+		Parameters
+		----------
+		after : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted after the provided datetime
+		"""
+		return self._where(Predicate(f'after {after}', lambda tweet: tweet.datetime > after, 0.5))
+
+	def between(self, after: datetime, before: datetime) -> 'Query':
+		"""
+		Parameters
+		----------
+		after : datetime
+			the datetime on which to filter tweets
+		before : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted between the provided datetimes (inclusive)
+		"""
+		return self._where(Predicate(f'between {after} and {before}',
+		                             lambda tweet: after <= tweet.datetime <= before, 0.25))
+
+	def country_code(self, country_code: str) -> 'Query':
+		"""
+		Parameters
+		----------
+		country_code : str
+			the country code on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted from the country with the provided country code
+		"""
+		return self._where(Predicate(f'country code {country_code}',
+		                             lambda tweet: tweet.country_code == country_code, 0.1))
+
+	def country_codes(self, country_codes: Iterable[str]) -> 'Query':
+		"""
+		Parameters
+		----------
+		country_codes : Iterable[str]
+			the country codes on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted from the countries with the provided country codes
+		"""
+		country_codes: frozenset = frozenset(country_codes)
+
+		return self._where(Predicate(f'country codes {sorted(country_codes)}',
+		                             lambda tweet: tweet.country_code in country_codes, 0.2))
+
+	def continent(self, continent: str) -> 'Query':
+		"""
+		Parameters
+		----------
+		continent : str
+			the continent on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted from the provided continent
+		"""
+		return self._where(Predicate(f'continent {continent}', lambda tweet: tweet.continent == continent, 0.2))
+
+	def continents(self, continents: Iterable[str]) -> 'Query':
+		"""
+		Parameters
+		----------
+		continents : Iterable[str]
+			the continents on which to filter tweets
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets tweeted from the provided continents
+		"""
+		continents: frozenset = frozenset(continents)
+
+		return self._where(Predicate(f'continents {sorted(continents)}', lambda tweet: tweet.continent in continents,
+		                             0.4))
+
+	def denier(self, denier: Union[bool, None]) -> 'Query':
+		"""
+		Parameters
+		----------
+		denier : Union[bool, None]
+			the type on which to filter tweets (True = denier, False = acceptor, and None = unknown)
+
+		Returns
+		-------
+		Query
+			a new query, that only keeps the tweets of the provided type
+		"""
+		if denier is None:
+			return self._where(Predicate(f'denier {denier}', lambda tweet: tweet.denier is None, 0.5))
+
+		# compared by value, the labels can be NumPy booleans
+		denier: bool = bool(denier)
+
+		return self._where(Predicate(f'denier {denier}', lambda tweet: tweet.denier == denier, 0.5))
+
+	# execution
+
+	def plan(self) -> List[Predicate]:
+		"""
+		Orders the predicates by selectivity, the predicates that drop the most tweets first.
+
+		If the tweets are a sequence, the selectivity of every predicate is measured on a sample of the tweets,
+		else the estimates of the predicates are used.
+
+		Returns
+		-------
+		List[Predicate]
+			the predicates, in the order in which they are evaluated
+		"""
+		if len(self.predicates) <= 1:
+			return list(self.predicates)
+
+		if isinstance(self.tweets, Sequence) and len(self.tweets) > 0:
+			step: int = max(1, len(self.tweets) // SAMPLE_SIZE)
+			sample: Sequence[Union[Tweet, TweetRecord]] = self.tweets[::step]
+			predicates: List[Predicate] = [
+				predicate._replace(selectivity=sum(1 for _ in filter(_compile([predicate]), sample)) / len(sample))
+				for predicate in self.predicates]
+		else:
+			predicates: List[Predicate] = list(self.predicates)
+
+		return sorted(predicates, key=lambda predicate: predicate.selectivity)
+
+	def __iter__(self) -> Iterator[Union[Tweet, TweetRecord]]:
+		"""
+		Streams the tweets that pass all the predicates, in a single pass.
+
+		Returns
+		-------
+		Iterator[Union[Tweet, TweetRecord]]
+			the matching tweets, in the order of the tweets
+		"""
+		if not self.predicates:
+			return iter(self.tweets)
+
+		return filter(_compile(self.plan()), self.tweets)
+
+	def to_list(self) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the matching tweets
+		"""
+		return list(self)
+
+	def count(self) -> int:
+		"""
+		Returns
+		-------
+		int
+			the number of matching tweets
+		"""
+		return sum(1 for _ in self)
+
+	def first(self, n: int) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Parameters
+		----------
+		n : int
+			the maximum number of tweets
+
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the first n matching tweets, the scan stops as soon as they are found
+		"""
+		return list(islice(self, n))
+
+	def sort_by_date(self, descending: bool = False) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Parameters
+		----------
+		descending : bool
+			True to sort in descending order, else in ascending order
+
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the matching tweets, sorted by datetime
+		"""
+		return sorted(self, key=lambda tweet: tweet.datetime, reverse=descending)
+
+	def group_by(self, key: Union[str, Callable[[Union[Tweet, TweetRecord]], Any]]) -> defaultdict:
+		"""
+		Groups the matching tweets in the same pass as the filtering.
+
+		Parameters
+		----------
+		key : Union[str, Callable[[Union[Tweet, TweetRecord]], Any]]
+			the name of the property to group by (e.g. 'country_code', 'continent' or 'denier'), or a function
+
+		Returns
+		-------
+		defaultdict
+			a dictionary of keys to lists of tweets, tweets without a key (None) are left out
+		"""
+		key: Callable[[Union[Tweet, TweetRecord]], Any] = _getter(key)
+		groups: defaultdict = defaultdict(list)
+		for tweet in self:
+			value: Any = key(tweet)
+			if value is not None:
+				groups[value].append(tweet)
+
+		return groups
+
+	def count_by(self, key: Union[str, Callable[[Union[Tweet, TweetRecord]], Any]]) -> defaultdict:
+		"""
+		Counts the matching tweets per group in the same pass as the filtering.
+
+		Parameters
+		----------
+		key : Union[str, Callable[[Union[Tweet, TweetRecord]], Any]]
+			the name of the property to group by, or a function
+
+		Returns
+		-------
+		defaultdict
+			a dictionary of keys to numbers of tweets, tweets without a key (None) are left out
+		"""
+		key: Callable[[Union[Tweet, TweetRecord]], Any] = _getter(key)
+		counts: defaultdict = defaultdict(int)
+		for tweet in self:
+			value: Any = key(tweet)
+			if value is not None:
+				counts[value] += 1
+
+		return counts
+
+
+def execute_many(queries: Dict[str, Query]) -> Dict[str, List[Union[Tweet, TweetRecord]]]:
+	"""
+	Executes queries over the same tweets in a single, shared pass.
+
+	Parameters
+	----------
+	queries : Dict[str, Query]
+		the queries by name, all over the same sequence of tweets
+
+	Returns
+	-------
+	Dict[str, List[Union[Tweet, TweetRecord]]]
+		the matching tweets of every query, by name
+	"""
+	sources: List[int] = list(set(id(query.tweets) for query in queries.values()))
+	assert len(sources) <= 1, 'Invalid queries: queries must be over the same tweets'
+	if not queries:
+		return {}
+
+	plans: List[Tuple[List[Union[Tweet, TweetRecord]], Callable[[Union[Tweet, TweetRecord]], bool]]] = [
+		([], _compile(query.plan())) for query in queries.values()]
+	for tweet in next(iter(queries.values())).tweets:
+		for results, test in plans:
+			if test(tweet):
+				results.append(tweet)
+
+	return {name: results for name, (results, _) in zip(queries, plans)}
+
+
+def _compile(predicates: List[Predicate]) -> Callable[[Union[Tweet, TweetRecord]], bool]:
+	"""
+	Fuses predicates into a single function, that evaluates them in order and stops at the first failure.
+
+	Parameters
+	----------
+	predicates : List[Predicate]
+		the predicates, in the order in which they are evaluated
+
+	Returns
+	-------
+	Callable[[Union[Tweet, TweetRecord]], bool]
+		the function that tests a tweet
+	"""
+	if not predicates:
+		return lambda tweet: True
+	if len(predicates) == 1:
+		return predicates[0].test
+
+	tests: Tuple[Callable[[Union[Tweet, TweetRecord]], bool], ...] = tuple(predicate.test for predicate in predicates)
+
+	def test(tweet: Union[Tweet, TweetRecord]) -> bool:
+		for predicate_test in tests:
+			if not predicate_test(tweet):
+				return False
+
+		return True
+
+	return test
+
+
+def _getter(key: Union[str, Callable[[Union[Tweet, TweetRecord]], Any]]) -> Callable[[Union[Tweet, TweetRecord]], Any]:
+	if callable(key):
+		return key
+
+	return lambda tweet: getattr(tweet, key)
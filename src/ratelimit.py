@@ -0,0 +1,54 @@
+import threading
+import time
+from typing import Union
+
+
+class TokenBucket:
+	"""
+	A thread-safe token bucket rate limiter.
+
+	Tokens are added at a constant rate up to the capacity of the bucket, and every call takes one token.
+	"""
+
+	def __init__(self, rate: float, capacity: Union[int, None] = None):
+		"""
+		Constructs a new, full token bucket.
+
+		Parameters
+		----------
+		rate : float
+			the number of tokens added per second
+		capacity : Union[int, None]
+			the maximum number of tokens in the bucket (i.e. the maximum burst), defaults to one second worth of tokens
+		"""
+		assert rate > 0, 'Invalid rate: rate must be positive'
+
+		self.rate: float = rate
+		self.capacity: float = float(capacity if capacity is not None else max(1, int(rate)))
+
+		self._tokens: float = self.capacity
+		self._updated_at: float = time.monotonic()
+		self._lock: threading.Lock = threading.Lock()
+
+	def acquire(self, tokens: float = 1) -> None:
+		"""
+		Takes tokens from the bucket, blocking until enough tokens are available.
+
+		Parameters
+		----------
+		tokens : float
+			the number of tokens to take
+		"""
+		while True:
+			with self._lock:
+				now: float = time.monotonic()
+				self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+				self._updated_at = now
+
+				if self._tokens >= tokens:
+					self._tokens -= tokens
+					return
+
+				wait: float = (tokens - self._tokens) / self.rate
+
+			time.sleep(wait)
@@ -0,0 +1,203 @@
+import sys
+from datetime import datetime
+from typing import List, Tuple, Union, Dict, Any, Iterable
+
+from geopy import GoogleV3
+from tweepy.models import Status
+from tweet import Tweet
+
+
+def _intern(string: Union[str, None]) -> Union[str, None]:
+	return sys.intern(string) if string is not None else None
+
+
+class TweetRecord:
+	"""
+	A memory-compact, read-only view of a classified tweet.
+
+	Unlike a Tweet, a record has no per-instance dictionary and no tweepy's Status object,
+	and its country code, continent name and hashtags are interned, so they are shared between records.
+	Records can be used wherever the filters in filters.py expect a Tweet.
+	"""
+
+	__slots__ = ('text', 'name', 'username', 'hashtags', 'datetime', 'country_code', 'continent', 'denier', 'keywords')
+
+	def __init__(self, text: str, name: str, username: str, hashtags: Iterable[str], datetime: datetime,
+	             country_code: Union[str, None], continent: Union[str, None], denier: Union[bool, None],
+	             keywords: Iterable[str] = ()):
+		"""
+		Constructs a new TweetRecord object.
+
+		Parameters
+		----------
+		text : str
+			the text
+		name : str
+			the full name of the author
+		username : str
+			the username of the author, with the '@' upfront
+		hashtags : Iterable[str]
+			the hashtags, with the '#' upfront
+		datetime : datetime
+			the date and time at which the tweet was created
+		country_code : Union[str, None]
+			the country code of the country where the tweet was created (2 capital letters e.g. BE for Belgium)
+		continent : Union[str, None]
+			the name of the continent where the tweet was created
+		denier : Union[bool, None]
+			the type of the tweet (True = denier, False = acceptor, and None = unknown)
+		keywords : Iterable[str]
+			the search keywords that matched the tweet
+		"""
+		self.text: str = text
+		self.name: str = name
+		self.username: str = username
+		self.hashtags: Tuple[str, ...] = tuple(sys.intern(hashtag) for hashtag in hashtags)
+		self.datetime: datetime = datetime
+		self.country_code: Union[str, None] = _intern(country_code)
+		self.continent: Union[str, None] = _intern(continent)
+		self.denier: Union[bool, None] = None if denier is None else bool(denier)
+		self.keywords: Tuple[str, ...] = tuple(sys.intern(keyword) for keyword in keywords)
+
+	@classmethod
+	def from_tweet(cls, tweet: Tweet) -> 'TweetRecord':
+		"""
+		Constructs a new TweetRecord object from a Tweet object.
+
+		Parameters
+		----------
+		tweet : Tweet
+			the tweet
+
+		Returns
+		-------
+		TweetRecord
+			the record
+		"""
+		return cls(tweet.text, tweet.name, tweet.username, tweet.hashtags, tweet.datetime, tweet.country_code,
+		           tweet.continent, tweet.denier, tweet.keywords)
+
+	@classmethod
+	def from_status(cls, status: Status, google_api: Union[GoogleV3, None] = None) -> 'TweetRecord':
+		"""
+		Constructs a new TweetRecord object from a tweepy's Status object, resolving its location first.
+
+		Parameters
+		----------
+		status : Status
+			the status
+		google_api : Union[GoogleV3, None]
+			the Google geolocation API, None to only resolve the location offline
+
+		Returns
+		-------
+		TweetRecord
+			the record
+		"""
+		tweet: Tweet = Tweet(status)
+		tweet.add_location(google_api)
+
+		return cls.from_tweet(tweet)
+
+	def __str__(self) -> str:
+		"""
+		Pretty-prints a TweetRecord object.
+
+		Returns
+		-------
+		str
+			pretty-print of the tweet
+		"""
+		return f'{self.text}\n \
+				Author:\t{self.name}\n \
+		        Username:\t{self.username}\n \
+		        Country code:\t{self.country_code}\n \
+		        Continent:\t{self.continent}\n \
+		        Denier?\t{self.denier}'
+
+	def has_hashtag(self, hashtag: str) -> bool:
+		"""
+		Checks if this tweet contains the provided hashtag.
+
+		Parameters
+		----------
+		hashtag : str
+			the provided hashtag
+
+		Returns
+		-------
+		bool
+			True if the provided hashtag is in the tweet's hashtags, else False
+		"""
+		return hashtag in self.hashtags
+
+	def has_hashtags(self, hashtags: List[str]) -> bool:
+		"""
+		Checks if this tweet contains all the provided hashtags.
+
+		Parameters
+		----------
+		hashtags : List[str]
+			the provided hashtags
+
+		Returns
+		-------
+		bool
+			True if all provided hashtags are in the tweet's hashtags, else False
+		"""
+		return all(hashtag in self.hashtags for hashtag in hashtags)
+
+	def is_denier(self) -> bool:
+		return self.denier is True
+
+	def is_acceptor(self) -> bool:
+		return self.denier is False
+
+	def is_unknown(self) -> bool:
+		return self.denier is None
+
+	def has_location(self) -> bool:
+		return self.has_country_code() and self.has_continent_name()
+
+	def has_country_code(self) -> bool:
+		return self.country_code is not None and len(self.country_code) == 2
+
+	def has_continent_name(self) -> bool:
+		return self.continent is not None and self.continent != ''
+
+	def to_dict(self) -> Dict[str, Any]:
+		"""
+		Used to create a pandas dataframe from a list of TweetRecords.
+
+		Returns
+		-------
+		dictionary
+			dictionary to create pandas dataframe
+		"""
+		return {
+			'name': self.name,
+			'username': self.username,
+			'hashtags': list(self.hashtags),
+			'datetime': self.datetime,
+			'country_code': self.country_code,
+			'continent': self.continent,
+			'denier': self.denier,
+			'text': self.text
+		}
+
+
+def compact_tweets(tweets: Iterable[Tweet]) -> List[TweetRecord]:
+	"""
+	Converts tweets to memory-compact records.
+
+	Parameters
+	----------
+	tweets : Iterable[Tweet]
+		the tweets
+
+	Returns
+	-------
+	List[TweetRecord]
+		the records
+	"""
+	return [TweetRecord.from_tweet(tweet) for tweet in tweets]
@@ -0,0 +1,301 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple, Union, Iterable
+
+import numpy as np
+from aggregation import TweetCounts
+from record import TweetRecord
+from tweet import Tweet
+from visualization import CONTINENTS
+
+# the index of every type of tweet on the denier axis of a cube
+DENIER_INDEX: Dict[Union[bool, None], int] = {False: 0, True: 1, None: 2}
+
+
+class RollupCube:
+	"""
+	Precomputed numbers of located tweets per country, type (acceptor, denier or unknown) and time bucket,
+	as a dense int64 NumPy array.
+
+	The continent of every country is stored once per country, so continent series are rollups of the country axis.
+	Windows and coarser buckets (e.g. days instead of hours) are slices and sums of the array,
+	so ratio maps and per-bucket map series never touch the tweets.
+	"""
+
+	def __init__(self, counts: np.ndarray, country_codes: np.ndarray, continents: np.ndarray, start: datetime,
+	             bucket_size: timedelta):
+		"""
+		Constructs a new RollupCube object.
+
+		Parameters
+		----------
+		counts : np.ndarray
+			the number of tweets per country, type and bucket
+		country_codes : np.ndarray
+			the country code of every country
+		continents : np.ndarray
+			the continent of every country
+		start : datetime
+			the start of the first bucket
+		bucket_size : timedelta
+			the size of the buckets
+		"""
+		self.counts: np.ndarray = counts
+		self.country_codes: np.ndarray = country_codes
+		self.continents: np.ndarray = continents
+		self.start: datetime = start
+		self.bucket_size: timedelta = bucket_size
+
+	@classmethod
+	def from_counts(cls, tweet_counts: TweetCounts) -> 'RollupCube':
+		"""
+		Builds a cube from the counts of tweets, with the same bucket size.
+
+		Parameters
+		----------
+		tweet_counts : TweetCounts
+			the counts of tweets
+
+		Returns
+		-------
+		RollupCube
+			the cube
+		"""
+		countries: Dict[str, str] = {}
+		for country_code, continent, _, _ in tweet_counts.counts:
+			countries.setdefault(country_code, continent)
+		country_codes: List[str] = sorted(countries)
+		country_index: Dict[str, int] = {country_code: i for i, country_code in enumerate(country_codes)}
+
+		buckets: List[datetime] = [bucket for _, _, _, bucket in tweet_counts.counts]
+		start: datetime = min(buckets) if buckets else datetime(1970, 1, 1)
+		num_buckets: int = (max(buckets) - start) // tweet_counts.bucket_size + 1 if buckets else 0
+
+		counts: np.ndarray = np.zeros((len(country_codes), len(DENIER_INDEX), num_buckets), dtype=np.int64)
+		for (country_code, _, denier, bucket), count in tweet_counts.counts.items():
+			counts[country_index[country_code], DENIER_INDEX[denier], (bucket - start) // tweet_counts.bucket_size] += count
+
+		return cls(counts, np.array(country_codes, dtype=str),
+		           np.array([countries[country_code] for country_code in country_codes], dtype=str),
+		           start, tweet_counts.bucket_size)
+
+	@classmethod
+	def from_tweets(cls, tweets: Iterable[Union[Tweet, TweetRecord]],
+	                bucket_size: timedelta = timedelta(hours=1)) -> 'RollupCube':
+		"""
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the classified tweets
+		bucket_size : timedelta
+			the size of the buckets
+
+		Returns
+		-------
+		RollupCube
+			the cube
+		"""
+		return cls.from_counts(TweetCounts(tweets, bucket_size))
+
+	def save(self, path: str) -> None:
+		"""
+		Saves the cube as a compressed NumPy archive.
+
+		Parameters
+		----------
+		path : str
+			the path to the archive
+		"""
+		np.savez_compressed(path, counts=self.counts, country_codes=self.country_codes, continents=self.continents,
+		                    start=np.datetime64(self.start, 'us'), bucket_size=np.timedelta64(self.bucket_size, 'us'))
+
+		print(f'Saved rollup cube to {path}')
+
+	@classmethod
+	def load(cls, path: str) -> 'RollupCube':
+		"""
+		Loads a cube from a NumPy archive.
+
+		Parameters
+		----------
+		path : str
+			the path to the archive
+
+		Returns
+		-------
+		RollupCube
+			the cube
+		"""
+		with np.load(path) as archive:
+			return cls(archive['counts'], archive['country_codes'], archive['continents'],
+			           archive['start'].item(), archive['bucket_size'].item())
+
+	@property
+	def buckets(self) -> List[datetime]:
+		"""
+		Returns
+		-------
+		List[datetime]
+			the start of every bucket
+		"""
+		return [self.start + i * self.bucket_size for i in range(self.counts.shape[2])]
+
+	def window(self, after: Union[datetime, None] = None, before: Union[datetime, None] = None) -> 'RollupCube':
+		"""
+		Slices the buckets of a time window, without copying the counts.
+
+		Parameters
+		----------
+		after : Union[datetime, None]
+			the start of the window (inclusive), rounded down to the start of its bucket, None for no start
+		before : Union[datetime, None]
+			the end of the window (exclusive), rounded up to the end of its bucket, None for no end
+
+		Returns
+		-------
+		RollupCube
+			the cube of the window
+		"""
+		num_buckets: int = self.counts.shape[2]
+		first: int = min(max((after - self.start) // self.bucket_size, 0), num_buckets) if after is not None else 0
+		last: int = min(max(-((self.start - before) // self.bucket_size), first), num_buckets) \
+			if before is not None else num_buckets
+
+		return RollupCube(self.counts[:, :, first:last], self.country_codes, self.continents,
+		                  self.start + first * self.bucket_size, self.bucket_size)
+
+	def resample(self, bucket_size: timedelta) -> 'RollupCube':
+		"""
+		Sums the counts into coarser buckets, e.g. days instead of hours.
+
+		Parameters
+		----------
+		bucket_size : timedelta
+			the new size of the buckets, a multiple of the current size
+
+		Returns
+		-------
+		RollupCube
+			the cube with the coarser buckets, aligned like the buckets of TweetCounts
+		"""
+		assert bucket_size % self.bucket_size == timedelta(0), 'Invalid bucket size: not a multiple of the current size'
+
+		start: datetime = TweetCounts(bucket_size=bucket_size).bucket(self.start)
+		offset: int = (self.start - start) // self.bucket_size
+		factor: int = bucket_size // self.bucket_size
+
+		# pad the counts to whole new buckets, and sum every group of factor buckets
+		num_buckets: int = self.counts.shape[2]
+		num_new_buckets: int = -(-(offset + num_buckets) // factor)
+		padded: np.ndarray = np.zeros(self.counts.shape[:2] + (num_new_buckets * factor,), dtype=self.counts.dtype)
+		padded[:, :, offset:offset + num_buckets] = self.counts
+
+		return RollupCube(padded.reshape(self.counts.shape[:2] + (num_new_buckets, factor)).sum(axis=3),
+		                  self.country_codes, self.continents, start, bucket_size)
+
+	# series
+
+	def _totals(self, deniers: Union[Iterable[Union[bool, None]], None]) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		deniers : Union[Iterable[Union[bool, None]], None]
+			the types of tweets to count, None for all types
+
+		Returns
+		-------
+		np.ndarray
+			the number of tweets per country and bucket
+		"""
+		if deniers is None:
+			return self.counts.sum(axis=1)
+
+		return self.counts[:, [DENIER_INDEX[denier] for denier in deniers], :].sum(axis=1)
+
+	def _per_country(self, values: np.ndarray, mask: Union[np.ndarray, None] = None) -> defaultdict:
+		series: defaultdict = defaultdict(lambda: defaultdict(int))
+		for country_code, value in zip(self.country_codes[mask] if mask is not None else self.country_codes,
+		                               values[mask] if mask is not None else values):
+			series['World'][country_code.lower()] = value.item()
+
+		return series
+
+	def num_tweets_per_country(self, deniers: Union[Iterable[Union[bool, None]], None] = None,
+	                           relative: bool = False) -> defaultdict:
+		"""
+		Parameters
+		----------
+		deniers : Union[Iterable[Union[bool, None]], None]
+			the types of tweets to count, None for all types
+		relative : bool
+			True for the percentage of all the counted tweets of the cube, else the absolute number
+
+		Returns
+		-------
+		defaultdict
+			the series of the number of tweets per country (lower case country code), for the world
+		"""
+		totals: np.ndarray = self._totals(deniers).sum(axis=1)
+		if relative:
+			totals: np.ndarray = totals / max(totals.sum(), 1) * 100
+
+		return self._per_country(totals, totals > 0)
+
+	def num_tweets_per_continent(self, deniers: Union[Iterable[Union[bool, None]], None] = None) -> defaultdict:
+		"""
+		Parameters
+		----------
+		deniers : Union[Iterable[Union[bool, None]], None]
+			the types of tweets to count, None for all types
+
+		Returns
+		-------
+		defaultdict
+			the series of the number of tweets per continent (as named on the supranational world map), for the world
+		"""
+		totals: np.ndarray = self._totals(deniers).sum(axis=1)
+
+		series: defaultdict = defaultdict(lambda: defaultdict(int))
+		for continent, total in zip(self.continents, totals.tolist()):
+			if total > 0:
+				series['World'][CONTINENTS[continent]] += total
+
+		return series
+
+	def denier_ratio_per_country(self, min_tweets: int = 1) -> defaultdict:
+		"""
+		Parameters
+		----------
+		min_tweets : int
+			the minimum number of classified tweets of a country to compute its ratio
+
+		Returns
+		-------
+		defaultdict
+			the series of the percentage of deniers among the classified tweets per country (lower case country code),
+			for the world
+		"""
+		counts: np.ndarray = self.counts.sum(axis=2)
+		classified: np.ndarray = counts[:, DENIER_INDEX[False]] + counts[:, DENIER_INDEX[True]]
+		mask: np.ndarray = classified >= max(min_tweets, 1)
+		ratios: np.ndarray = np.divide(counts[:, DENIER_INDEX[True]] * 100, classified,
+		                               out=np.zeros(len(classified)), where=mask)
+
+		return self._per_country(ratios, mask)
+
+	def denier_ratio_per_bucket(self, min_tweets: int = 1) -> List[Tuple[datetime, defaultdict]]:
+		"""
+		Computes the denier ratio map series of every bucket, e.g. the frames of an animated map per day.
+
+		Parameters
+		----------
+		min_tweets : int
+			the minimum number of classified tweets of a country in a bucket to compute its ratio
+
+		Returns
+		-------
+		List[Tuple[datetime, defaultdict]]
+			the start of every bucket and its series of the percentage of deniers per country
+		"""
+		return [(bucket, self.window(bucket, bucket + self.bucket_size).denier_ratio_per_country(min_tweets))
+		        for bucket in self.buckets]
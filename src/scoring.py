@@ -0,0 +1,328 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Tuple, Union, Any, Deque
+
+import numpy as np
+from bundle import InferenceBundle, load_bundle
+from record import TweetRecord
+from tweet import Tweet
+
+
+class ScoringService:
+	"""
+	A long-running denier classifier that groups incoming tweets into micro-batches.
+
+	Tweets are queued, and a worker thread classifies them in batches of at most max_batch_size tweets,
+	waiting at most max_latency seconds after the first tweet of a batch arrived.
+	"""
+
+	def __init__(self, bundle: InferenceBundle, max_batch_size: int = 1024, max_latency: float = 0.05,
+	             num_latencies: int = 100000):
+		"""
+		Constructs a new ScoringService object, call start to start scoring.
+
+		Parameters
+		----------
+		bundle : InferenceBundle
+			the inference bundle
+		max_batch_size : int
+			the maximum number of tweets per batch
+		max_latency : float
+			the maximum time (in seconds) that a tweet waits for its batch to fill up
+		num_latencies : int
+			the number of recent latencies that are kept for statistics
+
+		Properties
+		----------
+		num_scored : int
+			the number of scored tweets
+		num_batches : int
+			the number of scored batches
+		"""
+		self.bundle: InferenceBundle = bundle
+		self.max_batch_size: int = max_batch_size
+		self.max_latency: float = max_latency
+		self.num_scored: int = 0
+		self.num_batches: int = 0
+
+		self._queue: queue.Queue = queue.Queue()
+		self._latencies: Deque[float] = deque(maxlen=num_latencies)
+		self._stopped: threading.Event = threading.Event()
+		self._worker: Union[threading.Thread, None] = None
+		# guards the check that the service is running and the queueing of a tweet, against stop
+		self._lock: threading.Lock = threading.Lock()
+
+	def start(self) -> 'ScoringService':
+		"""
+		Starts the worker thread.
+
+		Returns
+		-------
+		ScoringService
+			this service
+		"""
+		self._stopped.clear()
+		self._worker = threading.Thread(target=self._run, name='scoring', daemon=True)
+		self._worker.start()
+
+		return self
+
+	def stop(self) -> None:
+		"""
+		Stops the worker thread, after the queued tweets are scored.
+
+		Tweets that are submitted after stop fail immediately.
+		"""
+		with self._lock:
+			self._stopped.set()
+		if self._worker is not None:
+			self._worker.join()
+			self._worker = None
+
+		# tweets that were queued while the worker was exiting
+		while True:
+			try:
+				_, future, _ = self._queue.get_nowait()
+			except queue.Empty:
+				break
+			if future.set_running_or_notify_cancel():
+				future.set_exception(RuntimeError('Scoring service stopped'))
+
+	def __enter__(self) -> 'ScoringService':
+		return self.start()
+
+	def __exit__(self, *args) -> None:
+		self.stop()
+
+	def submit(self, tweet: Union[Tweet, TweetRecord, str]) -> Future:
+		"""
+		Queues a tweet to be scored.
+
+		Parameters
+		----------
+		tweet : Union[Tweet, TweetRecord, str]
+			the tweet, whose denier property is set when it is scored, or only its text
+
+		Returns
+		-------
+		Future
+			the future result: True if the tweet is classified as a denier, else False,
+			or a RuntimeError if the service is not running
+		"""
+		future: Future = Future()
+		with self._lock:
+			if self._worker is None or self._stopped.is_set():
+				future.set_exception(RuntimeError('Scoring service is not running'))
+			else:
+				self._queue.put((tweet, future, time.perf_counter()))
+
+		return future
+
+	def score(self, tweets: List[Union[Tweet, TweetRecord, str]], timeout: Union[float, None] = None) -> List[bool]:
+		"""
+		Queues tweets to be scored and waits for the results.
+
+		Parameters
+		----------
+		tweets : List[Union[Tweet, TweetRecord, str]]
+			the tweets, or only their texts
+		timeout : Union[float, None]
+			the maximum time (in seconds) to wait for all the results, None to wait until they are scored
+
+		Returns
+		-------
+		List[bool]
+			True for every tweet that is classified as a denier, else False
+
+		Raises
+		------
+		concurrent.futures.TimeoutError
+			if the results are not ready within the timeout
+		RuntimeError
+			if the service is not running
+		"""
+		futures: List[Future] = [self.submit(tweet) for tweet in tweets]
+		deadline: Union[float, None] = time.perf_counter() + timeout if timeout is not None else None
+
+		return [future.result(max(0.0, deadline - time.perf_counter()) if deadline is not None else None)
+		        for future in futures]
+
+	def latency_percentile(self, percentile: float) -> float:
+		"""
+		Computes a percentile of the latencies of recently scored tweets, from submit until the result was set.
+
+		Parameters
+		----------
+		percentile : float
+			the percentile, e.g. 99
+
+		Returns
+		-------
+		float
+			the latency (in seconds), or NaN if no tweets were scored yet
+		"""
+		latencies: List[float] = list(self._latencies)
+
+		return float(np.percentile(latencies, percentile)) if latencies else float('nan')
+
+	def stats(self) -> Dict[str, Any]:
+		"""
+		Returns
+		-------
+		Dict[str, Any]
+			the number of scored tweets and batches, the number of queued tweets and the p50 and p99 latencies
+		"""
+		return {
+			'num_scored': self.num_scored,
+			'num_batches': self.num_batches,
+			'num_queued': self._queue.qsize(),
+			'latency_p50': self.latency_percentile(50),
+			'latency_p99': self.latency_percentile(99),
+		}
+
+	def _next_batch(self) -> List[Tuple[Any, Future, float]]:
+		"""
+		Waits for the next micro-batch.
+
+		Returns
+		-------
+		List[Tuple[Any, Future, float]]
+			the queued tweets, their futures and the times at which they were queued
+		"""
+		try:
+			batch: List[Tuple[Any, Future, float]] = [self._queue.get(timeout=0.1)]
+		except queue.Empty:
+			return []
+
+		# wait for more tweets until the batch is full, or the first tweet waited long enough
+		deadline: float = batch[0][2] + self.max_latency
+		while len(batch) < self.max_batch_size:
+			try:
+				batch.append(self._queue.get(timeout=max(0.0, deadline - time.perf_counter())))
+			except queue.Empty:
+				break
+
+		return batch
+
+	def _run(self) -> None:
+		while not (self._stopped.is_set() and self._queue.empty()):
+			# the tweets of which the caller cancelled the future are not scored
+			batch: List[Tuple[Any, Future, float]] = [(tweet, future, queued_at)
+			                                           for tweet, future, queued_at in self._next_batch()
+			                                           if future.set_running_or_notify_cancel()]
+			if not batch:
+				continue
+
+			try:
+				labels: np.ndarray = self.bundle.predict(
+					[tweet if isinstance(tweet, str) else tweet.text for tweet, _, _ in batch])
+			except Exception as error:
+				for _, future, _ in batch:
+					if not future.done():
+						future.set_exception(error)
+				continue
+
+			now: float = time.perf_counter()
+			for (tweet, future, queued_at), label in zip(batch, labels.tolist()):
+				label: bool = bool(label)
+				if not isinstance(tweet, str):
+					tweet.denier = label
+				if not future.done():
+					future.set_result(label)
+				self._latencies.append(now - queued_at)
+
+			self.num_scored += len(batch)
+			self.num_batches += 1
+
+
+def serve(service: ScoringService, host: str = '127.0.0.1', port: int = 8080, timeout: float = 30.0) \
+		-> ThreadingHTTPServer:
+	"""
+	Creates a local HTTP endpoint for a scoring service, call serve_forever on the result to start serving.
+
+	POST /predict with a JSON body {"texts": [...]} answers {"deniers": [...]}, or {"error": ...} with status 400
+	for an invalid body and 500 if the tweets could not be scored, GET /stats answers the statistics of the service.
+
+	Parameters
+	----------
+	service : ScoringService
+		the started scoring service
+	host : str
+		the host to listen on
+	port : int
+		the port to listen on
+	timeout : float
+		the maximum time (in seconds) to wait for the results of a request
+
+	Returns
+	-------
+	ThreadingHTTPServer
+		the HTTP server
+	"""
+
+	class Handler(BaseHTTPRequestHandler):
+		def _respond(self, status: int, body: Dict[str, Any]) -> None:
+			data: bytes = json.dumps(body).encode('utf-8')
+			self.send_response(status)
+			self.send_header('Content-Type', 'application/json')
+			self.send_header('Content-Length', str(len(data)))
+			self.end_headers()
+			self.wfile.write(data)
+
+		def do_GET(self) -> None:
+			if self.path == '/stats':
+				self._respond(200, service.stats())
+			else:
+				self._respond(404, {'error': 'not found'})
+
+		def do_POST(self) -> None:
+			if self.path != '/predict':
+				self._respond(404, {'error': 'not found'})
+				return
+
+			try:
+				texts: List[str] = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))['texts']
+			except (ValueError, KeyError, TypeError):
+				texts: None = None
+			if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+				self._respond(400, {'error': 'expected a JSON body {"texts": [...]} with a list of strings'})
+				return
+
+			try:
+				deniers: List[bool] = service.score(texts, timeout)
+			except Exception as error:
+				self._respond(500, {'error': f'{type(error).__name__}: {error}'})
+				return
+
+			self._respond(200, {'deniers': deniers})
+
+		def log_message(self, format: str, *args) -> None:
+			# do not log every request
+			pass
+
+	return ThreadingHTTPServer((host, port), Handler)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Serve a denier classifier over HTTP.')
+	parser.add_argument('--bundle', default='models/best_model.bundle', help='the path to the inference bundle')
+	parser.add_argument('--host', default='127.0.0.1', help='the host to listen on')
+	parser.add_argument('--port', type=int, default=8080, help='the port to listen on')
+	parser.add_argument('--max-batch-size', type=int, default=1024, help='the maximum number of tweets per batch')
+	parser.add_argument('--max-latency', type=float, default=0.05, help='the maximum batching delay in seconds')
+	parser.add_argument('--timeout', type=float, default=30.0, help='the maximum time to answer a request in seconds')
+	args = parser.parse_args()
+
+	with ScoringService(load_bundle(args.bundle), args.max_batch_size, args.max_latency) as scoring_service:
+		server: ThreadingHTTPServer = serve(scoring_service, args.host, args.port, args.timeout)
+		print(f'Serving {args.bundle} on http://{args.host}:{args.port}')
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			server.server_close()
@@ -0,0 +1,136 @@
+import time
+from typing import List, Dict, Tuple, Union, NamedTuple, Sequence
+
+import numpy as np
+from joblib import Parallel, delayed
+from linear import TfidfLinearClassifier
+from scipy.sparse import csr_matrix
+from sklearn.base import BaseEstimator, clone
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import ComplementNB
+from sklearn.tree import DecisionTreeClassifier
+
+
+def default_candidates() -> Dict[str, BaseEstimator]:
+	"""
+	Creates the candidate classifiers of the demo.
+
+	Returns
+	-------
+	Dict[str, BaseEstimator]
+		the unfitted candidate classifiers, by name
+	"""
+	return {
+		'Naive Bayes': ComplementNB(),
+		'Decision Tree': DecisionTreeClassifier(random_state=0),
+		'Logistic Regression': TfidfLinearClassifier(),
+	}
+
+
+class SelectionResult(NamedTuple):
+	"""
+	The result of a model selection run.
+
+	Properties
+	----------
+	name : str
+		the name of the best candidate
+	model : BaseEstimator
+		the best candidate, trained on all of the data
+	scores : Dict[str, np.ndarray]
+		the accuracy of every candidate on every fold
+	seconds : float
+		the wall-clock time of the run
+	models : Dict[str, BaseEstimator]
+		every candidate, trained on all of the data, by name
+	"""
+	name: str
+	model: BaseEstimator
+	scores: Dict[str, np.ndarray]
+	seconds: float
+	models: Dict[str, BaseEstimator]
+
+	def __str__(self) -> str:
+		return '\n'.join(f'{name} accuracy:\t{scores.mean() * 100:>3.2f}% (± {scores.std() * 100:.2f}%)'
+		                 for name, scores in self.scores.items()) + \
+		       f'\nBest model:\t{self.name} (selected in {self.seconds:.2f}s)'
+
+
+def select_model(X: csr_matrix, labels: Sequence[bool], candidates: Union[Dict[str, BaseEstimator], None] = None,
+                 n_splits: int = 5, n_jobs: Union[int, None] = None, random_state: Union[int, None] = 0,
+                 sample_weight: Union[Sequence[float], None] = None) -> SelectionResult:
+	"""
+	Selects the best classifier with stratified k-fold cross-validation, and trains every candidate on all of the data.
+
+	The corpus is vectorized only once, by the caller, and every fold reuses rows of the same document-term matrix,
+	so the vocabulary also contains the terms of the validation fold (they are never counted during training).
+	Every (candidate, fold) pair is trained and validated in parallel, together with the candidates on all of the data.
+
+	Parameters
+	----------
+	X : csr_matrix
+		the document-term matrix of the whole corpus
+	labels : Sequence[bool]
+		the labels of the corpus (True = denier, False = acceptor)
+	candidates : Union[Dict[str, BaseEstimator], None]
+		the unfitted candidate classifiers by name, defaults to default_candidates()
+	n_splits : int
+		the number of folds, at most the number of tweets of the smallest class
+	n_jobs : Union[int, None]
+		the number of parallel jobs, defaults to the number of CPUs
+	random_state : Union[int, None]
+		the seed of the fold shuffle, None for a different shuffle every run
+	sample_weight : Union[Sequence[float], None]
+		the weight of every tweet when training, e.g. the size of its cluster of near-duplicates
+		(see NearDuplicates.keep('keep_one_with_weight')), None to weigh all tweets the same
+
+	Returns
+	-------
+	SelectionResult
+		the best candidate and every candidate, trained on all of the data, and the accuracy of every candidate
+		on every fold
+	"""
+	start: float = time.perf_counter()
+
+	if candidates is None:
+		candidates: Dict[str, BaseEstimator] = default_candidates()
+	X: csr_matrix = csr_matrix(X)
+	y: np.ndarray = np.asarray(labels, dtype=bool)
+	weights: Union[np.ndarray, None] = np.asarray(sample_weight, dtype=np.float64) if sample_weight is not None \
+		else None
+	assert weights is None or len(weights) == len(y), 'Invalid sample_weight: one weight per tweet is needed'
+	# every fold needs a tweet of every class
+	n_splits: int = min(n_splits, int(np.unique(y, return_counts=True)[1].min()) if len(y) > 0 else 0)
+	assert n_splits >= 2, 'Invalid labels: every class needs at least 2 tweets'
+
+	folds: List[Tuple[np.ndarray, np.ndarray]] = list(
+		StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(np.zeros(len(y)), y))
+	jobs: List[Tuple[str, int]] = [(name, fold) for name in candidates for fold in range(len(folds))]
+
+	results: List[Union[float, BaseEstimator]] = Parallel(n_jobs=n_jobs or -1)(
+		[delayed(_fit_score)(candidates[name], X, y, weights, *folds[fold]) for name, fold in jobs]
+		+ [delayed(_fit)(candidate, X, y, weights) for candidate in candidates.values()])
+	accuracies: List[float] = results[:len(jobs)]
+	models: Dict[str, BaseEstimator] = dict(zip(candidates, results[len(jobs):]))
+
+	scores: Dict[str, np.ndarray] = {name: np.zeros(len(folds)) for name in candidates}
+	for (name, fold), accuracy in zip(jobs, accuracies):
+		scores[name][fold] = accuracy
+
+	# the first candidate wins ties, like the demo preferred Naive Bayes
+	best_name: str = max(candidates, key=lambda name: scores[name].mean())
+
+	return SelectionResult(best_name, models[best_name], scores, time.perf_counter() - start, models)
+
+
+def _fit(candidate: BaseEstimator, X: csr_matrix, y: np.ndarray, weights: Union[np.ndarray, None]) -> BaseEstimator:
+	fit_params: Dict[str, np.ndarray] = {'sample_weight': weights} if weights is not None else {}
+
+	return clone(candidate).fit(X, y, **fit_params)
+
+
+def _fit_score(candidate: BaseEstimator, X: csr_matrix, y: np.ndarray, weights: Union[np.ndarray, None],
+               train: np.ndarray, test: np.ndarray) -> float:
+	fit_params: Dict[str, np.ndarray] = {'sample_weight': weights[train]} if weights is not None else {}
+
+	return clone(candidate).fit(X[train], y[train], **fit_params).score(X[test], y[test])
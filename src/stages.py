@@ -0,0 +1,236 @@
+import argparse
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple, Union
+
+from aggregation import TweetCounts
+from bundle import save_bundle
+from deduplication import find_near_duplicates
+from geocoding import GeocodingCache
+from geopy import GoogleV3
+from ingest import TweetLog, stream_new_tweets
+from linear import TfidfLinearClassifier
+from locations import GeocodingStats, add_locations
+from main import connect_to_twitter_api, load_tweets, read_google_token, read_twitter_tokens, save_model, save_tweets
+from pipeline import Pipeline
+from preprocessing import TweetPreprocessor
+from record import TweetRecord, compact_tweets
+from rollup import RollupCube
+from scipy.sparse import csr_matrix
+from selection import SelectionResult, select_model
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import ComplementNB
+from sklearn.tree import DecisionTreeClassifier
+from table import TweetTable
+from tweet import Tweet
+from vectorization import fit_transform_parallel, preprocess_parallel, transform_parallel
+from visualization import RenderSpec, render, render_all
+
+# the stages of the demo as a DAG, every step is cached, so only the changed steps (and what depends on them) rerun
+pipeline: Pipeline = Pipeline('cache/pipeline')
+# the steps already run in parallel on the pipeline's process pool, so they do not start (nested) pools of their own
+N_JOBS: int = 1
+
+
+######################
+# 1. GET NEW DATASET #
+######################
+# the tweets are new on every fetch, so this step only reruns when forced: python stages.py --force new_dataset
+# (set resume to True to resume an interrupted run instead of starting a new run)
+@pipeline.step(params={'keywords': {'covid': 100, 'corona': 100, 'coronahoax': 100}, 'log_path': 'tweets/new_dataset.log',
+                       'resume': False},
+               files=['tokens/twitter_tokens.txt'])
+def new_dataset(keywords: Dict[str, int], log_path: str, resume: bool) -> List[Tweet]:
+	twitter_api = connect_to_twitter_api(*read_twitter_tokens('tokens/twitter_tokens.txt'))
+	num_new_tweets: int = sum(1 for _ in stream_new_tweets(twitter_api, keywords, log_path, resume=resume))
+	print(f'Got {num_new_tweets} new tweets in this run')
+	log: TweetLog = TweetLog(log_path)
+
+	return list(log.read(start=log.run_start))
+
+
+####################
+# 2. ADD LOCATIONS #
+####################
+@pipeline.step(inputs=['new_dataset'], files=['tokens/google_token.txt'])
+def located_dataset(tweets: List[Tweet]) -> List[Tweet]:
+	google_api: GoogleV3 = GoogleV3(api_key=read_google_token('tokens/google_token.txt'))
+	Tweet.geocoding_cache = GeocodingCache('cache/geocoding.sqlite')
+	geocoding_stats: GeocodingStats = add_locations(tweets, google_api, max_workers=8, rate_limit=40.0)
+	print(f'Geocoding: {geocoding_stats}')
+	for tweet in tweets:
+		tweet.detach_status()
+	save_tweets(tweets, 'tweets/new_dataset.tweets')
+
+	return tweets
+
+
+########################
+# 3. TRAIN CLASSIFIERS #
+########################
+# the vocabulary is passed on instead of the fitted vectorizer, of which the pickle differs between processes
+# (so the steps that depend on it would always rerun)
+@pipeline.step(files=['tweets/train_dataset.tweets'])
+def train_features() -> Tuple[csr_matrix, List[bool], Dict[str, int]]:
+	train_dataset: List[Tweet] = load_tweets('tweets/train_dataset.tweets', columns=['text', 'denier'])
+	X: List[str] = preprocess_parallel([tweet.text for tweet in train_dataset], n_jobs=N_JOBS)
+	labels: List[bool] = [tweet.denier for tweet in train_dataset]
+	# collapse near-duplicate tweets (copy-pasted tweets and spam), so they do not bias the classifiers
+	rows, _ = find_near_duplicates(X, n_jobs=N_JOBS).keep('collapse')
+	X: List[str] = [X[i] for i in rows]
+	labels: List[bool] = [labels[i] for i in rows]
+	vectorizer: CountVectorizer = CountVectorizer()
+
+	X: csr_matrix = fit_transform_parallel(vectorizer, X, n_jobs=N_JOBS)
+
+	return X, labels, vectorizer.vocabulary_
+
+
+# the candidates are independent branches, that are cross-validated in parallel
+@pipeline.step(inputs=['train_features'])
+def naive_bayes(features: Tuple[csr_matrix, List[bool], Dict[str, int]]) -> SelectionResult:
+	X, labels, _ = features
+
+	return select_model(X, labels, {'Naive Bayes': ComplementNB()}, n_jobs=N_JOBS)
+
+
+@pipeline.step(inputs=['train_features'])
+def decision_tree(features: Tuple[csr_matrix, List[bool], Dict[str, int]]) -> SelectionResult:
+	X, labels, _ = features
+
+	return select_model(X, labels, {'Decision Tree': DecisionTreeClassifier(random_state=0)}, n_jobs=N_JOBS)
+
+
+@pipeline.step(inputs=['train_features'])
+def logistic_regression(features: Tuple[csr_matrix, List[bool], Dict[str, int]]) -> SelectionResult:
+	X, labels, _ = features
+
+	return select_model(X, labels, {'Logistic Regression': TfidfLinearClassifier()}, n_jobs=N_JOBS)
+
+
+@pipeline.step(inputs=['train_features', 'naive_bayes', 'decision_tree', 'logistic_regression'])
+def best_model(features: Tuple[csr_matrix, List[bool], Dict[str, int]],
+               *candidates: SelectionResult) -> SelectionResult:
+	_, _, vocabulary = features
+	# the first candidate wins ties, like in select_model
+	best: SelectionResult = max(candidates, key=lambda candidate: candidate.scores[candidate.name].mean())
+	selection: SelectionResult = SelectionResult(best.name, best.model,
+	                                             {name: scores for candidate in candidates
+	                                              for name, scores in candidate.scores.items()},
+	                                             sum(candidate.seconds for candidate in candidates),
+	                                             {name: model for candidate in candidates
+	                                              for name, model in candidate.models.items()})
+	print(selection)
+	for name, model in selection.models.items():
+		save_model(model, f'models/{name.lower().replace(" ", "_")}.pickle')
+	save_model(best.model, 'models/best_model.pickle')
+	save_bundle('models/best_model.bundle', best.model, CountVectorizer(vocabulary=vocabulary).fit([]),
+	            TweetPreprocessor())
+
+	return selection
+
+
+#######################
+# 4. MAKE PREDICTIONS #
+#######################
+# the preprocessed texts are passed on with the classified tweets, so they are not preprocessed again
+@pipeline.step(inputs=['train_features', 'best_model'], files=['tweets/test_dataset.tweets'])
+def predictions(features: Tuple[csr_matrix, List[bool], Dict[str, int]], selection: SelectionResult) \
+		-> Tuple[List[TweetRecord], List[str]]:
+	_, _, vocabulary = features
+	test_dataset: List[Tweet] = load_tweets('tweets/test_dataset.tweets')
+	X: List[str] = preprocess_parallel([tweet.text for tweet in test_dataset], n_jobs=N_JOBS)
+	y = selection.model.predict(transform_parallel(CountVectorizer(vocabulary=vocabulary), X, n_jobs=N_JOBS))
+	for tweet, label in zip(test_dataset, y):
+		tweet.denier = label
+
+	return compact_tweets(test_dataset), X
+
+
+@pipeline.step(inputs=['predictions'])
+def tweet_counts(classified: Tuple[List[TweetRecord], List[str]]) -> TweetCounts:
+	test_dataset, X = classified
+	# count every cluster of near-duplicate tweets only once
+	rows, _ = find_near_duplicates(X, n_jobs=N_JOBS).keep('collapse')
+
+	return TweetCounts([test_dataset[i] for i in rows])
+
+
+##########################
+# 5. FILTER, SORT, GROUP #
+##########################
+@pipeline.step(inputs=['predictions'])
+def filtered(classified: Tuple[List[TweetRecord], List[str]]) -> Dict[str, Union[TweetTable, Dict[str, TweetTable]]]:
+	test_dataset, _ = classified
+	table: TweetTable = TweetTable(test_dataset)
+
+	return {
+		'filtered_by_hashtag': table.filter_by_hashtag('#coronahoax'),
+		'filtered_by_hashtags_all': table.filter_by_hashtags_all(['#corona', '#coronahoax']),
+		'filtered_by_hashtags_any': table.filter_by_hashtags_any(['#corona', '#coronahoax', '#coronavirus', '#covid19']),
+		'filtered_before': table.filter_before(datetime(2020, 4, 19, 18, 58, 46)),
+		'filtered_at': table.filter_at(datetime(2020, 4, 19, 18, 58, 46)),
+		'filtered_after': table.filter_after(datetime(2020, 4, 19, 18, 58, 46)),
+		'filtered_between': table.filter_between(datetime(2020, 4, 19, 18, 0, 0), datetime(2020, 4, 19, 19, 0, 0)),
+		'filtered_by_country_code': table.filter_by_country_code('US'),
+		'filtered_by_country_codes': table.filter_by_country_codes(['US', 'GB']),
+		'filtered_by_continent': table.filter_by_continent('Europe'),
+		'filtered_by_continents': table.filter_by_continents(['Europe', 'North America']),
+		'sorted_by_date_ascending': table.sort_by_date_ascending(),
+		'sorted_by_date_descending': table.sort_by_date_descending(),
+		'grouped_by_country_code': table.group_by_country_code(),
+		'grouped_by_continent': table.group_by_continent(),
+	}
+
+
+################
+# 6. VISUALIZE #
+################
+# every map is an independent branch, that is rendered in parallel with the other maps,
+# and rendered again when its SVG file was removed
+def counts_map(counts: TweetCounts, title: str, series: str, filename: str, per_continent: bool) -> str:
+	return render(RenderSpec(title, getattr(counts, series)(), filename, per_continent), 'images')
+
+
+pipeline.add('map_per_country_per_continent', counts_map, ['tweet_counts'],
+             {'title': 'Absolute number of tweets per country and per continent',
+              'series': 'num_tweets_per_country_per_continent',
+              'filename': 'num_tweets_per_country_per_continent_absolute', 'per_continent': False}, output_files=True)
+pipeline.add('map_per_country', counts_map, ['tweet_counts'],
+             {'title': 'Absolute number of tweets per country', 'series': 'num_tweets_per_country',
+              'filename': 'num_tweets_per_country_absolute', 'per_continent': False}, output_files=True)
+pipeline.add('map_per_continent', counts_map, ['tweet_counts'],
+             {'title': 'Absolute number of tweets per continent', 'series': 'num_tweets_per_continent',
+              'filename': 'num_tweets_per_continent_absolute', 'per_continent': True}, output_files=True)
+
+
+@pipeline.step(inputs=['tweet_counts'])
+def rollup_cube(counts: TweetCounts) -> RollupCube:
+	return RollupCube.from_counts(counts).resample(timedelta(days=1))
+
+
+@pipeline.step(inputs=['rollup_cube'], output_files=True)
+def map_denier_ratio(cube: RollupCube) -> str:
+	return render(RenderSpec('Percentage of deniers per country', cube.denier_ratio_per_country(),
+	                         'denier_ratio_per_country'), 'images')
+
+
+@pipeline.step(inputs=['rollup_cube'], output_files=True)
+def maps_denier_ratio_per_day(cube: RollupCube) -> List[str]:
+	return render_all([RenderSpec(f'Percentage of deniers per country on {day:%Y-%m-%d}', series,
+	                              f'denier_ratio_per_country_{day:%Y%m%d}')
+	                   for day, series in cube.denier_ratio_per_bucket()], 'images', cache_path=None, max_workers=N_JOBS)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Run the stages of the demo, skipping the stages that are cached.')
+	parser.add_argument('targets', nargs='*', help='the steps to run (and the steps they depend on), defaults to all')
+	parser.add_argument('--force', nargs='+', default=[], help='the steps to rerun even if they are cached')
+	parser.add_argument('--jobs', type=int, default=None, help='the number of steps that run in parallel')
+	parser.add_argument('--list', action='store_true', help='list the steps and their inputs, without running them')
+	args = parser.parse_args()
+
+	if args.list:
+		for step in pipeline.steps.values():
+			print(f'{step.name}: {", ".join(step.inputs) or "-"}')
+	else:
+		pipeline.run(args.targets or None, args.force, args.jobs)
@@ -0,0 +1,197 @@
+import json
+import os
+from datetime import datetime
+from typing import List, Dict, Union, Any, Iterable
+
+import numpy as np
+
+from tweet import Tweet
+
+# the version of the storage format
+STORE_VERSION: int = 1
+
+# the stored columns and their types
+STRING_COLUMNS: List[str] = ['text', 'name', 'username', 'country_code', 'continent', 'place_country_code',
+                             'author_location']
+LIST_COLUMNS: List[str] = ['hashtags', 'keywords']
+COLUMNS: List[str] = ['id'] + STRING_COLUMNS + LIST_COLUMNS + ['datetime', 'denier']
+
+
+def write_tweets(tweets: List[Tweet], path: str) -> None:
+	"""
+	Writes tweets to a columnar store, a directory with one NumPy file per column (buffer).
+
+	Only the fields of the tweets are stored, not the tweepy's Status objects.
+	String columns are stored as a UTF-8 byte buffer with offsets and a validity mask,
+	list columns as per-tweet offsets into a string column.
+
+	Parameters
+	----------
+	tweets : List[Tweet]
+		the tweets
+	path : str
+		the path to the store's directory
+	"""
+	os.makedirs(path, exist_ok=True)
+
+	for column in STRING_COLUMNS:
+		_write_strings(path, column, [getattr(tweet, column) for tweet in tweets])
+
+	for column in LIST_COLUMNS:
+		lists: List[List[str]] = [getattr(tweet, column) for tweet in tweets]
+		np.save(os.path.join(path, f'{column}.offsets.npy'), _offsets([len(items) for items in lists]))
+		_write_strings(path, f'{column}.items', [item for items in lists for item in items])
+
+	np.save(os.path.join(path, 'id.npy'), np.array(
+		[-1 if tweet.id is None else tweet.id for tweet in tweets], dtype=np.int64))
+	np.save(os.path.join(path, 'datetime.npy'), np.array([tweet.datetime for tweet in tweets], dtype='datetime64[us]'))
+	np.save(os.path.join(path, 'denier.npy'), np.array(
+		[-1 if tweet.denier is None else int(tweet.denier) for tweet in tweets], dtype=np.int8))
+
+	with open(os.path.join(path, 'meta.json'), 'w') as file:
+		json.dump({'version': STORE_VERSION, 'num_tweets': len(tweets), 'columns': COLUMNS}, file)
+
+
+def read_columns(path: str, columns: Union[Iterable[str], None] = None, start: int = 0,
+                 stop: Union[int, None] = None) -> Dict[str, Any]:
+	"""
+	Reads columns from a columnar store, the files are memory-mapped so only the requested columns are read.
+
+	Parameters
+	----------
+	path : str
+		the path to the store's directory
+	columns : Union[Iterable[str], None]
+		the columns to read, defaults to all columns
+	start : int
+		the index of the first tweet to read
+	stop : Union[int, None]
+		the index after the last tweet to read, defaults to the number of tweets
+
+	Returns
+	-------
+	Dict[str, Any]
+		lists of strings for string columns, lists of lists of strings for list columns, an int64 array (-1 = unknown)
+		for the id column, a datetime64 array for the datetime column and an int8 array (-1 = unknown) for the denier
+		column
+	"""
+	meta: Dict[str, Any] = _read_meta(path)
+	stop: int = meta['num_tweets'] if stop is None else min(stop, meta['num_tweets'])
+	start: int = min(start, stop)
+
+	result: Dict[str, Any] = {}
+	for column in (COLUMNS if columns is None else columns):
+		if column in COLUMNS and column not in meta['columns']:
+			# a column that was added after the store was written
+			result[column] = _default_column(column, stop - start)
+		elif column in STRING_COLUMNS:
+			result[column] = _read_strings(path, column, start, stop)
+		elif column in LIST_COLUMNS:
+			offsets: np.ndarray = np.load(os.path.join(path, f'{column}.offsets.npy'), mmap_mode='r')[start:stop + 1]
+			items: List[str] = _read_strings(path, f'{column}.items', int(offsets[0]), int(offsets[-1]))
+			offsets: List[int] = (offsets - offsets[0]).tolist()
+			result[column] = [items[offsets[i]:offsets[i + 1]] for i in range(stop - start)]
+		elif column in ('id', 'datetime', 'denier'):
+			result[column] = np.array(np.load(os.path.join(path, f'{column}.npy'), mmap_mode='r')[start:stop])
+		else:
+			raise ValueError(f'Invalid column: {column}')
+
+	return result
+
+
+def read_tweets(path: str, columns: Union[Iterable[str], None] = None, start: int = 0,
+                stop: Union[int, None] = None) -> List[Tweet]:
+	"""
+	Reads tweets from a columnar store.
+
+	Parameters
+	----------
+	path : str
+		the path to the store's directory
+	columns : Union[Iterable[str], None]
+		the columns to read, defaults to all columns (the other properties of the tweets are set to None)
+	start : int
+		the index of the first tweet to read
+	stop : Union[int, None]
+		the index after the last tweet to read, defaults to the number of tweets
+
+	Returns
+	-------
+	List[Tweet]
+		the tweets, without tweepy's Status objects
+	"""
+	data: Dict[str, Any] = read_columns(path, columns, start, stop)
+	if 'id' in data:
+		data['id'] = [None if id == -1 else id for id in data['id'].tolist()]
+	if 'datetime' in data:
+		data['datetime'] = data['datetime'].astype(datetime).tolist()
+	if 'denier' in data:
+		data['denier'] = [None if denier == -1 else bool(denier) for denier in data['denier'].tolist()]
+
+	num_tweets: int = len(next(iter(data.values()))) if data else 0
+	return [Tweet.from_dict({column: values[i] for column, values in data.items()}) for i in range(num_tweets)]
+
+
+def count_tweets(path: str) -> int:
+	"""
+	Counts the tweets in a columnar store, without reading them.
+
+	Parameters
+	----------
+	path : str
+		the path to the store's directory
+
+	Returns
+	-------
+	int
+		the number of tweets
+	"""
+	return _read_meta(path)['num_tweets']
+
+
+def _read_meta(path: str) -> Dict[str, Any]:
+	with open(os.path.join(path, 'meta.json')) as file:
+		meta: Dict[str, Any] = json.load(file)
+
+	if meta['version'] != STORE_VERSION:
+		raise ValueError(f'Unsupported store version: {meta["version"]}')
+
+	return meta
+
+
+def _default_column(column: str, num_tweets: int) -> Any:
+	if column in STRING_COLUMNS:
+		return [None] * num_tweets
+	if column in LIST_COLUMNS:
+		return [[] for _ in range(num_tweets)]
+	if column == 'datetime':
+		return np.full(num_tweets, np.datetime64('NaT'), dtype='datetime64[us]')
+
+	return np.full(num_tweets, -1, dtype=np.int64 if column == 'id' else np.int8)
+
+
+def _offsets(lengths: List[int]) -> np.ndarray:
+	offsets: np.ndarray = np.zeros(len(lengths) + 1, dtype=np.int64)
+	np.cumsum(lengths, out=offsets[1:])
+
+	return offsets
+
+
+def _write_strings(path: str, column: str, strings: List[Union[str, None]]) -> None:
+	encoded: List[bytes] = [b'' if string is None else string.encode('utf-8') for string in strings]
+	np.save(os.path.join(path, f'{column}.data.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+	np.save(os.path.join(path, f'{column}.offsets.npy'), _offsets([len(string) for string in encoded]))
+	np.save(os.path.join(path, f'{column}.valid.npy'), np.array([string is not None for string in strings], dtype=bool))
+
+
+def _read_strings(path: str, column: str, start: int, stop: int) -> List[Union[str, None]]:
+	offsets: List[int] = np.load(os.path.join(path, f'{column}.offsets.npy'), mmap_mode='r')[start:stop + 1].tolist()
+	valid: List[bool] = np.load(os.path.join(path, f'{column}.valid.npy'), mmap_mode='r')[start:stop].tolist()
+	if stop <= start:
+		return []
+
+	data: bytes = np.load(os.path.join(path, f'{column}.data.npy'), mmap_mode='r')[offsets[0]:offsets[-1]].tobytes()
+	first: int = offsets[0]
+
+	return [data[offsets[i] - first:offsets[i + 1] - first].decode('utf-8') if valid[i] else None
+	        for i in range(stop - start)]
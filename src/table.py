@@ -0,0 +1,508 @@
+from datetime import datetime
+from typing import List, Dict, Tuple, Union, Iterable, Iterator, Sequence
+
+import numpy as np
+from instrumentation import instrument
+from record import TweetRecord
+from scipy.sparse import csc_matrix, csr_matrix
+from tweet import Tweet
+
+
+class TweetTable:
+	"""
+	An in-memory, columnar view of a list of tweets, that filters, sorts and groups them with vectorized NumPy operations.
+
+	The datetimes are a datetime64 column (NaT = None), the country codes and continents are categorical codes
+	(-1 = None) into sorted category arrays, the denier column is an int8 column (1 = denier, 0 = acceptor and -1 = None)
+	and the hashtags are a boolean CSR matrix of tweets by hashtags.
+	Filtering, sorting and grouping return new tables, that share the tweets and the categories with this table.
+	"""
+
+	def __init__(self, tweets: Sequence[Union[Tweet, TweetRecord]]):
+		"""
+		Constructs a new TweetTable object.
+
+		Parameters
+		----------
+		tweets : Sequence[Union[Tweet, TweetRecord]]
+			the tweets
+
+		Properties
+		----------
+		rows : np.ndarray
+			the index of every row in the tweets
+		datetime : np.ndarray
+			the date and time of every tweet, as datetime64[us]
+		country_codes : np.ndarray
+			the categorical code of the country code of every tweet
+		country_categories : np.ndarray
+			the country codes, sorted
+		continent_codes : np.ndarray
+			the categorical code of the continent of every tweet
+		continent_categories : np.ndarray
+			the continents, sorted
+		denier : np.ndarray
+			the type of every tweet, as int8
+		hashtag_categories : np.ndarray
+			the hashtags, sorted
+		"""
+		self._tweets: Sequence[Union[Tweet, TweetRecord]] = tweets
+		self.rows: np.ndarray = np.arange(len(tweets), dtype=np.int64)
+
+		self.datetime: np.ndarray = np.array([tweet.datetime for tweet in tweets], dtype='datetime64[us]')
+		self.country_codes, self.country_categories = _categorical([tweet.country_code for tweet in tweets])
+		self.continent_codes, self.continent_categories = _categorical([tweet.continent for tweet in tweets])
+		self.denier: np.ndarray = np.array([-1 if tweet.denier is None else int(tweet.denier) for tweet in tweets],
+		                                   dtype=np.int8)
+
+		# every distinct hashtag of a tweet once, so counting the hashtags of a row counts distinct hashtags
+		hashtag_sets: List[List[str]] = [sorted(set(tweet.hashtags)) for tweet in tweets]
+		self.hashtag_categories: np.ndarray = np.array(
+			sorted(set(hashtag for hashtags in hashtag_sets for hashtag in hashtags)), dtype=object)
+		hashtag_index: Dict[str, int] = {hashtag: i for i, hashtag in enumerate(self.hashtag_categories.tolist())}
+		indptr: np.ndarray = np.zeros(len(tweets) + 1, dtype=np.int64)
+		np.cumsum([len(hashtags) for hashtags in hashtag_sets], out=indptr[1:])
+		indices: np.ndarray = np.array([hashtag_index[hashtag] for hashtags in hashtag_sets for hashtag in hashtags],
+		                               dtype=np.int32)
+		# the hashtags of all the tweets, shared by every table that is selected from this table
+		self._hashtags: csr_matrix = csr_matrix((np.ones(len(indices), dtype=bool), indices, indptr),
+		                                        shape=(len(tweets), len(self.hashtag_categories)))
+		# and the sorted rows of every hashtag, so a hashtag filter only reads the rows of its hashtags
+		self._hashtag_rows: csc_matrix = self._hashtags.tocsc()
+
+	@property
+	def hashtags(self) -> csr_matrix:
+		"""
+		Returns
+		-------
+		csr_matrix
+			the boolean matrix of the tweets of this table by hashtags
+		"""
+		return self._hashtags[self.rows]
+
+	def __len__(self) -> int:
+		return len(self.rows)
+
+	def __iter__(self) -> Iterator[Union[Tweet, TweetRecord]]:
+		return (self._tweets[row] for row in self.rows.tolist())
+
+	def to_list(self) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			the tweets of this table, in the order of the table
+		"""
+		return [self._tweets[row] for row in self.rows.tolist()]
+
+	def select(self, rows: np.ndarray) -> 'TweetTable':
+		"""
+		Selects rows of this table.
+
+		Parameters
+		----------
+		rows : np.ndarray
+			a boolean mask of the rows to keep, or the positions of the rows to keep, in order
+
+		Returns
+		-------
+		TweetTable
+			a new table with the selected rows
+		"""
+		if rows.dtype == bool:
+			rows: np.ndarray = np.flatnonzero(rows)
+
+		table: TweetTable = object.__new__(TweetTable)
+		table._tweets = self._tweets
+		table.rows = self.rows[rows]
+		table.datetime = self.datetime[rows]
+		table.country_codes = self.country_codes[rows]
+		table.country_categories = self.country_categories
+		table.continent_codes = self.continent_codes[rows]
+		table.continent_categories = self.continent_categories
+		table.denier = self.denier[rows]
+		table._hashtags = self._hashtags
+		table._hashtag_rows = self._hashtag_rows
+		table.hashtag_categories = self.hashtag_categories
+
+		return table
+
+	# masks
+
+	def hashtag_mask(self, hashtags: Iterable[str], match_all: bool = False) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		hashtags : Iterable[str]
+			the hashtags, with the '#' upfront
+		match_all : bool
+			True if a tweet needs all the hashtags, else any of the hashtags
+
+		Returns
+		-------
+		np.ndarray
+			a boolean mask of the tweets with any (or all) of the hashtags
+		"""
+		hashtags: List[str] = list(set(hashtags))
+		assert hashtags, 'Invalid hashtags: hashtags cannot be empty'
+		assert all(hashtags), 'Invalid hashtag: hashtag cannot be None or an empty string'
+
+		codes: np.ndarray = _codes(self.hashtag_categories, hashtags)
+		if match_all and len(codes) < len(hashtags):
+			# one of the hashtags is not used by any tweet
+			return np.zeros(len(self), dtype=bool)
+
+		# concatenate the rows of the hashtags, in the hashtag matrix of all the tweets
+		indptr: np.ndarray = self._hashtag_rows.indptr
+		rows: np.ndarray = np.concatenate([self._hashtag_rows.indices[indptr[code]:indptr[code + 1]] for code in codes]) \
+			if len(codes) > 0 else np.zeros(0, dtype=np.int32)
+
+		if match_all:
+			return (np.bincount(rows, minlength=self._hashtags.shape[0]) == len(codes))[self.rows]
+
+		mask: np.ndarray = np.zeros(self._hashtags.shape[0], dtype=bool)
+		mask[rows] = True
+
+		return mask[self.rows]
+
+	def country_code_mask(self, country_codes: Iterable[str]) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		country_codes : Iterable[str]
+			the country codes
+
+		Returns
+		-------
+		np.ndarray
+			a boolean mask of the tweets from any of the countries
+		"""
+		return _lookup_table(_codes(self.country_categories, country_codes), len(self.country_categories))[self.country_codes]
+
+	def continent_mask(self, continents: Iterable[str]) -> np.ndarray:
+		"""
+		Parameters
+		----------
+		continents : Iterable[str]
+			the continents
+
+		Returns
+		-------
+		np.ndarray
+			a boolean mask of the tweets from any of the continents
+		"""
+		return _lookup_table(_codes(self.continent_categories, continents), len(self.continent_categories))[self.continent_codes]
+
+	# filters
+
+	@instrument()
+	def filter_by_hashtag(self, hashtag: str) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		hashtag : str
+			the hashtag on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets with the provided hashtag
+		"""
+		return self.select(self.hashtag_mask([hashtag]))
+
+	@instrument()
+	def filter_by_hashtags_all(self, hashtags: List[str]) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		hashtags : List[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets with all of the provided hashtags
+		"""
+		return self.select(self.hashtag_mask(hashtags, match_all=True))
+
+	@instrument()
+	def filter_by_hashtags_any(self, hashtags: List[str]) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		hashtags : List[str]
+			the hashtags on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets with any of the provided hashtags
+		"""
+		return self.select(self.hashtag_mask(hashtags))
+
+	@instrument()
+	def filter_after(self, after: datetime) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		after : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted after the provided datetime
+		"""
+		return self.select(self.datetime > np.datetime64(after, 'us'))
+
+	@instrument()
+	def filter_before(self, before: datetime) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		before : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted before the provided datetime
+		"""
+		return self.select(self.datetime < np.datetime64(before, 'us'))
+
+	@instrument()
+	def filter_at(self, at: datetime) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		at : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted at the provided datetime
+		"""
+		return self.select(self.datetime == np.datetime64(at, 'us'))
+
+	@instrument()
+	def filter_between(self, after: datetime, before: datetime) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		after : datetime
+			the datetime on which to filter tweets
+		before : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted between the provided datetimes (inclusive)
+		"""
+		return self.select((self.datetime >= np.datetime64(after, 'us')) & (self.datetime <= np.datetime64(before, 'us')))
+
+	@instrument()
+	def filter_by_country_code(self, country_code: str) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		country_code : str
+			the country code on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted from the country with the provided country code
+		"""
+		return self.select(self.country_code_mask([country_code]))
+
+	@instrument()
+	def filter_by_country_codes(self, country_codes: List[str]) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		country_codes : List[str]
+			the country codes on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted from the countries with the provided country codes
+		"""
+		return self.select(self.country_code_mask(country_codes))
+
+	@instrument()
+	def filter_by_continent(self, continent: str) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		continent : str
+			the continent on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted from the provided continent
+		"""
+		return self.select(self.continent_mask([continent]))
+
+	@instrument()
+	def filter_by_continents(self, continents: List[str]) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		continents : List[str]
+			the continents on which to filter tweets
+
+		Returns
+		-------
+		TweetTable
+			the tweets tweeted from the provided continents
+		"""
+		return self.select(self.continent_mask(continents))
+
+	@instrument()
+	def filter_by_denier(self, denier: Union[bool, None]) -> 'TweetTable':
+		"""
+		Parameters
+		----------
+		denier : Union[bool, None]
+			the type on which to filter tweets (True = denier, False = acceptor, and None = unknown)
+
+		Returns
+		-------
+		TweetTable
+			the tweets of the provided type
+		"""
+		return self.select(self.denier == (-1 if denier is None else int(denier)))
+
+	# sorts
+
+	def sort_by_date_ascending(self) -> 'TweetTable':
+		"""
+		Returns
+		-------
+		TweetTable
+			the tweets sorted by datetime in ascending order, tweets with the same datetime keep their order
+		"""
+		return self.select(np.argsort(self.datetime.view(np.int64), kind='stable'))
+
+	def sort_by_date_descending(self) -> 'TweetTable':
+		"""
+		Returns
+		-------
+		TweetTable
+			the tweets sorted by datetime in descending order, tweets with the same datetime keep their order
+		"""
+		# the bitwise inverse reverses the order of the timestamps, without overflowing like a negation
+		return self.select(np.argsort(~self.datetime.view(np.int64), kind='stable'))
+
+	# groups
+
+	def group_by_country_code(self) -> Dict[str, 'TweetTable']:
+		"""
+		Returns
+		-------
+		Dict[str, TweetTable]
+			the tweets with a country code grouped by country code, in the order of their first tweet
+		"""
+		return self._group(self.country_codes, self.country_categories)
+
+	def group_by_continent(self) -> Dict[str, 'TweetTable']:
+		"""
+		Returns
+		-------
+		Dict[str, TweetTable]
+			the tweets with a continent grouped by continent, in the order of their first tweet
+		"""
+		return self._group(self.continent_codes, self.continent_categories)
+
+	def group_by_denier(self) -> Dict[bool, 'TweetTable']:
+		"""
+		Returns
+		-------
+		Dict[bool, TweetTable]
+			the tweets of a known type grouped by denier, in the order of their first tweet
+		"""
+		return self._group(self.denier.astype(np.int64), np.array([False, True], dtype=object))
+
+	def _group(self, codes: np.ndarray, categories: np.ndarray) -> Dict[Union[str, bool], 'TweetTable']:
+		# sort the known rows by code, keeping the order of the rows within a group
+		known: np.ndarray = np.flatnonzero(codes >= 0)
+		rows: np.ndarray = known[np.argsort(codes[known], kind='stable')]
+		group_codes, starts = np.unique(codes[rows], return_index=True)
+		groups: List[np.ndarray] = np.split(rows, starts[1:])
+
+		# order the groups by their first tweet, like a defaultdict that is filled in order
+		order: List[int] = sorted(range(len(groups)), key=lambda i: groups[i][0])
+
+		return {categories[group_codes[i]]: self.select(groups[i]) for i in order}
+
+
+def _categorical(values: List[Union[str, None]]) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	Encodes strings as categorical codes.
+
+	Parameters
+	----------
+	values : List[Union[str, None]]
+		the strings
+
+	Returns
+	-------
+	Tuple[np.ndarray, np.ndarray]
+		the code of every string (-1 = None) and the sorted categories
+	"""
+	categories: List[str] = sorted(set(value for value in values if value is not None))
+	index: Dict[str, int] = {category: i for i, category in enumerate(categories)}
+	codes: np.ndarray = np.array([-1 if value is None else index[value] for value in values], dtype=np.int32)
+
+	return codes, np.array(categories, dtype=object)
+
+
+def _codes(categories: np.ndarray, values: Iterable[str]) -> np.ndarray:
+	"""
+	Looks up the codes of strings in sorted categories.
+
+	Parameters
+	----------
+	categories : np.ndarray
+		the sorted categories
+	values : Iterable[str]
+		the strings
+
+	Returns
+	-------
+	np.ndarray
+		the codes of the strings that are categories
+	"""
+	values: List[str] = [value for value in set(values) if value is not None]
+	if len(categories) == 0 or not values:
+		return np.zeros(0, dtype=np.int64)
+
+	positions: np.ndarray = np.minimum(np.searchsorted(categories, values), len(categories) - 1)
+
+	return np.unique(positions[categories[positions] == np.array(values, dtype=object)])
+
+
+def _lookup_table(codes: np.ndarray, num_categories: int) -> np.ndarray:
+	"""
+	Creates a boolean lookup table of categorical codes, indexing it with a column of codes is a vectorized membership test.
+
+	Parameters
+	----------
+	codes : np.ndarray
+		the codes to look up
+	num_categories : int
+		the number of categories
+
+	Returns
+	-------
+	np.ndarray
+		True for every code to look up, with an extra False at the end, for the code -1 (None)
+	"""
+	table: np.ndarray = np.zeros(num_categories + 1, dtype=bool)
+	table[codes] = True
+
+	return table
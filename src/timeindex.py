@@ -0,0 +1,275 @@
+import threading
+from datetime import datetime, timedelta
+from typing import List, Union, Iterable, Iterator, Sequence
+
+import numpy as np
+from record import TweetRecord
+from tweet import Tweet
+
+
+class TweetView(Sequence):
+	"""
+	A read-only view of a range of a list of tweets, in ascending or descending order, that does not copy the tweets.
+	"""
+
+	def __init__(self, tweets: List[Union[Tweet, TweetRecord]], rows: range):
+		"""
+		Constructs a new TweetView object.
+
+		Parameters
+		----------
+		tweets : List[Union[Tweet, TweetRecord]]
+			the list of tweets
+		rows : range
+			the positions of the tweets of the view, in order
+		"""
+		self._tweets: List[Union[Tweet, TweetRecord]] = tweets
+		self._rows: range = rows
+
+	def __len__(self) -> int:
+		return len(self._rows)
+
+	def __getitem__(self, index: Union[int, slice]) -> Union[Tweet, TweetRecord, 'TweetView']:
+		if isinstance(index, slice):
+			return TweetView(self._tweets, self._rows[index])
+
+		return self._tweets[self._rows[index]]
+
+	def __iter__(self) -> Iterator[Union[Tweet, TweetRecord]]:
+		return (self._tweets[row] for row in self._rows)
+
+	def __reversed__(self) -> Iterator[Union[Tweet, TweetRecord]]:
+		return iter(self.reverse())
+
+	def reverse(self) -> 'TweetView':
+		"""
+		Returns
+		-------
+		TweetView
+			the same tweets, in the opposite order
+		"""
+		return TweetView(self._tweets, self._rows[::-1])
+
+	def to_list(self) -> List[Union[Tweet, TweetRecord]]:
+		"""
+		Returns
+		-------
+		List[Union[Tweet, TweetRecord]]
+			a copy of the tweets of the view
+		"""
+		if self._rows.step == 1:
+			return self._tweets[self._rows.start:self._rows.stop]
+
+		return list(self)
+
+
+class TimeIndex:
+	"""
+	A thread-safe index that keeps tweets sorted by datetime, and answers range and point queries
+	with binary searches in O(log N + k).
+
+	Batches of k tweets that are newer than the tweets in the index (like a live stream) are appended in O(k log k),
+	other batches are sorted and only merged with the tweets of the index in their time range, but the tweets and
+	datetimes are copied into a new list and array (so existing views stay valid), so they cost O(N + k log k),
+	also a batch that is older than the tweets in the index (like pages of a search, newest first).
+	Tweets with the same datetime keep the order in which they were added.
+	Views that were returned by queries stay valid while tweets are added.
+	"""
+
+	def __init__(self, tweets: Iterable[Union[Tweet, TweetRecord]] = ()):
+		"""
+		Constructs a new TimeIndex object.
+
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the initial tweets
+		"""
+		self._tweets: List[Union[Tweet, TweetRecord]] = []
+		# the sorted datetimes, with spare capacity at the end for appends
+		self._datetimes: np.ndarray = np.zeros(0, dtype='datetime64[us]')
+		self._lock: threading.Lock = threading.Lock()
+
+		self.add_all(tweets)
+
+	def __len__(self) -> int:
+		return len(self._tweets)
+
+	@property
+	def datetimes(self) -> np.ndarray:
+		"""
+		Returns
+		-------
+		np.ndarray
+			the sorted datetimes of the tweets, as datetime64[us]
+		"""
+		return self._datetimes[:len(self._tweets)]
+
+	def add(self, tweet: Union[Tweet, TweetRecord]) -> None:
+		"""
+		Adds a tweet to the index.
+
+		Parameters
+		----------
+		tweet : Union[Tweet, TweetRecord]
+			the tweet
+		"""
+		self.add_all([tweet])
+
+	def add_all(self, tweets: Iterable[Union[Tweet, TweetRecord]]) -> None:
+		"""
+		Adds a batch of tweets to the index.
+
+		Parameters
+		----------
+		tweets : Iterable[Union[Tweet, TweetRecord]]
+			the tweets
+		"""
+		tweets: List[Union[Tweet, TweetRecord]] = list(tweets)
+		if not tweets:
+			return
+
+		datetimes: np.ndarray = np.array([tweet.datetime for tweet in tweets], dtype='datetime64[us]')
+		order: np.ndarray = np.argsort(datetimes, kind='stable')
+		datetimes: np.ndarray = datetimes[order]
+		tweets: List[Union[Tweet, TweetRecord]] = [tweets[i] for i in order.tolist()]
+
+		with self._lock:
+			size: int = len(self._tweets)
+			# the tweets of the index in the time range of the batch, tweets at the same datetime go before the batch
+			lo: int = int(np.searchsorted(self._datetimes[:size], datetimes[0], 'right'))
+			hi: int = int(np.searchsorted(self._datetimes[:size], datetimes[-1], 'right'))
+
+			if lo == size:
+				# append, growing the capacity geometrically
+				if size + len(tweets) > len(self._datetimes):
+					capacity: np.ndarray = np.zeros(max(2 * len(self._datetimes), size + len(tweets)),
+					                                dtype='datetime64[us]')
+					capacity[:size] = self._datetimes[:size]
+					self._datetimes = capacity
+				self._datetimes[size:size + len(tweets)] = datetimes
+				self._tweets.extend(tweets)
+				return
+
+			# merge the batch with the tweets in its time range, into a new list and array,
+			# so existing views keep seeing the old ones
+			range_datetimes: np.ndarray = np.concatenate([self._datetimes[lo:hi], datetimes])
+			merged: np.ndarray = np.argsort(range_datetimes, kind='stable')
+			range_tweets: List[Union[Tweet, TweetRecord]] = self._tweets[lo:hi] + tweets
+			new_size: int = size + len(tweets)
+			capacity: np.ndarray = np.zeros(max(len(self._datetimes), new_size), dtype='datetime64[us]')
+			capacity[:lo] = self._datetimes[:lo]
+			capacity[lo:lo + len(merged)] = range_datetimes[merged]
+			capacity[lo + len(merged):new_size] = self._datetimes[hi:size]
+			self._tweets = self._tweets[:lo] + [range_tweets[i] for i in merged.tolist()] + self._tweets[hi:]
+			self._datetimes = capacity
+
+	def _view(self, start: Union[datetime, None], start_side: str, stop: Union[datetime, None],
+	          stop_side: str) -> TweetView:
+		with self._lock:
+			datetimes: np.ndarray = self._datetimes[:len(self._tweets)]
+			lo: int = int(np.searchsorted(datetimes, np.datetime64(start, 'us'), start_side)) if start is not None else 0
+			hi: int = int(np.searchsorted(datetimes, np.datetime64(stop, 'us'), stop_side)) if stop is not None \
+				else len(datetimes)
+
+			return TweetView(self._tweets, range(lo, max(lo, hi)))
+
+	def filter_before(self, before: datetime) -> TweetView:
+		"""
+		Parameters
+		----------
+		before : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetView
+			the tweets tweeted before the provided datetime, in ascending order
+		"""
+		return self._view(None, 'left', before, 'left')
+
+	def filter_after(self, after: datetime) -> TweetView:
+		"""
+		Parameters
+		----------
+		after : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetView
+			the tweets tweeted after the provided datetime, in ascending order
+		"""
+		return self._view(after, 'right', None, 'right')
+
+	def filter_at(self, at: datetime) -> TweetView:
+		"""
+		Parameters
+		----------
+		at : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetView
+			the tweets tweeted at the provided datetime
+		"""
+		return self._view(at, 'left', at, 'right')
+
+	def filter_between(self, after: datetime, before: datetime) -> TweetView:
+		"""
+		Parameters
+		----------
+		after : datetime
+			the datetime on which to filter tweets
+		before : datetime
+			the datetime on which to filter tweets
+
+		Returns
+		-------
+		TweetView
+			the tweets tweeted between the provided datetimes (inclusive), in ascending order
+		"""
+		return self._view(after, 'left', before, 'right')
+
+	def last(self, window: timedelta, now: Union[datetime, None] = None) -> TweetView:
+		"""
+		Finds the tweets of a sliding window, e.g. the last hour.
+
+		Parameters
+		----------
+		window : timedelta
+			the length of the window
+		now : Union[datetime, None]
+			the end of the window (inclusive), defaults to the datetime of the newest tweet
+
+		Returns
+		-------
+		TweetView
+			the tweets tweeted in the window, in ascending order
+		"""
+		if now is None:
+			with self._lock:
+				if not self._tweets:
+					return TweetView([], range(0))
+				now: datetime = self._datetimes[len(self._tweets) - 1].astype(datetime)
+
+		return self.filter_between(now - window, now)
+
+	def sort_by_date_ascending(self) -> TweetView:
+		"""
+		Returns
+		-------
+		TweetView
+			all the tweets, in ascending order
+		"""
+		return self._view(None, 'left', None, 'right')
+
+	def sort_by_date_descending(self) -> TweetView:
+		"""
+		Returns
+		-------
+		TweetView
+			all the tweets, in descending order (tweets with the same datetime in the opposite order in which they were added)
+		"""
+		return self.sort_by_date_ascending().reverse()
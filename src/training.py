@@ -0,0 +1,103 @@
+import argparse
+import os
+import time
+from typing import List, Tuple, Union, Iterator, Iterable
+
+import numpy as np
+from preprocessing import TweetPreprocessor
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.naive_bayes import ComplementNB
+from store import count_tweets, read_columns
+from vectorization import make_hashing_vectorizer
+
+# the classes of the denier classifier (True = denier, False = acceptor)
+CLASSES: np.ndarray = np.array([False, True])
+
+
+def iter_labelled_chunks(paths: Iterable[str], chunk_size: int = 10000) -> Iterator[Tuple[List[str], np.ndarray]]:
+	"""
+	Streams the texts and labels of labelled tweets from columnar stores, one chunk at a time.
+
+	Only the text and denier columns of one chunk are read at a time, and unlabelled tweets are skipped.
+
+	Parameters
+	----------
+	paths : Iterable[str]
+		the paths to the columnar stores
+	chunk_size : int
+		the number of tweets per chunk
+
+	Returns
+	-------
+	Iterator[Tuple[List[str], np.ndarray]]
+		the texts and labels of every chunk
+	"""
+	for path in paths:
+		num_tweets: int = count_tweets(path)
+		for start in range(0, num_tweets, chunk_size):
+			columns = read_columns(path, ['text', 'denier'], start, start + chunk_size)
+			labelled: np.ndarray = columns['denier'] != -1
+			if not labelled.any():
+				continue
+
+			texts: List[str] = [text for text, is_labelled in zip(columns['text'], labelled.tolist()) if is_labelled]
+			yield texts, columns['denier'][labelled].astype(bool)
+
+
+def partial_fit_chunks(chunks: Iterable[Tuple[List[str], np.ndarray]], model: Union[ComplementNB, None] = None,
+                       vectorizer: Union[HashingVectorizer, None] = None,
+                       preprocessor: Union[TweetPreprocessor, None] = None) -> ComplementNB:
+	"""
+	Trains a Complement Naive Bayes classifier incrementally, one chunk of labelled tweets at a time.
+
+	The texts are vectorized with a stateless hashing vectorizer, so an existing model can be updated with new
+	labelled tweets at any time, without retraining it on the tweets it has already seen.
+
+	Parameters
+	----------
+	chunks : Iterable[Tuple[List[str], np.ndarray]]
+		the texts and labels of every chunk
+	model : Union[ComplementNB, None]
+		the model to update, defaults to a new model
+	vectorizer : Union[HashingVectorizer, None]
+		the hashing vectorizer, defaults to make_hashing_vectorizer(), must be the same for every update of a model
+	preprocessor : Union[TweetPreprocessor, None]
+		the preprocessor, defaults to a TweetPreprocessor
+
+	Returns
+	-------
+	ComplementNB
+		the trained model
+	"""
+	if model is None:
+		model: ComplementNB = ComplementNB()
+	if vectorizer is None:
+		vectorizer: HashingVectorizer = make_hashing_vectorizer()
+	if preprocessor is None:
+		preprocessor: TweetPreprocessor = TweetPreprocessor()
+
+	for texts, labels in chunks:
+		model.partial_fit(vectorizer.transform(preprocessor.transform(texts)), labels, classes=CLASSES)
+
+	return model
+
+
+if __name__ == '__main__':
+	from bundle import save_bundle
+	from main import load_model, save_model
+
+	parser = argparse.ArgumentParser(description='Update a denier classifier with new labelled tweets.')
+	parser.add_argument('datasets', nargs='+', help='the paths to the columnar stores with labelled tweets')
+	parser.add_argument('--model', default='models/incremental_model.pickle', help='the path to the model to update')
+	parser.add_argument('--bundle', default='models/incremental_model.bundle', help='the path to the inference bundle')
+	parser.add_argument('--chunk-size', type=int, default=10000, help='the number of tweets per chunk')
+	args = parser.parse_args()
+
+	start: float = time.perf_counter()
+	incremental_model: Union[ComplementNB, None] = load_model(args.model) if os.path.exists(args.model) else None
+	incremental_model: ComplementNB = partial_fit_chunks(
+		iter_labelled_chunks(args.datasets, args.chunk_size), incremental_model)
+	save_model(incremental_model, args.model)
+	save_bundle(args.bundle, incremental_model, make_hashing_vectorizer(), TweetPreprocessor())
+	print(f'Trained on {int(incremental_model.class_count_.sum())} tweets in total, '
+	      f'updated in {time.perf_counter() - start:.2f}s')
@@ -1,16 +1,55 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Union, Dict, Any
 
+from gazetteer import Gazetteer
+from geocoding import GeocodingCache, geocode_country_code
 from geopy import GoogleV3
 from pycountry_convert import country_alpha2_to_continent_code, convert_continent_code_to_continent_name
 from tweepy.models import Status
 
 
+@lru_cache(maxsize=None)
+def continent_name(country_code: Union[str, None]) -> Union[str, None]:
+	"""
+	Gets the name of the continent of a country.
+
+	Parameters
+	----------
+	country_code : Union[str, None]
+		the country code (2 capital letters e.g. BE for Belgium)
+
+	Returns
+	-------
+	Union[str, None]
+		the name of the continent of the country, or None if the country code is incorrect
+	"""
+	if country_code is None or len(country_code) != 2:
+		# incorrect country code
+		return None
+
+	if country_code == 'AQ':
+		# special case
+		return 'Antarctica'
+
+	try:
+		# return continent name from country code
+		return convert_continent_code_to_continent_name(country_alpha2_to_continent_code(country_code))
+	except:
+		# return None if this fails
+		return None
+
+
 class Tweet:
 	"""
 	A wrapper around tweepy's Status object.
 	"""
 
+	# the offline gazetteer consulted before Google's geolocation API, None to disable
+	gazetteer: Union[Gazetteer, None] = Gazetteer()
+	# the geocoding cache shared by every tweet, None to always use Google's geolocation API
+	geocoding_cache: Union[GeocodingCache, None] = None
+
 	def __init__(self, status: Status):
 		"""
 		Constructs a new Tweet object from a tweepy's Status object.
@@ -22,9 +61,13 @@ class Tweet:
 
 		Properties
 		----------
-		status : Status
-			the provided status
+		status : Union[Status, None]
+			the provided status, None for stored tweets
 
+		id : int
+			the id of the tweet
+		keywords : List[str]
+			the search keywords that matched the tweet
 		text : str
 			the text
 		name : str
@@ -36,6 +79,11 @@ class Tweet:
 		datetime : datetime
 			the date and time at which the tweet was created
 
+		place_country_code : Union[str, None]
+			the country code of the tweet's place, if any
+		author_location : Union[str, None]
+			the location as provided by the author
+
 		country_code : Union[str, None]
 			the country code of the country where the tweet was created (2 capital letters e.g. BE for Belgium)
 		continent_name : Union[str, None]
@@ -46,12 +94,17 @@ class Tweet:
 		"""
 		self.status: Status = status
 
+		self.id: int = status.id
+		self.keywords: List[str] = []
 		self.text: str = status.full_text
 		self.name: str = status.author.name
 		self.username: str = f'@{status.author.screen_name}'
 		self.hashtags: List[str] = [f'#{hashtag["text"]}' for hashtag in status.entities['hashtags']]
 		self.datetime: datetime = status.created_at
 
+		self.place_country_code: Union[str, None] = status.place.country_code if status.place is not None else None
+		self.author_location: Union[str, None] = status.author.location
+
 		self.country_code: Union[str, None] = None
 		self.continent: Union[str, None] = None
 		self.add_location(None)
@@ -74,6 +127,61 @@ class Tweet:
 		        Continent:\t{self.continent}\n \
 		        Denier?\t{self.denier}'
 
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		"""
+		Restores a pickled Tweet object, including those pickled before the location fields were added.
+
+		Parameters
+		----------
+		state : Dict[str, Any]
+			the pickled attributes
+		"""
+		self.__dict__.update(state)
+
+		if 'author_location' not in state:
+			status: Status = state['status']
+			self.place_country_code: Union[str, None] = status.place.country_code if status.place is not None else None
+			self.author_location: Union[str, None] = status.author.location
+		if 'id' not in state:
+			self.id: int = state['status'].id
+			self.keywords: List[str] = []
+
+	@classmethod
+	def from_dict(cls, fields: Dict[str, Any]) -> 'Tweet':
+		"""
+		Constructs a new Tweet object without a tweepy's Status object, e.g. when loading stored tweets.
+
+		Parameters
+		----------
+		fields : Dict[str, Any]
+			the properties of the tweet, missing properties are set to None (or an empty list for lists)
+
+		Returns
+		-------
+		Tweet
+			the tweet
+		"""
+		tweet: Tweet = cls.__new__(cls)
+		tweet.status = None
+
+		tweet.id = fields.get('id')
+		tweet.keywords = fields.get('keywords', [])
+		tweet.text = fields.get('text')
+		tweet.name = fields.get('name')
+		tweet.username = fields.get('username')
+		tweet.hashtags = fields.get('hashtags', [])
+		tweet.datetime = fields.get('datetime')
+
+		tweet.place_country_code = fields.get('place_country_code')
+		tweet.author_location = fields.get('author_location')
+
+		tweet.country_code = fields.get('country_code')
+		tweet.continent = fields.get('continent')
+
+		tweet.denier = fields.get('denier')
+
+		return tweet
+
 	def has_hashtag(self, hashtag: str) -> bool:
 		"""
 		Checks if this tweet contains the provided hashtag.
@@ -305,33 +413,29 @@ class Tweet:
 			# already has country code
 			return
 
-		if self.status.place is not None \
-				and self.status.place.country_code is not None \
-				and len(self.status.place.country_code) == 2:
+		if self.place_country_code is not None \
+				and len(self.place_country_code) == 2:
 			# get country code from tweet's status
-			self.country_code: str = self.status.place.country_code
+			self.country_code: str = self.place_country_code
 			return
 
+		if Tweet.gazetteer is not None:
+			# resolve place from author offline
+			country_code: Union[str, None] = Tweet.gazetteer.resolve(self.author_location)
+			if country_code is not None:
+				self.country_code: str = country_code
+				return
+
 		if google_api is not None \
-				and self.status.author.location is not None \
-				and self.status.author.location != '':
-			# use place form author by looking it op on Google's geolocation api
+				and self.author_location is not None \
+				and self.author_location != '':
+			# use place form author by looking it op on Google's geolocation api (or in the geocoding cache)
 			try:
-				location: Any = google_api.geocode(query=self.status.author.location)
-				if location is not None \
-						and location.raw is not None \
-						and location.raw['address_components'] is not None:
-					address_component: List[Dict[str, str]] = location.raw['address_components']
-					country_code: Union[str, None] = address_component[-1]['short_name'] if 'country' in \
-					                                                                        address_component[-1][
-						                                                                        'types'] else None
-					if country_code is None:
-						country_code: Union[str, None] = address_component[-2]['short_name'] if 'country' in \
-						                                                                        address_component[-2][
-							                                                                        'types'] else None
-
-					self.country_code: Union[str, None] = country_code
-					return
+				if Tweet.geocoding_cache is not None:
+					self.country_code: Union[str, None] = Tweet.geocoding_cache.geocode(google_api, self.author_location)
+				else:
+					self.country_code: Union[str, None] = geocode_country_code(google_api, self.author_location)
+				return
 			except:
 				self.country_code: None = None
 				return
@@ -347,25 +451,15 @@ class Tweet:
 			# already has a continent name
 			return
 
-		if self.country_code is None or len(self.country_code) != 2:
-			# incorrect country code
-			self.continent: None = None
-			return
+		self.continent: Union[str, None] = continent_name(self.country_code)
 
-		if self.country_code == 'AQ':
-			# special case
-			self.continent: str = 'Antarctica'
-			return
+	def detach_status(self) -> None:
+		"""
+		Drops the reference to tweepy's Status object, e.g. after location resolution, to save memory.
 
-		try:
-			# return continent name from country code
-			self.continent: str = convert_continent_code_to_continent_name(
-				country_alpha2_to_continent_code(self.country_code))
-			return
-		except:
-			# return None if this fails
-			self.continent: None = None
-			return
+		All properties of the tweet remain available, as they are copied from the Status object on construction.
+		"""
+		self.status: None = None
 
 	def has_location(self) -> bool:
 		"""
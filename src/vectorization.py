@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Dict, Tuple, Union
+
+import numpy as np
+from instrumentation import instrument
+from preprocessing import TweetPreprocessor
+from scipy.sparse import csr_matrix, vstack
+from sklearn.base import clone
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+
+# the default number of tweets per chunk
+CHUNK_SIZE: int = 10000
+
+
+def make_hashing_vectorizer(n_features: int = 2 ** 20) -> HashingVectorizer:
+	"""
+	Creates a stateless vectorizer that counts words like a CountVectorizer, but in a fixed number of hashed features.
+
+	The counts are non-negative (no alternate signs) and not normalized, so they can be used with Naive Bayes.
+
+	Parameters
+	----------
+	n_features : int
+		the number of features
+
+	Returns
+	-------
+	HashingVectorizer
+		the vectorizer
+	"""
+	return HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+
+
+@instrument()
+def preprocess_parallel(corpus: List[str], preprocessor: Union[TweetPreprocessor, None] = None,
+                        n_jobs: Union[int, None] = None, chunk_size: int = CHUNK_SIZE) -> List[str]:
+	"""
+	Preprocesses a corpus on a process pool, in chunks.
+
+	Parameters
+	----------
+	corpus : List[str]
+		list of tweet texts
+	preprocessor : Union[TweetPreprocessor, None]
+		the preprocessor, defaults to a TweetPreprocessor
+	n_jobs : Union[int, None]
+		the number of processes, defaults to the number of CPUs
+	chunk_size : int
+		the number of tweets per chunk
+
+	Returns
+	-------
+	List[str]
+		list of tweet texts, but processed, identical to preprocessor.transform(corpus)
+	"""
+	if preprocessor is None:
+		preprocessor: TweetPreprocessor = TweetPreprocessor()
+
+	chunks: List[List[str]] = _split(corpus, chunk_size)
+	if len(chunks) <= 1 or n_jobs == 1:
+		return preprocessor.transform(corpus)
+
+	with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as executor:
+		return [text for chunk in executor.map(preprocessor.transform, chunks) for text in chunk]
+
+
+@instrument(items=lambda vectorizer, corpus, *args, **kwargs: len(corpus))
+def fit_transform_parallel(vectorizer: Union[CountVectorizer, HashingVectorizer], corpus: List[str],
+                           preprocessor: Union[TweetPreprocessor, None] = None, n_jobs: Union[int, None] = None,
+                           chunk_size: int = CHUNK_SIZE) -> csr_matrix:
+	"""
+	Fits a vectorizer and vectorizes a corpus on a process pool, in chunks, optionally preprocessing it first.
+
+	A HashingVectorizer is stateless, so the chunks are simply stacked.
+	For a CountVectorizer, every chunk gets its own vocabulary, which are merged into the (sorted) vocabulary
+	of the vectorizer afterwards, so document frequency limits (min_df, max_df and max_features) are not supported.
+
+	Parameters
+	----------
+	vectorizer : Union[CountVectorizer, HashingVectorizer]
+		the vectorizer, fitted in place
+	corpus : List[str]
+		list of tweet texts
+	preprocessor : Union[TweetPreprocessor, None]
+		the preprocessor, None if the corpus is already preprocessed
+	n_jobs : Union[int, None]
+		the number of processes, defaults to the number of CPUs
+	chunk_size : int
+		the number of tweets per chunk
+
+	Returns
+	-------
+	csr_matrix
+		the document-term matrix, identical to vectorizer.fit_transform(preprocessor.transform(corpus))
+	"""
+	if isinstance(vectorizer, HashingVectorizer):
+		return transform_parallel(vectorizer, corpus, preprocessor, n_jobs, chunk_size)
+
+	if vectorizer.min_df != 1 or vectorizer.max_df != 1.0 or vectorizer.max_features is not None:
+		raise ValueError('Invalid vectorizer: document frequency limits are not supported in parallel')
+
+	chunks: List[List[str]] = _split(corpus, chunk_size)
+	if len(chunks) <= 1 or n_jobs == 1:
+		return vectorizer.fit_transform(preprocessor.transform(corpus) if preprocessor is not None else corpus)
+
+	with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as executor:
+		results: List[Tuple[List[str], csr_matrix]] = list(
+			executor.map(partial(_fit_transform_chunk, clone(vectorizer), preprocessor), chunks))
+
+	# merge the vocabularies of the chunks, and map the columns of every chunk onto the merged vocabulary
+	vocabulary: Dict[str, int] = {term: i for i, term in enumerate(sorted(
+		set(term for terms, _ in results for term in terms)))}
+	matrices: List[csr_matrix] = []
+	for terms, matrix in results:
+		columns: np.ndarray = np.array([vocabulary[term] for term in terms], dtype=matrix.indices.dtype)
+		matrices.append(csr_matrix((matrix.data, columns[matrix.indices], matrix.indptr),
+		                           shape=(matrix.shape[0], len(vocabulary))))
+
+	vectorizer.vocabulary_ = vocabulary
+	vectorizer.fixed_vocabulary_ = False
+
+	return vstack(matrices, format='csr')
+
+
+@instrument(items=lambda vectorizer, corpus, *args, **kwargs: len(corpus))
+def transform_parallel(vectorizer: Union[CountVectorizer, HashingVectorizer], corpus: List[str],
+                       preprocessor: Union[TweetPreprocessor, None] = None, n_jobs: Union[int, None] = None,
+                       chunk_size: int = CHUNK_SIZE) -> csr_matrix:
+	"""
+	Vectorizes a corpus with a fitted (or stateless) vectorizer on a process pool, in chunks,
+	optionally preprocessing it first.
+
+	Parameters
+	----------
+	vectorizer : Union[CountVectorizer, HashingVectorizer]
+		the fitted or stateless vectorizer
+	corpus : List[str]
+		list of tweet texts
+	preprocessor : Union[TweetPreprocessor, None]
+		the preprocessor, None if the corpus is already preprocessed
+	n_jobs : Union[int, None]
+		the number of processes, defaults to the number of CPUs
+	chunk_size : int
+		the number of tweets per chunk
+
+	Returns
+	-------
+	csr_matrix
+		the document-term matrix, identical to vectorizer.transform(preprocessor.transform(corpus))
+	"""
+	chunks: List[List[str]] = _split(corpus, chunk_size)
+	if len(chunks) <= 1 or n_jobs == 1:
+		return _transform_chunk(vectorizer, preprocessor, corpus)
+
+	with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as executor:
+		return vstack(list(executor.map(partial(_transform_chunk, vectorizer, preprocessor), chunks)), format='csr')
+
+
+def _split(corpus: List[str], chunk_size: int) -> List[List[str]]:
+	return [corpus[i:i + chunk_size] for i in range(0, len(corpus), chunk_size)]
+
+
+def _fit_transform_chunk(vectorizer: CountVectorizer, preprocessor: Union[TweetPreprocessor, None],
+                         chunk: List[str]) -> Tuple[List[str], csr_matrix]:
+	try:
+		matrix: csr_matrix = vectorizer.fit_transform(preprocessor.transform(chunk) if preprocessor is not None else chunk)
+	except ValueError:
+		# a chunk without any terms, e.g. only stop words
+		return [], csr_matrix((len(chunk), 0), dtype=vectorizer.dtype)
+	# the columns of a CountVectorizer are sorted by term
+	terms: List[str] = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+
+	return terms, matrix
+
+
+def _transform_chunk(vectorizer: Union[CountVectorizer, HashingVectorizer],
+                     preprocessor: Union[TweetPreprocessor, None], chunk: List[str]) -> csr_matrix:
+	return vectorizer.transform(preprocessor.transform(chunk) if preprocessor is not None else chunk)
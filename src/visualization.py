@@ -1,15 +1,166 @@
+import hashlib
+import json
+import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Union, NamedTuple, Iterable
 
 import pygal
+from instrumentation import instrument
+
+# the names of the continents on the supranational world map
+CONTINENTS: Dict[str, str] = {
+	'Asia': 'asia',
+	'Europe': 'europe',
+	'Africa': 'africa',
+	'North America': 'north_america',
+	'South America': 'south_america',
+	'Oceania': 'oceania',
+	'Antarctica': 'antartica',
+}
+
+# the version of the rendering, part of the hash of every map, change it to invalidate the render cache
+RENDER_VERSION: int = 1
+
+
+class RenderSpec(NamedTuple):
+	"""
+	Everything needed to render one map.
+
+	Properties
+	----------
+	title : str
+		the title of the map
+	series : Dict[str, Dict[str, float]]
+		the series of the map: the value per country code (or continent), per series name
+	filename : str
+		the name of the SVG file, without extension
+	per_continent : bool
+		True for a supranational world map (continents), else a world map (countries)
+	"""
+	title: str
+	series: Dict[str, Dict[str, float]]
+	filename: str
+	per_continent: bool = False
+
+	def plain(self) -> 'RenderSpec':
+		"""
+		Returns
+		-------
+		RenderSpec
+			the same spec, with plain dictionaries and numbers as series, so it can be hashed and pickled
+		"""
+		return self._replace(series={name: {key: value.item() if hasattr(value, 'item') else value
+		                                    for key, value in values.items()}
+		                             for name, values in self.series.items()})
+
+	def digest(self) -> str:
+		"""
+		Returns
+		-------
+		str
+			the hash of the spec, that changes when the map would change
+		"""
+		spec: RenderSpec = self.plain()
+
+		return hashlib.sha256(json.dumps([RENDER_VERSION, spec.title, spec.series, spec.per_continent],
+		                                 sort_keys=True).encode('utf-8')).hexdigest()
 
 
 def visualize(title: str, series: defaultdict, filename: str, per_continent: bool) -> None:
-	if per_continent:
+	render(RenderSpec(title, series, filename, per_continent))
+
+
+def render(spec: RenderSpec, directory: str = 'images') -> str:
+	"""
+	Renders a map.
+
+	Parameters
+	----------
+	spec : RenderSpec
+		the map
+	directory : str
+		the directory of the SVG file
+
+	Returns
+	-------
+	str
+		the path to the SVG file
+	"""
+	if spec.per_continent:
 		world = pygal.maps.world.SupranationalWorld()
 	else:
 		world = pygal.maps.world.World()
 
-	world.title = title
-	for s in series.items():
+	world.title = spec.title
+	for s in spec.series.items():
 		world.add(*s)
-	world.render_to_file(f'images/{filename}.svg')
+
+	os.makedirs(directory, exist_ok=True)
+	path: str = os.path.join(directory, f'{spec.filename}.svg')
+	world.render_to_file(path)
+
+	return path
+
+
+@instrument()
+def render_all(specs: Iterable[RenderSpec], directory: str = 'images', cache_path: Union[str, None] = 'cache/render.json',
+               max_workers: Union[int, None] = None) -> List[str]:
+	"""
+	Renders many maps on a process pool, skipping the maps that did not change since they were last rendered.
+
+	A map is skipped if its SVG file exists and the hash of its spec is the one in the render cache,
+	a JSON file that maps every rendered file to the hash of its spec.
+
+	Parameters
+	----------
+	specs : Iterable[RenderSpec]
+		the maps
+	directory : str
+		the directory of the SVG files
+	cache_path : Union[str, None]
+		the path to the render cache, None to render every map
+	max_workers : Union[int, None]
+		the number of processes, defaults to the number of CPUs
+
+	Returns
+	-------
+	List[str]
+		the paths to the SVG files that were rendered
+	"""
+	cache: Dict[str, str] = {}
+	if cache_path is not None and os.path.exists(cache_path):
+		with open(cache_path) as file:
+			cache: Dict[str, str] = json.load(file)
+
+	# the maps that changed, with plain series, so they can be sent to the processes
+	todo: Dict[str, RenderSpec] = {}
+	digests: Dict[str, str] = {}
+	num_specs: int = 0
+	for spec in specs:
+		num_specs += 1
+		path: str = os.path.join(directory, f'{spec.filename}.svg')
+		digest: str = spec.digest()
+		if cache.get(path) != digest or not os.path.exists(path):
+			todo[path] = spec.plain()
+			digests[path] = digest
+
+	if len(todo) == 1 or max_workers == 1:
+		paths: List[str] = [render(spec, directory) for spec in todo.values()]
+	elif todo:
+		# every process keeps pygal and its world maps loaded for all the maps it renders
+		with ProcessPoolExecutor(max_workers=max_workers) as executor:
+			paths: List[str] = list(executor.map(render, todo.values(), [directory] * len(todo)))
+	else:
+		paths: List[str] = []
+
+	if cache_path is not None and todo:
+		cache.update(digests)
+		os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+		with open(f'{cache_path}.tmp', 'w') as file:
+			json.dump(cache, file, indent=1, sort_keys=True)
+		os.replace(f'{cache_path}.tmp', cache_path)
+
+	print(f'Rendered {len(paths)} maps, skipped {num_specs - len(todo)} unchanged maps')
+
+	return paths
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules of the project are imported by name from src, like the scripts in src do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
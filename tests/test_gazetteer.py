@@ -0,0 +1,47 @@
+import pytest
+
+from gazetteer import Gazetteer
+
+
+@pytest.fixture(scope='module')
+def gazetteer() -> Gazetteer:
+	return Gazetteer()
+
+
+@pytest.mark.parametrize('location, country_code', [
+	# an ambiguous qualifier, settled by the other parts
+	('Atlanta, Georgia', 'US'),
+	('Tbilisi, Georgia', 'GE'),
+	('Perth, WA', 'AU'),
+	('Seattle, WA', 'US'),
+	# a region or state qualifier wins over the country of a city
+	('London, ON', 'CA'),
+	('Paris, TX', 'US'),
+	('Savannah, Georgia', 'US'),
+	# a single name is a country first
+	('Georgia', 'GE'),
+	('London', 'GB'),
+	('Paris, France', 'FR'),
+	('London, UK', 'GB'),
+	('Ghent, Belgium', 'BE'),
+])
+def test_resolve_qualified(gazetteer: Gazetteer, location: str, country_code: str) -> None:
+	assert gazetteer.resolve(location) == country_code
+
+
+@pytest.mark.parametrize('location', ['Me', 'me', 'it', 'no', 'my', 'can', 'PA', 'CA', 'somewhere', '', None])
+def test_resolve_words_are_not_countries(gazetteer: Gazetteer, location: str) -> None:
+	assert gazetteer.resolve(location) is None
+
+
+@pytest.mark.parametrize('location, country_code', [
+	('USA', 'US'),
+	('UK', 'GB'),
+	('BE', 'BE'),
+	('TX', 'US'),
+	('Paris, FR', 'FR'),
+	('paris, fr', 'FR'),
+	('\U0001F1E7\U0001F1EA', 'BE'),
+])
+def test_resolve_codes(gazetteer: Gazetteer, location: str, country_code: str) -> None:
+	assert gazetteer.resolve(location) == country_code
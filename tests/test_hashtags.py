@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import List
+
+from hashtags import HashtagIndex
+from record import TweetRecord
+
+
+def _tweets() -> List[TweetRecord]:
+	return [TweetRecord('a', 'A', 'a', hashtags, datetime(2020, 4, 19), None, None, None)
+	        for hashtags in (['#COVID19'], ['#covid19', '#hoax'], ['#Hoax'], [])]
+
+
+def test_case_folded() -> None:
+	index: HashtagIndex = HashtagIndex(_tweets())
+
+	assert index.postings('#Covid19').tolist() == [0, 1]
+	assert index.query(any_of=['#HOAX']).tolist() == [1, 2]
+	assert index.query(all_of=['#covid19', '#hoax']).tolist() == [1]
+	assert index.query(none_of=['#covid19']).tolist() == [2, 3]
+
+
+def test_case_sensitive() -> None:
+	index: HashtagIndex = HashtagIndex(_tweets(), case_sensitive=True)
+
+	assert index.postings('#covid19').tolist() == [1]
+	assert index.query(any_of=['#hoax', '#Hoax']).tolist() == [1, 2]
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+
+from record import TweetRecord
+from rollup import RollupCube
+
+
+def _tweets() -> List[TweetRecord]:
+	return [
+		TweetRecord('a', 'A', 'a', [], datetime(2020, 4, 19, 10, 30), 'BE', 'Europe', True),
+		TweetRecord('b', 'B', 'b', [], datetime(2020, 4, 19, 23, 59), 'BE', 'Europe', False),
+		TweetRecord('c', 'C', 'c', [], datetime(2020, 4, 20, 1, 0), 'US', 'North America', True),
+		TweetRecord('d', 'D', 'd', [], datetime(2020, 4, 21, 12, 0), 'US', 'North America', None),
+		TweetRecord('e', 'E', 'e', [], datetime(2020, 4, 21, 12, 0), None, None, True),
+	]
+
+
+def test_save_load_resample(tmp_path) -> None:
+	cube: RollupCube = RollupCube.from_tweets(_tweets())
+	path: str = str(tmp_path / 'cube.npz')
+	cube.save(path)
+	loaded: RollupCube = RollupCube.load(path)
+
+	assert isinstance(loaded.start, datetime) and loaded.start == cube.start
+	assert isinstance(loaded.bucket_size, timedelta) and loaded.bucket_size == cube.bucket_size
+	np.testing.assert_array_equal(loaded.counts, cube.counts)
+	np.testing.assert_array_equal(loaded.country_codes, cube.country_codes)
+	np.testing.assert_array_equal(loaded.continents, cube.continents)
+
+	resampled: RollupCube = loaded.resample(timedelta(days=1))
+	expected: RollupCube = cube.resample(timedelta(days=1))
+	assert resampled.buckets == expected.buckets == [datetime(2020, 4, 19), datetime(2020, 4, 20), datetime(2020, 4, 21)]
+	np.testing.assert_array_equal(resampled.counts, expected.counts)
+	assert resampled.denier_ratio_per_bucket() == expected.denier_ratio_per_bucket()
+	assert resampled.num_tweets_per_country() == {'World': {'be': 2, 'us': 2}}
@@ -0,0 +1,25 @@
+from concurrent.futures import Future
+from typing import List
+
+from bundle import load_bundle, save_bundle
+from scoring import ScoringService
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import ComplementNB
+
+
+def _service(path: str) -> ScoringService:
+	texts: List[str] = ['corona is a hoax', 'fake virus hoax', 'stay home stay safe', 'thank the nurses']
+	vectorizer: CountVectorizer = CountVectorizer()
+	model: ComplementNB = ComplementNB().fit(vectorizer.fit_transform(texts), [True, True, False, False])
+	save_bundle(path, model, vectorizer)
+
+	return ScoringService(load_bundle(path), max_latency=0.2)
+
+
+def test_cancel_then_score(tmp_path) -> None:
+	with _service(str(tmp_path / 'bundle')) as service:
+		future: Future = service.submit('hoax')
+		assert future.cancel()
+
+		assert service.score(['hoax', 'stay safe'], timeout=5) == [True, False]
+		assert future.cancelled()